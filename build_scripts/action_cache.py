@@ -0,0 +1,345 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+    Module contains local cache of results of build config actions
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from common.helper import hash_file, remove_directory
+
+# Change it if layout of the cache or set of hashed data was changed
+CACHE_VERSION = '2'
+
+# Objects which are not used by any entry are kept for this time (in seconds),
+# because entry of the object can be still in process of saving
+_ORPHAN_OBJECT_TIMEOUT = 60 * 60
+
+
+class ActionCache(object):
+    """
+    Content-addressed storage of action outputs
+
+    Layout:
+        cache_dir
+            objects/<digest[:2]>/<digest> (content of cached files)
+            entries/<key>.json (outputs of action; modification time is used as time of last access)
+            lock (several processes can share the cache: saving and restoring hold shared lock on the file,
+                  eviction holds exclusive one; locking is available on POSIX systems only)
+    """
+
+    def __init__(self, cache_dir, max_size):
+        """
+        :param cache_dir: Path to cache directory
+        :type cache_dir: pathlib.Path
+
+        :param max_size: Maximum size of stored objects in bytes
+        :type max_size: Integer
+        """
+
+        self._objects_dir = cache_dir / 'objects'
+        self._entries_dir = cache_dir / 'entries'
+        self._tmp_dir = cache_dir / 'tmp'
+        self._lock_path = cache_dir / 'lock'
+        self._max_size = max_size
+        self._lock = threading.Lock()
+
+        for directory in (self._objects_dir, self._entries_dir, self._tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self._log = logging.getLogger(self.__class__.__name__)
+
+    def get_key(self, cmd, env, work_dir, revisions, inputs=()):
+        """
+        Get key of action results
+
+        Content of the working directory is not hashed (it is defined by revisions of repositories
+        and by previous actions), so files which are not under version control must be declared in inputs
+
+        :param cmd: Formatted command line of action
+        :type cmd: String
+
+        :param env: Environment variables set by build config
+        :type env: Dict
+
+        :param work_dir: Working directory of action
+        :type work_dir: pathlib.Path
+
+        :param revisions: Revisions of product repositories ({<repo_name>: <commit_id>})
+        :type revisions: Dict
+
+        :param inputs: Paths to files and directories read by action
+        :type inputs: List
+
+        :return: Hex digest
+        :rtype: String
+        """
+
+        key = hashlib.sha256()
+        key.update(json.dumps({
+            'version': CACHE_VERSION,
+            'cmd': cmd,
+            'env': {str(name): str(value) for name, value in env.items()},
+            'work_dir': str(work_dir),
+            'revisions': revisions,
+        }, sort_keys=True).encode('utf-8'))
+
+        for input_path in inputs:
+            input_path = str(input_path)
+            if os.path.islink(input_path):
+                key.update(f'link:{input_path}:{os.readlink(input_path)}\n'.encode('utf-8'))
+            elif os.path.isdir(input_path):
+                for root, dirs, files in os.walk(input_path):
+                    dirs.sort()
+                    for name in sorted(files):
+                        path = os.path.join(root, name)
+                        if os.path.islink(path):
+                            key.update(f'link:{path}:{os.readlink(path)}\n'.encode('utf-8'))
+                        else:
+                            key.update(f'file:{path}:{hash_file(path)}\n'.encode('utf-8'))
+            elif os.path.exists(input_path):
+                key.update(f'file:{input_path}:{hash_file(input_path)}\n'.encode('utf-8'))
+            else:
+                key.update(f'missing:{input_path}\n'.encode('utf-8'))
+
+        return key.hexdigest()
+
+    @contextmanager
+    def _locked(self, exclusive=False):
+        """
+        Hold lock of the cache shared between processes
+        """
+
+        if fcntl is None:
+            yield
+            return
+
+        with open(str(self._lock_path), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _object_path(self, digest):
+        return self._objects_dir / digest[:2] / digest
+
+    def _entry_path(self, key):
+        return self._entries_dir / f'{key}.json'
+
+    def _store_object(self, path):
+        """
+        Put file to the storage
+
+        :return: Digest of the file
+        :rtype: String
+        """
+
+        digest = hash_file(path)
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            object_path.parent.mkdir(exist_ok=True)
+            handle, tmp_path = tempfile.mkstemp(dir=str(self._tmp_dir))
+            os.close(handle)
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, str(object_path))
+        return digest
+
+    def save(self, key, outputs):
+        """
+        Save outputs of action to the cache
+
+        :param key: Key of action results
+        :type key: String
+
+        :param outputs: Paths to files and directories created by action
+        :type outputs: List
+        """
+
+        with self._locked():
+            self._save_entry(key, outputs)
+
+        self._log.info('Results are saved to cache with key %s', key)
+        self._evict()
+
+    def _save_entry(self, key, outputs):
+        entry = {}
+        for output in outputs:
+            if output.is_dir() and not output.is_symlink():
+                layout = {'type': 'dir', 'dirs': [], 'files': [], 'links': []}
+                for root, dirs, files in os.walk(output):
+                    for name in dirs + files:
+                        path = os.path.join(root, name)
+                        rel_path = os.path.relpath(path, output)
+                        if os.path.islink(path):
+                            layout['links'].append([rel_path, os.readlink(path)])
+                            if name in dirs:
+                                dirs.remove(name)
+                        elif name in dirs:
+                            layout['dirs'].append(rel_path)
+                        else:
+                            layout['files'].append(
+                                [rel_path, self._store_object(path), os.stat(path).st_mode & 0o777])
+            elif output.is_symlink():
+                layout = {'type': 'link', 'target': os.readlink(output)}
+            elif output.exists():
+                layout = {'type': 'file', 'digest': self._store_object(output),
+                          'mode': output.stat().st_mode & 0o777}
+            else:
+                layout = {'type': 'missing'}
+            entry[str(output)] = layout
+
+        handle, tmp_path = tempfile.mkstemp(dir=str(self._tmp_dir))
+        with os.fdopen(handle, 'w') as tmp_file:
+            json.dump(entry, tmp_file)
+        os.replace(tmp_path, str(self._entry_path(key)))
+
+    def _restore_file(self, digest, path, mode):
+        shutil.copyfile(str(self._object_path(digest)), path)
+        os.chmod(path, mode)
+
+    def restore(self, key):
+        """
+        Restore outputs of action from the cache
+
+        :param key: Key of action results
+        :type key: String
+
+        :return: Flag whether results were restored
+        :rtype: Boolean
+        """
+
+        with self._locked():
+            return self._restore_entry(key)
+
+    def _restore_entry(self, key):
+        entry_path = self._entry_path(key)
+        try:
+            entry = json.loads(entry_path.read_text())
+            # mark entry as recently used
+            os.utime(str(entry_path))
+        except (OSError, ValueError):
+            return False
+
+        try:
+            for output, layout in entry.items():
+                output = pathlib.Path(output)
+                if output.is_symlink() or output.is_file():
+                    output.unlink()
+                elif output.exists():
+                    remove_directory(str(output))
+
+                if layout['type'] == 'missing':
+                    continue
+
+                output.parent.mkdir(parents=True, exist_ok=True)
+                if layout['type'] == 'link':
+                    os.symlink(layout['target'], str(output))
+                elif layout['type'] == 'file':
+                    self._restore_file(layout['digest'], str(output), layout['mode'])
+                else:
+                    output.mkdir()
+                    for rel_path in layout['dirs']:
+                        (output / rel_path).mkdir(parents=True, exist_ok=True)
+                    for rel_path, digest, mode in layout['files']:
+                        self._restore_file(digest, str(output / rel_path), mode)
+                    for rel_path, target in layout['links']:
+                        os.symlink(target, str(output / rel_path))
+        except Exception:
+            self._log.exception('Can not restore results with key %s from cache', key)
+            return False
+
+        self._log.info('Results are restored from cache with key %s', key)
+        return True
+
+    @staticmethod
+    def _get_entry_digests(entry_path):
+        digests = set()
+        try:
+            entry = json.loads(entry_path.read_text())
+        except (OSError, ValueError):
+            return digests
+
+        for layout in entry.values():
+            if layout['type'] == 'file':
+                digests.add(layout['digest'])
+            elif layout['type'] == 'dir':
+                digests.update(digest for _, digest, _ in layout['files'])
+        return digests
+
+    def _evict(self):
+        """
+        Remove least recently used entries while size of cache is bigger than the limit;
+        objects not used by any entry are removed too
+        """
+
+        with self._lock, self._locked(exclusive=True):
+            entries = []
+            for entry_path in self._entries_dir.glob('*.json'):
+                try:
+                    entries.append((entry_path.stat().st_mtime, entry_path))
+                except OSError:
+                    pass
+            entries.sort()
+
+            references = defaultdict(int)
+            entries_digests = {}
+            for _, entry_path in entries:
+                entries_digests[entry_path] = self._get_entry_digests(entry_path)
+                for digest in entries_digests[entry_path]:
+                    references[digest] += 1
+
+            sizes = {}
+            now = time.time()
+            for object_path in self._objects_dir.glob('*/*'):
+                object_stat = object_path.stat()
+                if object_path.name in references:
+                    sizes[object_path.name] = object_stat.st_size
+                elif now - object_stat.st_mtime > _ORPHAN_OBJECT_TIMEOUT:
+                    object_path.unlink()
+
+            total_size = sum(sizes.values())
+            for _, entry_path in entries:
+                if total_size <= self._max_size:
+                    break
+
+                self._log.info('Remove %s from cache', entry_path.stem)
+                entry_path.unlink()
+                for digest in entries_digests[entry_path]:
+                    references[digest] -= 1
+                    if not references[digest] and digest in sizes:
+                        total_size -= sizes.pop(digest)
+                        self._object_path(digest).unlink()
@@ -33,6 +33,7 @@ During manual running, only the "build" step is performed if stage is not specif
 """
 
 import argparse
+import functools
 import json
 import multiprocessing
 import os
@@ -40,24 +41,31 @@ import pathlib
 import platform
 import re
 import shutil
+import stat
 import sys
 import logging
 from collections import OrderedDict
 from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 from build_scripts.common_runner import ConfigGenerator, Action, RunnerException
+from build_scripts.action_cache import ActionCache
+from build_scripts.pack_cache import PackCache
 from common.helper import Stage, Product_type, Build_event, Build_type, make_archive, \
-    copy_win_files, rotate_dir, cmd_exec, copytree, get_packing_cmd, ErrorCode, TargetArch, extract_archive, create_file
+    copy_win_files, cmd_exec, copytree, get_packing_cmd, ErrorCode, TargetArch, extract_archive, create_file, \
+    remove_directory, upload_dir
 
-from common.logger_conf import configure_logger
+from common.logger_conf import configure_logger, remove_file_handler
+from common.lazy_import import lazy_retry
 from common.git_worker import ProductState
 from common.mediasdk_directories import MediaSdkDirectories
 from common.build_number import get_build_number
 from common.manifest_manager import Manifest, Component, Repository
 
+_ELF_MAGIC = b'\x7fELF'
+
 
 class UnsupportedVSError(RunnerException):
     """
@@ -196,7 +204,7 @@ class VsComponent(Action):
                 project_path.unlink()
                 new_project_path.rename(project_path)
 
-    def run(self, options=None):
+    def run(self, options=None, job_server=None):
         """
         Script runner
 
@@ -206,7 +214,24 @@ class VsComponent(Action):
         self._generate_cmd()
         self._enable_vs_multi_processor_compilation()
 
-        return super().run(options)
+        return super().run(options, job_server)
+
+
+def _is_elf_file(path):
+    """
+    Check whether file is ELF binary by its magic number
+
+    :param path: Path to file
+    :type path: pathlib.Path
+
+    :return: Boolean
+    """
+
+    try:
+        with path.open('rb') as binary:
+            return binary.read(len(_ELF_MAGIC)) == _ELF_MAGIC
+    except OSError:
+        return False
 
 
 class BuildGenerator(ConfigGenerator):
@@ -215,9 +240,16 @@ class BuildGenerator(ConfigGenerator):
     Contains commands for building product.
     """
 
+    # Repositories are extracted and built before these stages, so result of configuration file is not changed;
+    # build stage is not included, because configuration file can probe results of build (ex: glob BUILD_DIR)
+    # and it configures loggers of build actions
+    _config_snapshot_stages = (Stage.INSTALL.value, Stage.PACK.value, Stage.COPY.value)
+    _config_snapshot_fields = ('_dev_pkg_data_to_archive', '_install_pkg_data_to_archive')
+
     def __init__(self, build_config_path, root_dir, build_type, product_type, build_event, stage,
                  commit_time=None, changed_repo=None, repo_states_file_path=None, target_arch=None,
-                 custom_cli_args=None, target_branch=None, manifest_file=None, component_name=None):
+                 custom_cli_args=None, target_branch=None, manifest_file=None, component_name=None,
+                 action_cache_dir=None, action_cache_size=None, git_mirror_dir=None):
         """
         :param build_config_path: Path to build configuration file
         :type build_config_path: pathlib.Path
@@ -252,6 +284,15 @@ class BuildGenerator(ConfigGenerator):
 
         :param custom_cli_args: Dict of custom command line arguments (ex. 'arg': 'value')
         :type custom_cli_args: Dict
+
+        :param action_cache_dir: Path to cache of action results (cache is disabled if not set)
+        :type action_cache_dir: pathlib.Path
+
+        :param action_cache_size: Maximum size of cache of action results in bytes
+        :type action_cache_size: Integer
+
+        :param git_mirror_dir: Path to directory with bare mirrors of repositories used for cloning
+        :type git_mirror_dir: pathlib.Path
         """
 
         self._default_stage = Stage.BUILD.value
@@ -270,6 +311,10 @@ class BuildGenerator(ConfigGenerator):
             "BUILD_DIR": root_dir / "build",
             "INSTALL_DIR": root_dir / "install",
             "PACK_DIR": root_dir / "pack",
+            # Flag for reusing compressed content of files of previous .tar.gz packages;
+            # packages are bigger, see build_scripts/pack_cache.py
+            "PACK_CACHE": False,
+            "PACK_CACHE_DIR": root_dir / "pack_cache",  # not removed by 'clean' stage
             "DEPENDENCIES_DIR": root_dir / "dependencies",
             "BUILD_TYPE": build_type,  # sets from command line argument ('release' by default)
             "CPU_CORES": multiprocessing.cpu_count(),  # count of logical CPU cores
@@ -283,6 +328,10 @@ class BuildGenerator(ConfigGenerator):
         self._target_arch = target_arch
         self._target_branch = target_branch
         self._manifest_file = manifest_file
+        self._git_mirror_dir = git_mirror_dir
+
+        if action_cache_dir:
+            self._action_cache = ActionCache(action_cache_dir, action_cache_size)
 
         manifest_path = pathlib.Path(manifest_file) if manifest_file else self._config_path.parent / 'manifest.yml'
         if manifest_path.exists():
@@ -319,6 +368,20 @@ class BuildGenerator(ConfigGenerator):
             self._branch_name = 'master'
             self._changed_repo_name = None
 
+        self._config_key_data.update({
+            'build_type': build_type,
+            'product_type': product_type,
+            'build_event': build_event,
+            'commit_time': commit_time,
+            'changed_repo': changed_repo,
+            'repo_states': self._repo_states,
+            'target_arch': target_arch,
+            'custom_cli_args': custom_cli_args,
+            'target_branch': self._target_branch,
+            'manifest': manifest_path.read_text() if manifest_path.exists() else None,
+            'component_name': component_name,
+        })
+
     def _update_global_vars(self):
         self._global_vars.update({
             'vs_component': self._vs_component,
@@ -351,12 +414,24 @@ class BuildGenerator(ConfigGenerator):
                 self._product_repos[repo['name']] = {
                     'branch': repo.get('branch'),
                     'commit_id': repo.get('commit_id'),
-                    'url': MediaSdkDirectories.get_repo_url_by_name(repo['name'])
+                    'url': MediaSdkDirectories.get_repo_url_by_name(repo['name']),
+                    'clone_depth': repo.get('clone_depth'),
+                    'partial_clone': repo.get('partial_clone', False)
                 }
 
         self._product = self._config_variables.get('PRODUCT_NAME', 'mediasdk')
 
-    def _action(self, name, stage=None, cmd=None, work_dir=None, env=None, callfunc=None, verbose=False):
+    def _get_repo_revisions(self):
+        repo_states_file = self._options["PACK_DIR"] / 'repo_states.json'
+        if repo_states_file.exists():
+            repo_states = json.loads(repo_states_file.read_text())
+        else:
+            repo_states = self._repo_states or {}
+
+        return {repo_name: state['commit_id'] for repo_name, state in repo_states.items()}
+
+    def _action(self, name, stage=None, cmd=None, work_dir=None, env=None, callfunc=None, verbose=False,
+                depends_on=None, parallel=False, outputs=None, inputs=None):
         """
         Handler for 'action' from build config file
 
@@ -378,6 +453,18 @@ class BuildGenerator(ConfigGenerator):
         :param callfunc: python function, which need to execute
         :type callfunc: tuple (function_name, args, kwargs) | None
 
+        :param depends_on: Names of actions of the same stage which must be completed before this one
+        :type depends_on: None | List
+
+        :param parallel: Flag for running the action concurrently with other parallel actions
+        :type parallel: Boolean
+
+        :param outputs: Files and directories created by the action (used for caching of results)
+        :type outputs: None | List
+
+        :param inputs: Files and directories read by the action besides repositories (used for caching of results)
+        :type inputs: None | List
+
         :return: None | Exception
         """
 
@@ -391,8 +478,9 @@ class BuildGenerator(ConfigGenerator):
             if stage in [Stage.BUILD.value, Stage.INSTALL.value]:
                 work_dir = self._options["BUILD_DIR"]
         if stage == Stage.BUILD.value and self._current_stage == Stage.BUILD.value:
-            configure_logger(name, self._options['LOGS_DIR'] / 'build' / f'{name}.log')
-        self._actions[stage].append(Action(name, stage, cmd, work_dir, env, callfunc, verbose))
+            self._configure_action_logger(name, self._options['LOGS_DIR'] / 'build' / f'{name}.log')
+        self._actions[stage].append(Action(name, stage, cmd, work_dir, env, callfunc, verbose,
+                                           depends_on, parallel, outputs, inputs))
 
     def _vs_component(self, name, solution_path, msbuild_args=None, vs_version="vs2017",
                       dependencies=None, env=None, verbose=False):
@@ -428,11 +516,12 @@ class BuildGenerator(ConfigGenerator):
                 else:
                     ms_arguments[key] = msbuild_args[key]
         if self._current_stage == Stage.BUILD.value:
-            configure_logger(name, self._options['LOGS_DIR'] / 'build' / f'{name}.log')
+            self._configure_action_logger(name, self._options['LOGS_DIR'] / 'build' / f'{name}.log')
         self._actions[Stage.BUILD.value].append(VsComponent(name, solution_path, ms_arguments, vs_version,
                                                             dependencies, env, verbose))
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=30))
+    @lazy_retry(lambda tenacity: {'stop': tenacity.stop_after_attempt(3),
+                                  'wait': tenacity.wait_exponential(multiplier=30)})
     def _clean(self):
         """
         Clean build directories
@@ -445,7 +534,8 @@ class BuildGenerator(ConfigGenerator):
         for directory in remove_dirs:
             dir_path = self._options.get(directory)
             if dir_path.exists():
-                shutil.rmtree(dir_path)
+                # next stages do not use removed data, so it is deleted in background
+                remove_directory(dir_path, background=True)
 
         self._options["LOGS_DIR"].mkdir(parents=True, exist_ok=True)
 
@@ -528,7 +618,8 @@ class BuildGenerator(ConfigGenerator):
 
         product_state = ProductState(self._product_repos,
                                      self._options["REPOS_DIR"],
-                                     self._commit_time)
+                                     self._commit_time,
+                                     self._git_mirror_dir)
 
         product_state.extract_all_repos()
 
@@ -624,24 +715,22 @@ class BuildGenerator(ConfigGenerator):
             self._log.critical(f'Can not pack data on this OS: {platform.system()}')
             return False
 
+        archives = {}
+
         # creating install package
         if self._install_pkg_data_to_archive:
-            if not make_archive(self._options["PACK_DIR"] / f"install_pkg.{extension}",
-                                self._install_pkg_data_to_archive):
-                no_errors = False
+            archives[f"install_pkg.{extension}"] = self._install_pkg_data_to_archive
         else:
             self._log.info('Install package empty. Skip packing.')
 
         # creating developer package
         if self._dev_pkg_data_to_archive:
-            if not make_archive(self._options["PACK_DIR"] / f"developer_pkg.{extension}",
-                                self._dev_pkg_data_to_archive):
-                no_errors = False
+            archives[f"developer_pkg.{extension}"] = self._dev_pkg_data_to_archive
         else:
             self._log.info('Developer package empty. Skip packing.')
 
         # creating logs package
-        logs_data = [
+        archives[f"logs.{extension}"] = [
             {
                 'from_path': self._options['ROOT_DIR'],
                 'relative': [
@@ -651,9 +740,25 @@ class BuildGenerator(ConfigGenerator):
                 ]
             },
         ]
-        if not make_archive(self._options["PACK_DIR"] / f"logs.{extension}",
-                            logs_data):
-            no_errors = False
+
+        # .tar.gz archives reuse compressed content of files of previous packing if cache is enabled
+        # compressing threads of each archive are limited by job slots of the stage (if they are set)
+        pack_cache = None
+        archive_function = functools.partial(make_archive, threads=self._options['JOB_SLOTS'])
+        if extension == "tar.gz" and self._options["PACK_CACHE"]:
+            pack_cache = PackCache(self._options["PACK_CACHE_DIR"], threads=self._options['JOB_SLOTS'])
+            archive_function = pack_cache.make_archive
+
+        # archives are created concurrently, because files of each archive are read
+        # and added to tar stream by one thread (only compression is multithreaded)
+        with ThreadPoolExecutor(max_workers=len(archives)) as executor:
+            results = [executor.submit(archive_function, self._options["PACK_DIR"] / archive_name, data_to_archive)
+                       for archive_name, data_to_archive in archives.items()]
+            if not all(result.result() for result in results):
+                no_errors = False
+
+        if pack_cache:
+            pack_cache.remove_unused_blocks()
 
         if not no_errors:
             self._log.error('Not all data was packed')
@@ -704,17 +809,13 @@ class BuildGenerator(ConfigGenerator):
             self._product_type, self._options["BUILD_TYPE"], product=self._product)
 
         build_root_dir = MediaSdkDirectories.get_root_builds_dir()
-        rotate_dir(build_dir)
 
         self._log.info('Copy to %s', build_dir)
         self._log.info('Artifacts are available by: %s', build_url)
 
-        # Workaround for copying to samba share on Linux
-        # to avoid exceptions while setting Linux permissions.
-        _orig_copystat = shutil.copystat
-        shutil.copystat = lambda x, y, follow_symlinks=True: x
-        shutil.copytree(self._options['PACK_DIR'], build_dir)
-        shutil.copystat = _orig_copystat
+        # Files identical to previous artifacts of this build are not transferred again,
+        # previous artifacts are rotated after uploading
+        upload_dir(self._options['PACK_DIR'], build_dir)
 
         if not self._run_build_config_actions(Stage.COPY.value):
             return False
@@ -726,10 +827,75 @@ class BuildGenerator(ConfigGenerator):
                 if build_state['status'] == "PASS":
                     last_build_path = build_dir.relative_to(build_root_dir)
                     last_build_file = build_dir.parent.parent / f'last_build_{self._product_type}'
-                    last_build_file.write_text(str(last_build_path))
+                    # file is replaced at once, so readers never get partially written path
+                    tmp_last_build_file = last_build_file.with_name(f'.{last_build_file.name}.{os.getpid()}')
+                    tmp_last_build_file.write_text(str(last_build_path))
+                    os.replace(str(tmp_last_build_file), str(last_build_file))
 
         return True
 
+    def _strip_bin_in_slot(self, binary):
+        with self.job_slot():
+            return self._strip_bin(binary)
+
+    @staticmethod
+    def _get_debug_file(binary):
+        return binary.parent / f'{binary.stem}.sym'
+
+    def _strip_bins_in_order(self, binaries):
+        """
+        Strip binaries one by one (they have the same debug file)
+
+        :return: List of results
+        """
+
+        return [self._strip_bin_in_slot(binary) for binary in binaries]
+
+    def _strip_bin(self, binary):
+        """
+        Strip binary and save debug information to <binary name without extension>.sym
+
+        :param binary: Path to ELF file
+        :type binary: pathlib.Path
+
+        :return: Boolean
+        """
+
+        orig_file = str(binary.absolute())
+        debug_file = str(self._get_debug_file(binary).absolute())
+        self._log.debug('-' * 80)
+        self._log.debug(f'Stripping {orig_file}')
+
+        strip_commands = OrderedDict([
+            ('copy_debug', ['objcopy',
+                            '--only-keep-debug',
+                            orig_file,
+                            debug_file]),
+            ('strip', ['strip',
+                       '--strip-debug',
+                       '--strip-unneeded',
+                       '--remove-section=.comment',
+                       orig_file]),
+            ('add_debug_link', ['objcopy',
+                                f'--add-gnu-debuglink={debug_file}',
+                                orig_file]),
+        ])
+
+        no_errors = True
+        for command in strip_commands.values():
+            err, out = cmd_exec(command, shell=False, log=self._log, verbose=False)
+            if err:
+                no_errors = False
+                self._log.error(out)
+
+        try:
+            os.chmod(debug_file, os.stat(debug_file).st_mode & ~(stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH))
+        except OSError:
+            self._log.exception(f'Can not remove executable permission from {debug_file}')
+            no_errors = False
+
+        return no_errors
+
     def _strip_bins(self):
         """
         Strip binaries and save debug information
@@ -743,55 +909,36 @@ class BuildGenerator(ConfigGenerator):
         system_os = platform.system()
 
         if system_os == 'Linux':
-            bins_to_strip = []
-            binaries_with_error = []
             executable_bin_filter = ['', '.so']
             search_results = self._options['BUILD_DIR'].rglob('*')
 
+            # symlinks to binaries are not stripped second time
+            bins_to_strip = {}
             for path in search_results:
-                if path.is_file():
-                    if os.access(path, os.X_OK) and path.suffix in executable_bin_filter:
-                        bins_to_strip.append(path)
-
-            for result in bins_to_strip:
-                orig_file = str(result.absolute())
-                debug_file = str((result.parent / f'{result.stem}.sym').absolute())
-                self._log.debug('-' * 80)
-                self._log.debug(f'Stripping {orig_file}')
-
-                strip_commands = OrderedDict([
-                    ('copy_debug', ['objcopy',
-                                    '--only-keep-debug',
-                                    orig_file,
-                                    debug_file]),
-                    ('strip', ['strip',
-                               '--strip-debug',
-                               '--strip-unneeded',
-                               '--remove-section=.comment',
-                               orig_file]),
-                    ('add_debug_link', ['objcopy',
-                                        f'--add-gnu-debuglink={debug_file}',
-                                        orig_file]),
-                    ('set_chmod', ['chmod',
-                                   '-x',
-                                   debug_file])
-                ])
-
-                check_binary_command = f'file {orig_file} | grep ELF'
-
-                for command in strip_commands.values():
-                    err, out = cmd_exec(command, shell=False, log=self._log, verbose=False)
-                    if err:
-                        # Not strip file if it is not binary
-                        return_code, out_check_binary = cmd_exec(check_binary_command, shell=True, log=self._log,
-                                                                 verbose=False)
-                        if return_code:
-                            self._log.warning(f"File {orig_file} is not binary")
-                            break
-                        if orig_file not in binaries_with_error:
-                            binaries_with_error.append(orig_file)
-                        self._log.error(out)
-                        continue
+                if path.suffix in executable_bin_filter and path.is_file() \
+                        and os.access(path, os.X_OK) and _is_elf_file(path):
+                    real_path = path.resolve()
+                    if real_path not in bins_to_strip or bins_to_strip[real_path].is_symlink():
+                        bins_to_strip[real_path] = path
+
+            # binaries with the same debug file (ex: foo and foo.so write foo.sym) are stripped
+            # one by one in order of search, so the debug file of the last binary is kept as before
+            binary_groups = OrderedDict()
+            for binary in bins_to_strip.values():
+                binary_groups.setdefault(self._get_debug_file(binary), []).append(binary)
+            for debug_file, binaries in binary_groups.items():
+                if len(binaries) > 1:
+                    self._log.warning('Debug information of %s is saved to the same file %s',
+                                      ', '.join(str(binary) for binary in binaries), debug_file)
+
+            # other binaries are independent, so they are stripped concurrently;
+            # each binary takes a job slot if JOB_SLOTS is set, otherwise only size of pool limits them
+            with ThreadPoolExecutor(max_workers=self._options['JOB_SLOTS'] or os.cpu_count()) as executor:
+                results = executor.map(self._strip_bins_in_order, binary_groups.values())
+                binaries_with_error = [str(binary.absolute())
+                                       for binaries, group_results in zip(binary_groups.values(), results)
+                                       for binary, no_errors in zip(binaries, group_results)
+                                       if not no_errors]
 
             if binaries_with_error:
                 self._log.error('Stripping for next binaries was failed. See full log for details:\n%s',
@@ -995,6 +1142,11 @@ in format: <repo_name>:<branch>:<commit_id>
     parser.add_argument("--stage", default=Stage.BUILD.value,
                         choices=[stage.value for stage in Stage],
                         help="Current executable stage")
+    parser.add_argument("--stages", nargs='+', metavar="STAGE",
+                        choices=[stage.value for stage in Stage],
+                        help=f'''Several stages executed one by one in the same process
+(ex: --stages clean extract build); overrides --stage.
+Logs and status of each stage are the same as for separate runs''')
     parser.add_argument('-t', "--commit-time", metavar='datetime',
                         help="Time of commits (ex. 2017-11-02 07:36:40)")
     parser.add_argument('-ta', "--target-arch",
@@ -1004,16 +1156,22 @@ in format: <repo_name>:<branch>:<commit_id>
                         help='Architecture of target platform')
     parser.add_argument('-tb', "--target-branch",
                         help=f'All not triggered repos will be checkout to this branch.')
+    parser.add_argument("--action-cache", metavar="PATH",
+                        help="Path to local cache of action results (caching is disabled if not set)")
+    parser.add_argument("--action-cache-size", metavar="GB", type=int, default=50,
+                        help="Maximum size of the cache of action results in gigabytes")
+    parser.add_argument("--git-mirror-dir", metavar="PATH",
+                        help="Path to directory with local mirrors of repositories shared between builds")
 
     parsed_args, unknown_args = parser.parse_known_args()
 
+    stages = parsed_args.stages or [parsed_args.stage]
+
     configure_logger()
-    if parsed_args.stage != Stage.CLEAN.value:
-        configure_logger(logs_path=pathlib.Path(parsed_args.root_dir) / 'logs' / f'{parsed_args.stage}.log')
     log = logging.getLogger('build_runner.main')
 
     # remove duplicated values
-    target_arch = list(set(parsed_args.target_arch))
+    target_arch = list(dict.fromkeys(parsed_args.target_arch))
 
     custom_cli_args = {}
     if unknown_args:
@@ -1030,55 +1188,74 @@ in format: <repo_name>:<branch>:<commit_id>
     else:
         commit_time = None
 
-    try:
-        build_config = BuildGenerator(
-            build_config_path=pathlib.Path(parsed_args.build_config).absolute(),
-            root_dir=pathlib.Path(parsed_args.root_dir).absolute(),
-            build_type=parsed_args.build_type,
-            product_type=parsed_args.product_type,
-            build_event=parsed_args.build_event,
-            commit_time=commit_time,
-            changed_repo=parsed_args.changed_repo,
-            repo_states_file_path=parsed_args.repo_states,
-            custom_cli_args=custom_cli_args,
-            stage=parsed_args.stage,
-            target_arch=target_arch,
-            target_branch=parsed_args.target_branch,
-            manifest_file=parsed_args.manifest,
-            component_name=parsed_args.component
-        )
-
-        if not parsed_args.changed_repo \
-                and not parsed_args.repo_states \
-                and (not parsed_args.manifest or not parsed_args.component):
-            log.warning('"--changed-repo" or "--repo-states" or "--manifest" and "--component" '
-                        'arguments are not set, "HEAD" revision and "master" branch will be used')
-        elif parsed_args.changed_repo and parsed_args.repo_states:
-            log.warning('The --repo-states argument is ignored because the --changed-repo is set')
-
-        # prepare build configuration
-        if build_config.generate_config():
-            # run stage of build
-            no_errors = build_config.run_stage(parsed_args.stage)
-        else:
-            log.critical('Failed to process the product configuration')
-            no_errors = False
+    build_config = None
+    is_config_actual = False
+    for stage in stages:
+        stage_log_path = None
+        if stage != Stage.CLEAN.value:
+            stage_log_path = pathlib.Path(parsed_args.root_dir) / 'logs' / f'{stage}.log'
+            configure_logger(logs_path=stage_log_path)
 
-    except Exception:
-        no_errors = False
-        log.exception('Exception occurred')
+        try:
+            if build_config is None:
+                build_config = BuildGenerator(
+                    build_config_path=pathlib.Path(parsed_args.build_config).absolute(),
+                    root_dir=pathlib.Path(parsed_args.root_dir).absolute(),
+                    build_type=parsed_args.build_type,
+                    product_type=parsed_args.product_type,
+                    build_event=parsed_args.build_event,
+                    commit_time=commit_time,
+                    changed_repo=parsed_args.changed_repo,
+                    repo_states_file_path=parsed_args.repo_states,
+                    custom_cli_args=custom_cli_args,
+                    stage=stage,
+                    target_arch=target_arch,
+                    target_branch=parsed_args.target_branch,
+                    manifest_file=parsed_args.manifest,
+                    component_name=parsed_args.component,
+                    action_cache_dir=pathlib.Path(parsed_args.action_cache).absolute() if parsed_args.action_cache else None,
+                    action_cache_size=parsed_args.action_cache_size * 1024 ** 3,
+                    git_mirror_dir=pathlib.Path(parsed_args.git_mirror_dir).absolute() if parsed_args.git_mirror_dir else None
+                )
 
-    build_state_file = pathlib.Path(parsed_args.root_dir) / 'build_state'
-    if no_errors:
-        if not build_state_file.exists():
-            build_state_file.write_text(json.dumps({'status': "PASS"}))
-        log.info('-' * 50)
-        log.info("%s STAGE COMPLETED", parsed_args.stage.upper())
-    else:
-        build_state_file.write_text(json.dumps({'status': "FAIL"}))
-        log.error('-' * 50)
-        log.error("%s STAGE FAILED", parsed_args.stage.upper())
-        exit(ErrorCode.CRITICAL.value)
+                if not parsed_args.changed_repo \
+                        and not parsed_args.repo_states \
+                        and (not parsed_args.manifest or not parsed_args.component):
+                    log.warning('"--changed-repo" or "--repo-states" or "--manifest" and "--component" '
+                                'arguments are not set, "HEAD" revision and "master" branch will be used')
+                elif parsed_args.changed_repo and parsed_args.repo_states:
+                    log.warning('The --repo-states argument is ignored because the --changed-repo is set')
+            else:
+                build_config.set_current_stage(stage)
+
+            # prepare build configuration
+            # (it is executed again only after stages which change data used by configuration file)
+            if is_config_actual or build_config.generate_config():
+                # run stage of build
+                no_errors = build_config.run_stage(stage)
+                is_config_actual = stage in BuildGenerator._config_snapshot_stages
+            else:
+                log.critical('Failed to process the product configuration')
+                no_errors = False
+
+        except Exception:
+            no_errors = False
+            log.exception('Exception occurred')
+
+        build_state_file = pathlib.Path(parsed_args.root_dir) / 'build_state'
+        if no_errors:
+            if not build_state_file.exists():
+                build_state_file.write_text(json.dumps({'status': "PASS"}))
+            log.info('-' * 50)
+            log.info("%s STAGE COMPLETED", stage.upper())
+        else:
+            build_state_file.write_text(json.dumps({'status': "FAIL"}))
+            log.error('-' * 50)
+            log.error("%s STAGE FAILED", stage.upper())
+            exit(ErrorCode.CRITICAL.value)
+
+        if stage_log_path:
+            remove_file_handler(stage_log_path)
 
 
 if __name__ == '__main__':
@@ -22,12 +22,26 @@
     Module contains base class for build and test runners
 """
 
+import hashlib
 import logging
+import marshal
 import os
 import pathlib
+import pickle
 import platform
-from collections import defaultdict
+import sys
+import tempfile
+import time
+import types
+import concurrent.futures
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from copy import deepcopy
+from build_scripts.job_server import JobServer
+from build_scripts.timings import get_usage, get_usage_delta, mark_overlapped, save_stage_timings, \
+    stage_started
 from common.helper import cmd_exec, Stage, ErrorCode
+from common.logger_conf import configure_logger, remove_file_handler
 
 
 class RunnerException(Exception):
@@ -38,12 +52,20 @@ class DefaultStageException(RunnerException):
     pass
 
 
+class ActionDependencyException(RunnerException):
+    pass
+
+
 class Action(object):
     """
     Command line script runner
     """
 
-    def __init__(self, name, stage, cmd, work_dir, env, callfunc, verbose):
+    # Count of error lines kept for the failure report in stream mode
+    _max_error_lines = 100
+
+    def __init__(self, name, stage, cmd, work_dir, env, callfunc, verbose, depends_on=None, parallel=False,
+                 outputs=None, inputs=None):
         """
         :param name: Name of action
         :type name: String
@@ -65,6 +87,18 @@ class Action(object):
 
         :param verbose: Flag for output all logs
         :type verbose: Boolean
+
+        :param depends_on: Names of actions of the same stage which must be completed before this one
+        :type depends_on: None | List
+
+        :param parallel: Flag for running the action concurrently with other parallel actions
+        :type parallel: Boolean
+
+        :param outputs: Files and directories created by the action (used for caching of results)
+        :type outputs: None | List
+
+        :param inputs: Files and directories read by the action besides repositories (used for caching of results)
+        :type inputs: None | List
         """
 
         self.repo_name = name
@@ -74,16 +108,101 @@ class Action(object):
         self.env = env
         self.callfunc = callfunc
         self.verbose = verbose
+        self.depends_on = depends_on or []
+        self.parallel = parallel
+        self.outputs = outputs or []
+        self.inputs = inputs or []
+        # time and resources used by the last run (see build_scripts.timings)
+        self.timing = None
+        self._output_bytes = 0
 
         self.log = logging.getLogger(name)
 
-    def run(self, options=None):
+    def __getstate__(self):
+        # loggers can not be pickled in Python 3.6
+        state = self.__dict__.copy()
+        del state['log']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.log = logging.getLogger(self.repo_name)
+
+    def format_cmd(self, options=None):
+        """
+        Get command line with values of options
+
+        :return: String
+        """
+
+        cmd = ' && '.join(self.cmd) if isinstance(self.cmd, list) else self.cmd
+        if options:
+            cmd = cmd.format_map(options)
+        return cmd
+
+    def get_env(self, options=None):
+        """
+        Get environment variables set by build config for the action
+
+        :return: Dict
+        """
+
+        env = {}
+        if options and options.get('ENV'):
+            env.update(options['ENV'])
+        if self.env:
+            env.update(self.env)
+        return env
+
+    def _get_paths(self, paths, options=None):
+        result = []
+        for path in paths:
+            if isinstance(path, str) and options:
+                path = path.format_map(options)
+            path = pathlib.Path(path)
+            if not path.is_absolute() and self.work_dir:
+                path = self.work_dir / path
+            result.append(path)
+        return result
+
+    def get_outputs(self, options=None):
+        """
+        Get paths of outputs of the action
+
+        :return: List of pathlib.Path
+        """
+
+        return self._get_paths(self.outputs, options)
+
+    def get_inputs(self, options=None):
+        """
+        Get paths of inputs of the action
+
+        :return: List of pathlib.Path
+        """
+
+        return self._get_paths(self.inputs, options)
+
+    def run(self, options=None, job_server=None):
         """
         Script runner
 
+        :param job_server: Pool of job slots of the stage, which is passed to command through MAKEFLAGS
+        :type job_server: JobServer | None
+
         :return: None | subprocess.CalledProcessError
         """
 
+        start_usage = get_usage()
+        self._output_bytes = 0
+
+        error_code = self._run(options, job_server)
+
+        self.timing = get_usage_delta(start_usage)
+        self.timing.update(exit_code=error_code or 0, output_bytes=self._output_bytes)
+        return error_code
+
+    def _run(self, options, job_server):
         self.log.info('-' * 50)
 
         if self.callfunc:
@@ -101,23 +220,23 @@ class Action(object):
                 return error_code
 
         if self.cmd:
-            if isinstance(self.cmd, list):
-                self.cmd = ' && '.join(self.cmd)
+            self.cmd = self.format_cmd(options)
 
             env = os.environ.copy()
-
-            if options:
-                self.cmd = self.cmd.format_map(options)
-                if options.get('ENV'):
-                    env.update(options['ENV'])
-
-            if self.env:
-                env.update(self.env)
+            pass_fds = ()
+            if job_server:
+                env.update(job_server.get_env())
+                pass_fds = job_server.pass_fds
+            env.update(self.get_env(options))
 
             if self.work_dir:
                 self.work_dir.mkdir(parents=True, exist_ok=True)
 
-            error_code, out = cmd_exec(self.cmd, env=env, cwd=self.work_dir, log=self.log)
+            if options and options.get('STREAM_OUTPUT'):
+                return self._run_cmd_stream(env, pass_fds)
+
+            error_code, out = cmd_exec(self.cmd, env=env, cwd=self.work_dir, log=self.log, pass_fds=pass_fds)
+            self._output_bytes = len(out.encode('utf-8')) if out else 0
 
             if error_code:
                 self._parse_logs(out)
@@ -131,9 +250,41 @@ class Action(object):
 
             return error_code
 
-    def _parse_logs(self, stdout):
-        self.log.error(stdout)
-        output = [""]
+    def _run_cmd_stream(self, env, pass_fds):
+        """
+        Run command and send its output to the logger line by line;
+        errors are searched while the command is running
+
+        :return: Error code
+        """
+
+        error_substrings = self._get_error_substrings()
+        error_lines = deque(maxlen=self._max_error_lines)
+        log_out = self.log.info if self.verbose else self.log.debug
+
+        def handle_line(line):
+            self._output_bytes += len(line.encode('utf-8')) + 1
+            log_out(line)
+            if error_substrings and any(error_substring in line for error_substring in error_substrings):
+                error_lines.append(line)
+
+        error_code, tail = cmd_exec(self.cmd, env=env, cwd=self.work_dir, log=self.log,
+                                    stream=True, line_handler=handle_line, pass_fds=pass_fds)
+
+        if error_code:
+            self.log.error(tail)
+            self._report_errors(error_lines)
+        else:
+            log_out('completed')
+
+        return error_code
+
+    def _get_error_substrings(self):
+        """
+        Get substrings of lines with compilation errors for current OS
+
+        :return: List | None
+        """
 
         # linux error example:
         # .../graphbuilder.h:19:9: error: ‘class YAML::GraphBuilderInterface’ has virtual ...
@@ -142,25 +293,161 @@ class Action(object):
         # LINK : fatal error LNK1257: code generation failed ...
 
         if platform.system() == 'Windows':
-            error_substrings = [' error ']
+            return [' error ']
         elif platform.system() == 'Linux':
-            error_substrings = [': error', 'error:']
-        else:
-            error_substrings = None
-            self.log.warning(f'Unsupported OS for parsing errors: {platform.system()}')
+            return [': error', 'error:']
+
+        self.log.warning(f'Unsupported OS for parsing errors: {platform.system()}')
+        return None
+
+    def _report_errors(self, error_lines):
+        if error_lines:
+            output = [""]
+            output.extend(error_lines)
+            output.append("The errors above were found in the output. "
+                          "See full log for details.")
+            self.log.error('\n'.join(output))
+
+    def _parse_logs(self, stdout):
+        self.log.error(stdout)
 
+        error_substrings = self._get_error_substrings()
         if error_substrings:
-            for line in stdout.splitlines():
-                if any(error_substring in line for error_substring in error_substrings):
-                    output.append(line)
-            if len(output) > 1:
-                output.append("The errors above were found in the output. "
-                              "See full log for details.")
-                self.log.error('\n'.join(output))
+            self._report_errors([line for line in stdout.splitlines()
+                                 if any(error_substring in line for error_substring in error_substrings)])
+
+
+class ActionScheduler(object):
+    """
+    Runner of stage actions as a dependency graph on a bounded pool of threads
+
+    Action without 'parallel' flag waits for all actions declared before it.
+    Parallel action waits only for the previous not parallel action
+    and for actions from its 'depends_on' list.
+    """
+
+    def __init__(self, actions, run_action, max_workers):
+        """
+        :param actions: Actions of the stage in order of declaration
+        :type actions: List
+
+        :param run_action: Function which runs an action and returns its error code
+        :type run_action: function
+
+        :param max_workers: Maximum count of actions running at the same time
+        :type max_workers: Integer
+        """
+
+        self._actions = actions
+        self._run_action = run_action
+        self._max_workers = max(1, max_workers or 1)
+
+        self._log = logging.getLogger(self.__class__.__name__)
+
+    def _get_dependencies(self):
+        """
+        Get indexes of required actions for each action
+
+        :return: List of sets
+        """
+
+        indexes_by_name = defaultdict(set)
+        dependencies = []
+        barrier = set()
+
+        for index, action in enumerate(self._actions):
+            required = set()
+            for name in action.depends_on:
+                if name not in indexes_by_name:
+                    raise ActionDependencyException(
+                        f'Action "{action.repo_name}" depends on "{name}", '
+                        f'which is not declared before it in stage "{action.stage}"')
+                required.update(indexes_by_name[name])
+
+            if action.parallel:
+                required.update(barrier)
+            else:
+                required.update(range(index))
+                barrier = {index}
+
+            dependencies.append(required)
+            indexes_by_name[action.repo_name].add(index)
+
+        return dependencies
+
+    def _safe_run(self, action):
+        try:
+            return self._run_action(action)
+        except Exception:
+            action.log.exception('Exception occurred')
+            return ErrorCode.CRITICAL.value
+
+    def run(self):
+        """
+        Run all actions; actions depending on failed one are cancelled
+
+        :return: Boolean
+        """
+
+        dependencies = self._get_dependencies()
+
+        completed = set()
+        failed = set()
+        cancelled = set()
+        pending = list(range(len(self._actions)))
+        running = {}
+        error_codes = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            while pending or running:
+                # dependencies always have lower indexes,
+                # so one pass in order of declaration propagates cancelling
+                for index in list(pending):
+                    if dependencies[index] & (failed | cancelled):
+                        self._log.error('Action "%s" is cancelled because of failed dependencies',
+                                        self._actions[index].repo_name)
+                        cancelled.add(index)
+                        pending.remove(index)
+                    elif dependencies[index] <= completed:
+                        future = executor.submit(self._safe_run, self._actions[index])
+                        running[future] = index
+                        pending.remove(index)
+
+                if not running:
+                    continue
+
+                done, _ = concurrent.futures.wait(running,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    error_codes[index] = future.result()
+                    if error_codes[index]:
+                        failed.add(index)
+                    else:
+                        completed.add(index)
+
+        for index, action in enumerate(self._actions):
+            if index in cancelled:
+                status = 'CANCELLED'
+            elif index in failed:
+                status = f'FAILED (exit code {error_codes[index]})'
+            else:
+                status = 'PASSED'
+            self._log.info('%s: %s', action.repo_name, status)
+
+        return not failed and not cancelled
 
 
 class ConfigGenerator:
     _default_stage = None
+    # Stages which can use saved result of configuration file instead of executing it
+    # (data used by configuration file should not be changed in these stages).
+    # Result is saved by the first of these stages and removed by any other stage.
+    # Snapshot is invalidated by content of configuration file, version of Python,
+    # parameters of runner (_config_key_data) and revisions of repositories (_get_repo_revisions)
+    _config_snapshot_stages = ()
+    # Fields of runner changed by configuration file, which are saved with its result
+    _config_snapshot_fields = ()
 
     def __init__(self, root_dir, config_path, current_stage):
         self._config_path = config_path
@@ -168,10 +455,28 @@ class ConfigGenerator:
         self._actions = defaultdict(list)
         self._options = {
             "ROOT_DIR": root_dir,
-            "LOGS_DIR": root_dir / 'logs'
+            "LOGS_DIR": root_dir / 'logs',
+            "MAX_PARALLEL_ACTIONS": os.cpu_count(),  # limit of actions running at the same time
+            # limit of jobs running at the same time by actions, their child processes and runner itself;
+            # jobserver is disabled by default, if it is set, slots are passed to commands through MAKEFLAGS
+            # (then commands should use 'make' without '-j' to take job slots from the pool)
+            "JOB_SLOTS": None,
+            "STREAM_OUTPUT": False,  # Flag for logging output of actions while they are running
         }
 
         self._log = logging.getLogger(self.__class__.__name__)
+        self._action_cache = None
+        self._job_server = None
+        # timings of actions of the current stage
+        self._stage_timings = []
+        self._stage_start = time.monotonic()
+        self._config_cache_dir = root_dir / 'config_cache'
+        # State of runner before execution of configuration file (used for its repeated execution)
+        self._initial_state = None
+        # Data which affects result of configuration file besides its content
+        self._config_key_data = {}
+        # Log files of actions added by configuration file ([(<logger name>, <path to log file>)])
+        self._action_log_files = []
 
         self._config_variables = {}
         self._global_vars = {
@@ -215,11 +520,216 @@ class ConfigGenerator:
         """
 
         self._update_global_vars()
-        exec(open(self._config_path).read(), self._global_vars, self._config_variables)
+        self._reset_config_state()
+
+        with open(self._config_path, 'rb') as config_file:
+            source = config_file.read()
+        config_hash = hashlib.sha256(source).hexdigest()
+        snapshot_key = self._get_config_snapshot_key(config_hash)
+
+        use_snapshot = self._current_stage in self._config_snapshot_stages
+        if use_snapshot and self._load_config_snapshot(snapshot_key):
+            self._get_config_vars()
+            return True
+
+        exec(self._compile_config(source, config_hash), self._global_vars, self._config_variables)
         self._get_config_vars()
 
+        if use_snapshot:
+            self._save_config_snapshot(snapshot_key)
+        else:
+            # data used by configuration file can be changed in this stage
+            self._remove_config_snapshot()
+
+        return True
+
+    def _get_config_snapshot_key(self, config_hash):
+        """
+        Get key of result of configuration file
+
+        :param config_hash: sha256 of content of configuration file
+        :type config_hash: String
+
+        :return: String
+        """
+
+        return hashlib.sha256(repr((
+            config_hash, sys.version, sorted(self._config_key_data.items()),
+            sorted(self._get_repo_revisions().items())
+        )).encode('utf-8')).hexdigest()
+
+    def set_current_stage(self, stage):
+        """
+        Set stage which will be run by the runner (for running several stages by one runner)
+
+        :param stage: Stage of build
+        :type stage: String
+        """
+
+        self._current_stage = stage
+
+    def _configure_action_logger(self, name, logs_path):
+        """
+        Write log of action to file while the current stage is running
+
+        :param name: Name of action
+        :type name: String
+
+        :param logs_path: Path to log file
+        :type logs_path: pathlib.Path
+        """
+
+        configure_logger(name, logs_path)
+        self._action_log_files.append((name, logs_path))
+
+    def _reset_config_state(self):
+        """
+        Restore state of runner changed by previous execution of configuration file
+        """
+
+        # loggers are global, so their files would be written by actions of the next stage
+        for name, logs_path in self._action_log_files:
+            remove_file_handler(logs_path, name)
+        self._action_log_files.clear()
+
+        if self._initial_state is None:
+            self._initial_state = deepcopy((self._options, {name: getattr(self, name)
+                                                            for name in self._config_snapshot_fields}))
+            return
+
+        self._restore_config_state(*deepcopy(self._initial_state))
+
+    def _restore_config_state(self, options, fields):
+        """
+        Replace actions, options, variables and fields of runner changed by configuration file
+
+        :param options: Options of runner
+        :type options: Dict
+
+        :param fields: Values of fields of runner ({<name of field>: <value>})
+        :type fields: Dict
+        """
+
+        self._actions.clear()
+        self._config_variables.clear()
+        # objects are updated in place, because they are referenced by global variables of configuration file
+        self._options.clear()
+        self._options.update(options)
+        for name, value in fields.items():
+            field = getattr(self, name)
+            if isinstance(field, list):
+                field[:] = value
+            elif isinstance(field, dict):
+                field.clear()
+                field.update(value)
+            else:
+                setattr(self, name, value)
+
+    def _write_config_cache(self, file_name, data):
+        self._config_cache_dir.mkdir(parents=True, exist_ok=True)
+        handle, tmp_path = tempfile.mkstemp(dir=str(self._config_cache_dir))
+        with os.fdopen(handle, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, str(self._config_cache_dir / file_name))
+
+    def _compile_config(self, source, config_hash):
+        """
+        Compile configuration file;
+        code object is cached, because it is the same for all stages
+
+        :param source: Content of configuration file
+        :type source: Bytes
+
+        :param config_hash: Hash of content of configuration file
+        :type config_hash: String
+
+        :return: Code object
+        """
+
+        code_path = self._config_cache_dir / f'{config_hash}.{sys.implementation.cache_tag}.code'
+        try:
+            return marshal.loads(code_path.read_bytes())
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        code = compile(source, str(self._config_path), 'exec')
+        try:
+            self._write_config_cache(code_path.name, marshal.dumps(code))
+        except OSError:
+            self._log.warning('Can not save compiled configuration file to %s', code_path, exc_info=True)
+        return code
+
+    def _config_snapshot_path(self):
+        return self._config_cache_dir / 'config_snapshot.pickle'
+
+    def _save_config_snapshot(self, key):
+        """
+        Save actions, options and variables of executed configuration file
+
+        :param key: Key of configuration (depends on content of file and parameters of runner)
+        :type key: String
+        """
+
+        # modules and functions are not needed after execution of configuration file
+        config_variables = {name: value for name, value in self._config_variables.items()
+                            if not isinstance(value, (types.ModuleType, types.FunctionType, type))}
+        snapshot = {
+            'key': key,
+            'actions': dict(self._actions),
+            'options': self._options,
+            'config_variables': config_variables,
+            'fields': {name: getattr(self, name) for name in self._config_snapshot_fields},
+        }
+
+        try:
+            data = pickle.dumps(snapshot)
+        except Exception as e:
+            # ex: actions call functions defined in configuration file
+            self._log.info('Result of configuration file can not be saved: %s', e)
+            self._remove_config_snapshot()
+            return
+
+        try:
+            self._write_config_cache(self._config_snapshot_path().name, data)
+        except OSError:
+            self._log.warning('Can not save result of configuration file', exc_info=True)
+
+    def _load_config_snapshot(self, key):
+        """
+        Load result of configuration file saved by previous stage
+
+        :param key: Key of configuration (depends on content of file and parameters of runner)
+        :type key: String
+
+        :return: Flag whether result was loaded
+        :rtype: Boolean
+        """
+
+        snapshot_path = self._config_snapshot_path()
+        try:
+            snapshot = pickle.loads(snapshot_path.read_bytes())
+        except FileNotFoundError:
+            return False
+        except Exception:
+            self._log.warning('Can not load result of configuration file from %s', snapshot_path, exc_info=True)
+            return False
+
+        if snapshot.get('key') != key:
+            return False
+
+        self._restore_config_state(snapshot['options'], snapshot['fields'])
+        self._actions.update(snapshot['actions'])
+        self._config_variables.update(snapshot['config_variables'])
+
+        self._log.info('Result of configuration file is loaded from %s', snapshot_path)
         return True
 
+    def _remove_config_snapshot(self):
+        try:
+            self._config_snapshot_path().unlink()
+        except FileNotFoundError:
+            pass
+
     def run_stage(self, stage):
         """
         Run method "_<stage>" of the class
@@ -231,7 +741,22 @@ class ConfigGenerator:
         stage_value = f'_{stage}'
 
         if hasattr(self, stage_value):
-            return self.__getattribute__(stage_value)()
+            # job slots are shared by all actions of the stage
+            if self._options['JOB_SLOTS']:
+                self._job_server = JobServer(self._options['JOB_SLOTS'])
+            self._stage_timings = []
+            started = stage_started()
+            start_usage = get_usage()
+            self._stage_start = start_usage['wall_time']
+            result = False
+            try:
+                result = self.__getattribute__(stage_value)()
+                return result
+            finally:
+                if self._job_server:
+                    self._job_server.close()
+                    self._job_server = None
+                self._save_stage_timings(stage, started, start_usage, result)
 
         self._log.error(f'Stage {stage} does not support')
         return False
@@ -246,14 +771,122 @@ class ConfigGenerator:
         :return: Boolean
         """
 
-        for action in self._actions[stage]:
-            error_code = action.run(self._options)
+        actions = self._actions[stage]
+
+        if any(action.parallel for action in actions):
+            try:
+                scheduler = ActionScheduler(actions, self._run_action,
+                                            self._options['MAX_PARALLEL_ACTIONS'])
+                return scheduler.run()
+            except ActionDependencyException as e:
+                self._log.error(e)
+                return False
+
+        for action in actions:
+            error_code = self._run_action(action)
             if error_code:
                 return False
 
         return True
 
-    def _action(self, name, stage=None, cmd=None, work_dir=None, env=None, callfunc=None, verbose=False):
+    def _run_action(self, action):
+        """
+        Run single action
+
+        :param action: Action of the current stage
+        :type action: Action
+
+        :return: Error code
+        """
+
+        if not self._action_cache or not action.outputs or not action.cmd or action.callfunc:
+            return self._run_action_in_slot(action)
+
+        key = self._action_cache.get_key(action.format_cmd(self._options),
+                                         action.get_env(self._options),
+                                         action.work_dir,
+                                         self._get_repo_revisions(),
+                                         action.get_inputs(self._options))
+
+        start_usage = get_usage()
+        if self._action_cache.restore(key):
+            action.log.info('-' * 50)
+            action.log.info('results of the action are restored from cache')
+            self._stage_timings.append({
+                'name': action.repo_name,
+                'start': round(start_usage['wall_time'] - self._stage_start, 3),
+                'wall_time': round(get_usage()['wall_time'] - start_usage['wall_time'], 3),
+                'exit_code': ErrorCode.SUCCESS.value,
+                'cached': True,
+            })
+            return ErrorCode.SUCCESS.value
+
+        error_code = self._run_action_in_slot(action)
+        if not error_code:
+            try:
+                self._action_cache.save(key, action.get_outputs(self._options))
+            except Exception:
+                action.log.exception('Can not save results of the action to cache')
+
+        return error_code
+
+    def _run_action_in_slot(self, action):
+        """
+        Run action holding a job slot of the stage
+
+        :return: Error code
+        """
+
+        with self.job_slot():
+            start = get_usage()['wall_time'] - self._stage_start
+            error_code = action.run(self._options, job_server=self._job_server)
+
+        timing = {'name': action.repo_name, 'start': round(start, 3)}
+        timing.update(action.timing)
+        self._stage_timings.append(timing)
+        return error_code
+
+    def _save_stage_timings(self, stage, started, start_usage, result):
+        """
+        Save time and resources used by the stage and its actions to LOGS_DIR/timings.json
+        """
+
+        timings = {'started': started, 'result': bool(result)}
+        timings.update(get_usage_delta(start_usage))
+        actions = sorted(self._stage_timings, key=lambda action: action['start'])
+        mark_overlapped(actions)
+        timings['actions'] = actions
+
+        try:
+            save_stage_timings(self._options['LOGS_DIR'], str(stage), timings)
+        except Exception:
+            self._log.exception('Can not save timings of stage')
+
+    @contextmanager
+    def job_slot(self):
+        """
+        Take a job slot of the current stage for the time of the block
+        (for parallel work of runner, which is not done by actions)
+        """
+
+        if self._job_server is None:
+            yield
+        else:
+            with self._job_server.slot():
+                yield
+
+    def _get_repo_revisions(self):
+        """
+        Get revisions of repositories used by actions;
+        It can be used in child classes for caching of action results
+
+        :return: Dict
+        """
+
+        return {}
+
+    def _action(self, name, stage=None, cmd=None, work_dir=None, env=None, callfunc=None, verbose=False,
+                depends_on=None, parallel=False, outputs=None, inputs=None):
         """
         Handler for 'action' from build config file
 
@@ -275,6 +908,18 @@ class ConfigGenerator:
         :param callfunc: python function, which need to execute
         :type callfunc: tuple (function_name, args, kwargs) | None
 
+        :param depends_on: Names of actions of the same stage which must be completed before this one
+        :type depends_on: None | List
+
+        :param parallel: Flag for running the action concurrently with other parallel actions
+        :type parallel: Boolean
+
+        :param outputs: Files and directories created by the action (used for caching of results)
+        :type outputs: None | List
+
+        :param inputs: Files and directories read by the action besides repositories (used for caching of results)
+        :type inputs: None | List
+
         :return: None | Exception
         """
 
@@ -286,4 +931,5 @@ class ConfigGenerator:
         if not work_dir:
             work_dir = self._options['ROOT_DIR']
 
-        self._actions[stage].append(Action(name, stage, cmd, work_dir, env, callfunc, verbose))
+        self._actions[stage].append(Action(name, stage, cmd, work_dir, env, callfunc, verbose,
+                                           depends_on, parallel, outputs, inputs))
@@ -0,0 +1,155 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+    Module contains pool of job slots shared by actions of a stage and their child processes
+"""
+
+import logging
+import os
+import select
+import threading
+from contextlib import contextmanager
+
+
+class JobServer(object):
+    """
+    Pool of job slots compatible with GNU make jobserver
+
+    Each free slot is a token (one byte) in a pipe. Runner takes a token for each action,
+    so the action process owns one slot, and 'make' (or other jobserver client) started by the action
+    takes additional tokens from the same pipe for its parallel jobs.
+    Slots are also used for parallel work of runner itself (stripping, packing).
+
+    On Windows there is no pipe for child processes, slots limit only actions of runner.
+    """
+
+    _token = b'+'
+
+    def __init__(self, slots):
+        """
+        :param slots: Count of jobs running at the same time
+        :type slots: Integer
+        """
+
+        self.slots = max(1, slots or 1)
+        self._read_fd = None
+        self._write_fd = None
+        self._semaphore = None
+
+        if os.name == 'posix':
+            self._read_fd, self._write_fd = os.pipe()
+            os.write(self._write_fd, self._token * self.slots)
+        else:
+            self._semaphore = threading.BoundedSemaphore(self.slots)
+
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._log.debug('job server with %s slots is started', self.slots)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Close pipe of the pool; child processes using it must be finished
+        """
+
+        for fd in (self._read_fd, self._write_fd):
+            if fd is not None:
+                os.close(fd)
+        self._read_fd = None
+        self._write_fd = None
+
+    def acquire(self):
+        """
+        Take free slot, wait if all slots are busy
+
+        :return: Token of slot, which must be returned by release()
+        :rtype: Bytes
+        """
+
+        if self._semaphore:
+            self._semaphore.acquire()
+            return self._token
+
+        while True:
+            try:
+                token = os.read(self._read_fd, 1)
+            except BlockingIOError:
+                # some versions of make switch the pipe to non-blocking mode
+                select.select([self._read_fd], [], [])
+                continue
+            if token:
+                return token
+
+    def release(self, token):
+        """
+        Return slot to the pool
+
+        :param token: Token got from acquire()
+        :type token: Bytes
+        """
+
+        if self._semaphore:
+            self._semaphore.release()
+        else:
+            os.write(self._write_fd, token)
+
+    @contextmanager
+    def slot(self):
+        """
+        Take slot for the time of the block
+        """
+
+        token = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(token)
+
+    def get_env(self):
+        """
+        Get environment variables which pass the pool to child processes
+
+        '-j' without number is used, because make ignores jobserver if count of jobs is set;
+        --jobserver-fds is used by make < 4.2, --jobserver-auth by newer versions
+
+        :return: Dict
+        """
+
+        if self._read_fd is None:
+            return {}
+        fds = f'{self._read_fd},{self._write_fd}'
+        return {'MAKEFLAGS': f'-j --jobserver-fds={fds} --jobserver-auth={fds}'}
+
+    @property
+    def pass_fds(self):
+        """
+        File descriptors which must be inherited by child processes
+
+        :return: Tuple
+        """
+
+        if self._read_fd is None:
+            return ()
+        return self._read_fd, self._write_fd
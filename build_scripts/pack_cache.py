@@ -0,0 +1,333 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+    Module contains incremental creation of .tar.gz packages of build results
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tarfile
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from common.helper import hash_file
+
+# Change it if layout of the cache or format of blocks was changed
+CACHE_VERSION = '2'
+
+_CHUNK_SIZE = 16 * 1024 * 1024
+# limit of uncompressed data waiting for compression or writing, it does not depend on count of threads
+_MAX_PENDING_SIZE = 64 * 1024 * 1024
+_COMPRESS_LEVEL = 6
+
+
+class _Member(object):
+    """
+    Member of tar archive: tar header and content of file, which are compressed to separate gzip blocks
+    """
+
+    def __init__(self, path, tarinfo, header, content_hash):
+        self.path = path
+        self.tarinfo = tarinfo
+        self.header = header
+        # sha256 of content, blocks of content are cached by it
+        self.content_hash = content_hash
+        # content can be changed after hashing, such block is not saved to the cache
+        self.is_cacheable = True
+        # identity of member in archive (header includes name, mode and mtime)
+        self.key = hashlib.sha256(header + content_hash.encode('utf-8')).hexdigest()
+
+
+class PackCache(object):
+    """
+    Cache of compressed content of files of .tar.gz packages
+
+    Tar header and content of each member of archive are compressed to separate gzip blocks,
+    so archive is a sequence of gzip members, which is a valid gzip file for standard tools.
+    Headers are compressed every time (they contain mtime, which is changed by rebuild),
+    blocks of content are reused from previous packing by sha256 of content without recompression.
+
+    Archives are bigger than archives of make_archive (compression does not use redundancy
+    between files), so the cache is used only if it is enabled by PACK_CACHE option.
+
+    Layout:
+        cache_dir
+            blocks/<hash[:2]>/<hash>.gz (compressed content of file padded to tar block)
+            manifests/<archive name>.json (members of last created archive)
+    """
+
+    def __init__(self, cache_dir, threads=None):
+        """
+        :param cache_dir: Path to cache directory
+        :type cache_dir: pathlib.Path
+
+        :param threads: Number of compressing threads (count of CPUs by default)
+        :type threads: Integer
+        """
+
+        self._blocks_dir = cache_dir / 'blocks'
+        self._manifests_dir = cache_dir / 'manifests'
+        self._tmp_dir = cache_dir / 'tmp'
+        self._threads = threads or os.cpu_count() or 1
+
+        for directory in (self._blocks_dir, self._manifests_dir, self._tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self._log = logging.getLogger(self.__class__.__name__)
+
+    def _block_path(self, content_hash):
+        return self._blocks_dir / content_hash[:2] / f'{content_hash}.gz'
+
+    def _manifest_path(self, archive_path):
+        return self._manifests_dir / f'{archive_path.name}.json'
+
+    def _load_manifest(self, archive_path):
+        try:
+            manifest = json.loads(self._manifest_path(archive_path).read_text())
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('version') != CACHE_VERSION:
+            return {}
+        return manifest
+
+    def _get_members(self, tar, path, arcname):
+        """
+        Get members of archive recursively (like tarfile.add, but in sorted order)
+
+        :return: Generator of _Member
+        """
+
+        tarinfo = tar.gettarinfo(str(path), str(arcname))
+        if tarinfo is None:
+            self._log.warning('Unsupported type of file %s, skip it', path)
+            return
+
+        content_hash = ''
+        if tarinfo.isreg() and tarinfo.size:
+            content_hash = hash_file(path, tarinfo.size)
+
+        yield _Member(path, tarinfo, tarinfo.tobuf(tar.format, tar.encoding, tar.errors), content_hash)
+
+        if tarinfo.isdir():
+            for name in sorted(os.listdir(str(path))):
+                yield from self._get_members(tar, path / name, arcname / name)
+
+    @staticmethod
+    def _read_content(member):
+        """
+        Get content of member by chunks padded to tar block
+
+        :return: Generator of bytes
+        """
+
+        digest = hashlib.sha256()
+        size = member.tarinfo.size
+        with open(str(member.path), 'rb') as data:
+            while size > 0:
+                chunk = data.read(min(_CHUNK_SIZE, size))
+                if not chunk:
+                    raise OSError(f'File {member.path} was changed while packing')
+                size -= len(chunk)
+                digest.update(chunk)
+                yield chunk
+        member.is_cacheable = digest.hexdigest() == member.content_hash
+        remainder = member.tarinfo.size % tarfile.BLOCKSIZE
+        if remainder:
+            yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+
+    def make_archive(self, path, data_to_archive):
+        """
+        Create .tar.gz archive with certain data reusing compressed content of files of previous archives
+
+        :param path: Path to archive file (ex: /home/user/archive.tar.gz)
+        :type path: pathlib.Path
+
+        :param data_to_archive: list of dirs/files for archiving (see common.helper.make_archive)
+        :type data_to_archive: List
+
+        :return: Flag whether all data was packed
+        :rtype: Boolean
+        """
+
+        self._log.info('-' * 50)
+        self._log.info('create archive %s', path)
+
+        start_time = time.monotonic()
+        manifest = self._load_manifest(path)
+
+        # archive is used only for creating headers of members
+        tar = tarfile.TarFile(fileobj=io.BytesIO(), mode='w')
+        members = []
+        no_errors = True
+        for info in data_to_archive:
+            for relative in info['relative']:
+                path_to_archive = info['from_path'] / relative['path']
+                pack_as = pathlib.Path(relative.get('pack_as', relative['path']))
+
+                self._log.info('add to archive %s, pack as "%s"', path_to_archive, pack_as)
+                try:
+                    members.extend(self._get_members(tar, path_to_archive, pack_as))
+                except OSError:
+                    self._log.exception("Can not pack results")
+                    no_errors = False
+
+        member_keys = [member.key for member in members]
+        if path.exists() and manifest.get('members') == member_keys and \
+                manifest.get('archive') == [path.stat().st_size, path.stat().st_mtime_ns]:
+            self._log.info('archive %s is not changed, reuse it', path)
+            return no_errors
+
+        try:
+            recompressed_size, total_size = self._write_archive(path, members)
+        except Exception:
+            self._log.exception("Can not create archive")
+            return False
+
+        manifest = {
+            'version': CACHE_VERSION,
+            'members': member_keys,
+            'blocks': sorted({member.content_hash for member in members if member.content_hash}),
+            'archive': [path.stat().st_size, path.stat().st_mtime_ns],
+        }
+        manifest_path = self._manifest_path(path)
+        handle, tmp_path = tempfile.mkstemp(dir=str(self._tmp_dir))
+        with os.fdopen(handle, 'w') as tmp_file:
+            json.dump(manifest, tmp_file)
+        os.replace(tmp_path, str(manifest_path))
+
+        elapsed_time = max(time.monotonic() - start_time, 1e-6)
+        self._log.info('archive %s is created in %.1f s: %.1f MB of %.1f MB data recompressed, '
+                       'archive size %.1f MB (%.1f MB/s)',
+                       path, elapsed_time, recompressed_size / 2 ** 20, total_size / 2 ** 20,
+                       path.stat().st_size / 2 ** 20, total_size / 2 ** 20 / elapsed_time)
+        return no_errors
+
+    def _write_archive(self, path, members):
+        """
+        Write blocks of members to archive, compressing headers and changed content by pool of threads
+
+        :return: Size of recompressed data and size of all data
+        :rtype: Tuple
+        """
+
+        recompressed_size = 0
+        total_size = 0
+        # queue of blocks in order of archive:
+        # (<path to cached block>, None, None, 0) or
+        # (<future of compressed chunk>, <block file or None for header>, None, <size of chunk>) or
+        # (None, <block file>, <member>, 0) for the end of content of member
+        pending = deque()
+        pending_size = 0
+
+        def write_pending(archive_file):
+            nonlocal pending_size
+            block, block_file, member, size = pending.popleft()
+            pending_size -= size
+            if isinstance(block, pathlib.Path):
+                with block.open('rb') as cached_block:
+                    shutil.copyfileobj(cached_block, archive_file, _CHUNK_SIZE)
+            elif member is None:
+                data = block.result()
+                archive_file.write(data)
+                if block_file is not None:
+                    block_file.write(data)
+            else:
+                # end of content: compressed block is saved to cache
+                block_file.close()
+                if member.is_cacheable:
+                    block_path = self._block_path(member.content_hash)
+                    block_path.parent.mkdir(exist_ok=True)
+                    os.replace(block_file.name, str(block_path))
+                else:
+                    os.unlink(block_file.name)
+
+        def add_pending(archive_file, block, block_file=None, member=None, size=0):
+            nonlocal pending_size
+            pending.append((block, block_file, member, size))
+            pending_size += size
+            while pending_size > _MAX_PENDING_SIZE:
+                write_pending(archive_file)
+
+        handle, tmp_archive_path = tempfile.mkstemp(dir=str(path.parent), prefix=f'.{path.name}.')
+        try:
+            with os.fdopen(handle, 'wb') as archive_file, \
+                    ThreadPoolExecutor(max_workers=self._threads) as executor:
+                for member in members:
+                    total_size += len(member.header)
+                    recompressed_size += len(member.header)
+                    add_pending(archive_file, executor.submit(gzip.compress, member.header, _COMPRESS_LEVEL),
+                                size=len(member.header))
+                    if not member.content_hash:
+                        continue
+
+                    content_size = -(-member.tarinfo.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                    total_size += content_size
+                    block_path = self._block_path(member.content_hash)
+                    if block_path.exists():
+                        add_pending(archive_file, block_path)
+                    else:
+                        recompressed_size += content_size
+                        block_file = tempfile.NamedTemporaryFile(dir=str(self._tmp_dir), delete=False)
+                        for chunk in self._read_content(member):
+                            add_pending(archive_file, executor.submit(gzip.compress, chunk, _COMPRESS_LEVEL),
+                                        block_file, size=len(chunk))
+                        add_pending(archive_file, None, block_file, member)
+
+                while pending:
+                    write_pending(archive_file)
+
+                # end of archive: two zero blocks and padding to tar record
+                total_size += tarfile.BLOCKSIZE * 2
+                end_size = tarfile.BLOCKSIZE * 2 + (-total_size) % tarfile.RECORDSIZE
+                total_size += end_size - tarfile.BLOCKSIZE * 2
+                archive_file.write(gzip.compress(tarfile.NUL * end_size, _COMPRESS_LEVEL))
+            os.replace(tmp_archive_path, str(path))
+        except Exception:
+            if os.path.exists(tmp_archive_path):
+                os.unlink(tmp_archive_path)
+            raise
+
+        return recompressed_size, total_size
+
+    def remove_unused_blocks(self):
+        """
+        Remove blocks which are not used by last created archives
+        Should not be called while archives are created
+        """
+
+        used_blocks = set()
+        for manifest_path in self._manifests_dir.glob('*.json'):
+            try:
+                used_blocks.update(json.loads(manifest_path.read_text()).get('blocks', []))
+            except (OSError, ValueError):
+                pass
+
+        for block_path in self._blocks_dir.glob('*/*.gz'):
+            if block_path.stem not in used_blocks:
+                block_path.unlink()
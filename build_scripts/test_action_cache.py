@@ -0,0 +1,118 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+""" Unit tests of local cache of action results
+
+    Usage:
+    python3 -m pytest -v build_scripts/test_action_cache.py
+"""
+
+import os
+import time
+
+from build_scripts.action_cache import ActionCache
+
+
+class TestActionCache:
+    """ Test class
+    """
+    def make_key(self, cache, work_dir, cmd='make', env=None, revisions=None, inputs=()):
+        return cache.get_key(cmd, env or {'CC': 'gcc'}, work_dir, revisions or {'MediaSDK': 'abc'}, inputs)
+
+    def test_key_invalidation(self, tmp_path):
+        cache = ActionCache(tmp_path / 'cache', 2 ** 20)
+        work_dir = tmp_path / 'work'
+        work_dir.mkdir()
+        source = tmp_path / 'source.txt'
+        source.write_text('first')
+
+        key = self.make_key(cache, work_dir, inputs=[source])
+        assert key == self.make_key(cache, work_dir, inputs=[source])
+        assert key != self.make_key(cache, work_dir, cmd='make -j2', inputs=[source])
+        assert key != self.make_key(cache, work_dir, env={'CC': 'clang'}, inputs=[source])
+        assert key != self.make_key(cache, work_dir, revisions={'MediaSDK': 'def'}, inputs=[source])
+        assert key != self.make_key(cache, tmp_path, inputs=[source])
+
+        # files which are not declared as inputs are not hashed
+        (work_dir / 'object.o').write_text('object')
+        assert key == self.make_key(cache, work_dir, inputs=[source])
+
+        source.write_text('second')
+        assert key != self.make_key(cache, work_dir, inputs=[source])
+
+    def test_key_of_input_directory(self, tmp_path):
+        cache = ActionCache(tmp_path / 'cache', 2 ** 20)
+        sources = tmp_path / 'sources'
+        sources.mkdir()
+        (sources / 'main.c').write_text('int main;')
+
+        key = self.make_key(cache, tmp_path, inputs=[sources])
+        (sources / 'util.c').write_text('int util;')
+        assert key != self.make_key(cache, tmp_path, inputs=[sources])
+
+        key = self.make_key(cache, tmp_path, inputs=[sources / 'missing.c'])
+        (sources / 'missing.c').write_text('')
+        assert key != self.make_key(cache, tmp_path, inputs=[sources / 'missing.c'])
+
+    def test_save_and_restore(self, tmp_path):
+        cache = ActionCache(tmp_path / 'cache', 2 ** 20)
+        output_dir = tmp_path / 'out'
+        (output_dir / 'lib').mkdir(parents=True)
+        (output_dir / 'lib' / 'libmfx.so.1').write_text('library')
+        (output_dir / 'lib' / 'libmfx.so').symlink_to('libmfx.so.1')
+        (output_dir / 'tool').write_text('#!/bin/sh')
+        (output_dir / 'tool').chmod(0o755)
+        single_file = tmp_path / 'version.txt'
+        single_file.write_text('1.0')
+        missing_file = tmp_path / 'missing.txt'
+
+        key = self.make_key(cache, tmp_path)
+        assert not cache.restore(key)
+        cache.save(key, [output_dir, single_file, missing_file])
+
+        (output_dir / 'tool').unlink()
+        (output_dir / 'lib' / 'stale.o').write_text('stale')
+        single_file.write_text('2.0')
+        missing_file.write_text('created by previous build')
+
+        assert cache.restore(key)
+        assert (output_dir / 'lib' / 'libmfx.so.1').read_text() == 'library'
+        assert os.readlink(str(output_dir / 'lib' / 'libmfx.so')) == 'libmfx.so.1'
+        assert (output_dir / 'tool').stat().st_mode & 0o777 == 0o755
+        assert not (output_dir / 'lib' / 'stale.o').exists()
+        assert single_file.read_text() == '1.0'
+        assert not missing_file.exists()
+
+    def test_eviction_of_least_recently_used(self, tmp_path):
+        cache = ActionCache(tmp_path / 'cache', 2500)
+        keys = []
+        for index in range(3):
+            output = tmp_path / f'output{index}'
+            output.write_bytes(bytes([index]) * 1000)
+            keys.append(self.make_key(cache, tmp_path, cmd=f'make {index}'))
+            cache.save(keys[-1], [output])
+            # modification time of entry is time of last access
+            entry_path = tmp_path / 'cache' / 'entries' / f'{keys[-1]}.json'
+            os.utime(str(entry_path), (time.time() - 100 + index, time.time() - 100 + index))
+
+        assert not cache.restore(keys[0])
+        assert cache.restore(keys[1])
+        assert cache.restore(keys[2])
+        assert len(list((tmp_path / 'cache' / 'objects').glob('*/*'))) == 2
@@ -0,0 +1,218 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+""" Unit tests of action scheduler and configuration snapshot of build runner
+
+    Usage:
+    python3 -m pytest -v build_scripts/test_common_runner.py
+"""
+
+import logging
+import threading
+
+import pytest
+
+from build_scripts.action_cache import ActionCache
+from build_scripts.common_runner import Action, ActionDependencyException, ActionScheduler, ConfigGenerator
+from common.helper import ErrorCode, Stage
+
+CONFIG = """
+executions.append(1)
+action('hello', cmd='echo hello')
+"""
+
+
+def make_action(name, depends_on=None, parallel=False, cmd=None, work_dir=None, outputs=None, inputs=None):
+    return Action(name, Stage.BUILD.value, cmd, work_dir, None, None, False,
+                  depends_on, parallel, outputs, inputs)
+
+
+class Runner(ConfigGenerator):
+    """ Runner with revisions of repositories set by test
+    """
+    _default_stage = Stage.BUILD.value
+    _config_snapshot_stages = (Stage.INSTALL.value, Stage.PACK.value)
+
+    def __init__(self, root_dir, config_path, current_stage):
+        super().__init__(root_dir, config_path, current_stage)
+        self.executions = []
+        self.revisions = {'MediaSDK': 'first'}
+
+    def _update_global_vars(self):
+        self._global_vars['executions'] = self.executions
+
+    def _get_repo_revisions(self):
+        return dict(self.revisions)
+
+
+class TestActionScheduler:
+    """ Test class
+    """
+    def setup_method(self):
+        """ Runs before any test
+        """
+        self.lock = threading.Lock()
+        self.events = []
+        self.failing = set()
+
+    def run_action(self, action):
+        with self.lock:
+            self.events.append(('start', action.repo_name))
+        with self.lock:
+            self.events.append(('end', action.repo_name))
+        if action.repo_name in self.failing:
+            return ErrorCode.CRITICAL.value
+        return ErrorCode.SUCCESS.value
+
+    def index(self, event, name):
+        return self.events.index((event, name))
+
+    def test_dependency_order(self):
+        actions = [
+            make_action('configure'),
+            make_action('lib', parallel=True),
+            make_action('tool', parallel=True, depends_on=['lib']),
+            make_action('plugin', parallel=True),
+            make_action('install'),
+        ]
+
+        assert ActionScheduler(actions, self.run_action, 4).run()
+
+        for name in ('lib', 'tool', 'plugin'):
+            assert self.index('end', 'configure') < self.index('start', name)
+            assert self.index('end', name) < self.index('start', 'install')
+        assert self.index('end', 'lib') < self.index('start', 'tool')
+
+    def test_parallel_actions_run_at_the_same_time(self):
+        barrier = threading.Barrier(2, timeout=10)
+
+        def run_action(action):
+            # both actions must be running to pass the barrier
+            barrier.wait()
+            return ErrorCode.SUCCESS.value
+
+        actions = [make_action('first', parallel=True), make_action('second', parallel=True)]
+        assert ActionScheduler(actions, run_action, 2).run()
+
+    def test_failure_cancels_dependent_actions(self):
+        self.failing = {'lib'}
+        actions = [
+            make_action('lib', parallel=True),
+            make_action('tool', parallel=True, depends_on=['lib']),
+            make_action('tool_tests', parallel=True, depends_on=['tool']),
+            make_action('plugin', parallel=True),
+            make_action('install'),
+        ]
+
+        assert not ActionScheduler(actions, self.run_action, 4).run()
+
+        started = {name for event, name in self.events if event == 'start'}
+        assert started == {'lib', 'plugin'}
+
+    def test_exception_is_failure(self):
+        def run_action(action):
+            raise RuntimeError('broken action')
+
+        assert not ActionScheduler([make_action('broken', parallel=True)], run_action, 1).run()
+
+    def test_unknown_dependency(self):
+        actions = [make_action('tool', parallel=True, depends_on=['lib']), make_action('lib', parallel=True)]
+
+        with pytest.raises(ActionDependencyException):
+            ActionScheduler(actions, self.run_action, 2).run()
+        assert not self.events
+
+
+class TestConfigGenerator:
+    """ Test class
+    """
+    def make_runner(self, tmp_path, stage):
+        config_path = tmp_path / 'build_config.py'
+        if not config_path.exists():
+            config_path.write_text(CONFIG)
+        runner = Runner(tmp_path / 'root', config_path, stage)
+        assert runner.generate_config()
+        return runner
+
+    def test_snapshot_is_used_by_snapshot_stages(self, tmp_path):
+        assert self.make_runner(tmp_path, Stage.INSTALL.value).executions == [1]
+
+        runner = self.make_runner(tmp_path, Stage.PACK.value)
+        assert runner.executions == []
+        assert [action.repo_name for action in runner._actions[Stage.BUILD.value]] == ['hello']
+
+    def test_snapshot_is_removed_by_other_stages(self, tmp_path):
+        self.make_runner(tmp_path, Stage.INSTALL.value)
+        assert self.make_runner(tmp_path, Stage.BUILD.value).executions == [1]
+        assert self.make_runner(tmp_path, Stage.PACK.value).executions == [1]
+
+    def test_snapshot_is_invalidated_by_revisions(self, tmp_path):
+        self.make_runner(tmp_path, Stage.INSTALL.value)
+
+        runner = Runner(tmp_path / 'root', tmp_path / 'build_config.py', Stage.PACK.value)
+        runner.revisions = {'MediaSDK': 'second'}
+        runner.generate_config()
+        assert runner.executions == [1]
+
+    def test_snapshot_is_invalidated_by_config(self, tmp_path):
+        self.make_runner(tmp_path, Stage.INSTALL.value)
+
+        (tmp_path / 'build_config.py').write_text(CONFIG + "action('bye', cmd='echo bye')\n")
+        runner = self.make_runner(tmp_path, Stage.PACK.value)
+        assert runner.executions == [1]
+        assert len(runner._actions[Stage.BUILD.value]) == 2
+
+    def test_config_is_executed_for_each_stage(self, tmp_path):
+        runner = self.make_runner(tmp_path, Stage.BUILD.value)
+        runner.set_current_stage(Stage.INSTALL.value)
+        runner.generate_config()
+
+        assert runner.executions == [1, 1]
+        # actions of previous execution are replaced
+        assert len(runner._actions[Stage.BUILD.value]) == 1
+
+    def test_action_log_files_are_closed_between_stages(self, tmp_path):
+        runner = self.make_runner(tmp_path, Stage.BUILD.value)
+        runner._configure_action_logger('hello', tmp_path / 'hello.log')
+        assert any(isinstance(handler, logging.FileHandler) for handler in logging.getLogger('hello').handlers)
+
+        runner.set_current_stage(Stage.INSTALL.value)
+        runner.generate_config()
+        assert not any(isinstance(handler, logging.FileHandler) for handler in logging.getLogger('hello').handlers)
+
+    def test_action_results_are_restored_from_cache(self, tmp_path):
+        runner = self.make_runner(tmp_path, Stage.BUILD.value)
+        runner._action_cache = ActionCache(tmp_path / 'cache', 2 ** 20)
+        work_dir = tmp_path / 'work'
+        source = tmp_path / 'source.txt'
+        source.write_text('first')
+        action = make_action('copy', cmd=f'cat {source} > result.txt && echo run >> runs.txt',
+                             work_dir=work_dir, outputs=['result.txt'], inputs=[str(source)])
+
+        assert runner._run_action(action) == ErrorCode.SUCCESS.value
+        (work_dir / 'result.txt').unlink()
+        assert runner._run_action(action) == ErrorCode.SUCCESS.value
+        assert (work_dir / 'result.txt').read_text() == 'first'
+        assert (work_dir / 'runs.txt').read_text() == 'run\n'
+
+        source.write_text('second')
+        assert runner._run_action(action) == ErrorCode.SUCCESS.value
+        assert (work_dir / 'result.txt').read_text() == 'second'
+        assert (work_dir / 'runs.txt').read_text() == 'run\nrun\n'
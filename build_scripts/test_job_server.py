@@ -0,0 +1,78 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+""" Unit tests of pool of job slots
+
+    Usage:
+    python3 -m pytest -v build_scripts/test_job_server.py
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from build_scripts.job_server import JobServer
+
+
+class TestJobServer:
+    """ Test class
+    """
+    def test_slots_limit_jobs(self):
+        with JobServer(2) as job_server:
+            tokens = [job_server.acquire(), job_server.acquire()]
+
+            acquired = threading.Event()
+
+            def take_slot():
+                with job_server.slot():
+                    acquired.set()
+
+            thread = threading.Thread(target=take_slot)
+            thread.start()
+            assert not acquired.wait(0.2)
+
+            job_server.release(tokens.pop())
+            assert acquired.wait(10)
+            thread.join()
+            job_server.release(tokens.pop())
+
+    @pytest.mark.skipif(os.name != 'posix' or not shutil.which('make'), reason='make is not found')
+    def test_make_uses_slots(self, tmp_path):
+        (tmp_path / 'Makefile').write_text(
+            'all: first second third\n'
+            'first second third:\n'
+            '\t@echo $@\n')
+
+        with JobServer(2) as job_server:
+            env = dict(os.environ, **job_server.get_env())
+            process = subprocess.run(['make'], cwd=str(tmp_path), env=env, pass_fds=job_server.pass_fds,
+                                     stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                     universal_newlines=True)
+
+            assert process.returncode == 0
+            assert sorted(process.stdout.split()) == ['first', 'second', 'third']
+            assert 'jobserver' not in process.stderr
+            # all slots are returned by make
+            tokens = [job_server.acquire() for _ in range(job_server.slots)]
+            for token in tokens:
+                job_server.release(token)
@@ -0,0 +1,84 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+""" Unit tests of incremental packing of build results
+
+    Usage:
+    python3 -m pytest -v build_scripts/test_pack_cache.py
+"""
+
+import gzip
+import os
+import tarfile
+
+from build_scripts.pack_cache import PackCache
+from common.helper import extract_archive
+
+
+class TestPackCache:
+    """ Test class
+    """
+    def make_data(self, tmp_path):
+        install_dir = tmp_path / 'install'
+        (install_dir / 'lib').mkdir(parents=True)
+        (install_dir / 'lib' / 'libmfx.so.1').write_bytes(os.urandom(100000))
+        (install_dir / 'lib' / 'libmfx.so').symlink_to('libmfx.so.1')
+        (install_dir / 'bin').mkdir()
+        (install_dir / 'bin' / 'sample_decode').write_bytes(os.urandom(3000))
+        (install_dir / 'bin' / 'empty').write_bytes(b'')
+        data_to_archive = [{
+            'from_path': tmp_path,
+            'relative': [{'path': 'install', 'pack_as': 'mediasdk'}],
+        }]
+        return install_dir, data_to_archive
+
+    def test_archive_is_extracted(self, tmp_path):
+        install_dir, data_to_archive = self.make_data(tmp_path)
+        archive_path = tmp_path / 'install_pkg.tar.gz'
+
+        assert PackCache(tmp_path / 'cache').make_archive(archive_path, data_to_archive)
+
+        # archive is a valid gzip file of several members
+        with tarfile.open(str(archive_path), 'r:gz') as archive:
+            assert 'mediasdk/lib/libmfx.so.1' in archive.getnames()
+        extract_archive(archive_path, tmp_path / 'extracted')
+        extracted = tmp_path / 'extracted' / 'mediasdk'
+        for rel_path in ('lib/libmfx.so.1', 'bin/sample_decode', 'bin/empty'):
+            assert (extracted / rel_path).read_bytes() == (install_dir / rel_path).read_bytes()
+        assert os.readlink(str(extracted / 'lib' / 'libmfx.so')) == 'libmfx.so.1'
+
+    def test_content_is_reused(self, tmp_path):
+        install_dir, data_to_archive = self.make_data(tmp_path)
+        archive_path = tmp_path / 'install_pkg.tar.gz'
+        cache = PackCache(tmp_path / 'cache')
+        cache.make_archive(archive_path, data_to_archive)
+        blocks = set((tmp_path / 'cache' / 'blocks').glob('*/*'))
+        assert len(blocks) == 2
+
+        new_content = os.urandom(5000)
+        (install_dir / 'bin' / 'sample_decode').write_bytes(new_content)
+        assert cache.make_archive(archive_path, data_to_archive)
+
+        new_blocks = set((tmp_path / 'cache' / 'blocks').glob('*/*')) - blocks
+        assert len(new_blocks) == 1
+        assert gzip.decompress(new_blocks.pop().read_bytes())[:len(new_content)] == new_content
+
+        extract_archive(archive_path, tmp_path / 'extracted')
+        assert (tmp_path / 'extracted' / 'mediasdk' / 'bin' / 'sample_decode').read_bytes() == new_content
@@ -25,7 +25,6 @@ During manual running, only the "test" step is performed if stage is not specifi
 """
 
 import sys
-import shutil
 import logging
 import pathlib
 import argparse
@@ -33,7 +32,7 @@ import argparse
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 from build_scripts.common_runner import ConfigGenerator, RunnerException
 from test_scripts.components_installer import install_components
-from common.helper import TestStage, ErrorCode
+from common.helper import TestStage, ErrorCode, remove_directory
 from common.logger_conf import configure_logger
 from common.manifest_manager import Manifest
 
@@ -105,7 +104,7 @@ class TestRunner(ConfigGenerator):
             dir_path = self._options.get(directory)
             if dir_path.exists():
                 self._log.info(f'remove directory {dir_path}')
-                shutil.rmtree(dir_path)
+                remove_directory(dir_path, background=True)
 
         self._options["LOGS_DIR"].mkdir(parents=True, exist_ok=True)
 
@@ -0,0 +1,270 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+    Module contains measurement of time and resources used by stages and actions
+
+    Results of build are saved to LOGS_DIR/timings.json:
+    {
+        "version": 1,
+        "stages": {
+            "<stage>": {
+                "started": "<ISO time>", "result": true, <usage>,
+                "actions": [{"name": "<action>", "start": <seconds from start of stage>,
+                             "overlapped": false, "exit_code": 0, "output_bytes": 0, <usage>}, ...]
+            }
+        }
+    }
+    where <usage> is wall_time, user_time and sys_time (CPU time of child processes in seconds),
+    runner_user_time and runner_sys_time (CPU time of runner itself) and peak_rss_kb.
+    Actions restored from cache have only wall time and "cached" flag.
+
+    CPU time is taken from resource.getrusage(RUSAGE_CHILDREN), which is common for the whole process,
+    so usage of actions running at the same time ("overlapped") is mixed.
+    Peak RSS is the maximum over all finished child processes, so it is set only for actions
+    which increased it (null otherwise).
+
+    Comparison of two builds:
+        python timings.py old/timings.json new/timings.json
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, only wall time is measured
+    resource = None
+
+TIMINGS_FILE = 'timings.json'
+TIMINGS_VERSION = 1
+
+_TIME_FIELDS = ('wall_time', 'user_time', 'sys_time', 'runner_user_time', 'runner_sys_time')
+
+
+def get_usage():
+    """
+    Get current counters of time and resources
+
+    :return: Dict
+    """
+
+    usage = {'wall_time': time.monotonic()}
+    if resource:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        runner = resource.getrusage(resource.RUSAGE_SELF)
+        usage.update({
+            'user_time': children.ru_utime,
+            'sys_time': children.ru_stime,
+            'runner_user_time': runner.ru_utime,
+            'runner_sys_time': runner.ru_stime,
+            'peak_rss_kb': children.ru_maxrss,
+        })
+    return usage
+
+
+def get_usage_delta(start, end=None):
+    """
+    Get time and resources used between two measurements
+
+    :param start: Result of get_usage() at the beginning
+    :type start: Dict
+
+    :param end: Result of get_usage() at the end (current counters by default)
+    :type end: Dict | None
+
+    :return: Dict
+    """
+
+    end = end or get_usage()
+    delta = {name: round(end[name] - start[name], 3) for name in _TIME_FIELDS if name in end}
+    if 'peak_rss_kb' in end:
+        delta['peak_rss_kb'] = end['peak_rss_kb'] if end['peak_rss_kb'] > start['peak_rss_kb'] else None
+    return delta
+
+
+def mark_overlapped(actions):
+    """
+    Set "overlapped" flag for actions which were running at the same time as other ones
+
+    :param actions: Timings of actions of a stage
+    :type actions: List
+    """
+
+    for action in actions:
+        action['overlapped'] = False
+    latest_end = None
+    latest_action = None
+    for action in sorted(actions, key=lambda action: action['start']):
+        end = action['start'] + action['wall_time']
+        if latest_end is not None and action['start'] < latest_end:
+            action['overlapped'] = True
+            latest_action['overlapped'] = True
+        if latest_end is None or end > latest_end:
+            latest_end = end
+            latest_action = action
+
+
+def save_stage_timings(logs_dir, stage, timings):
+    """
+    Add timings of stage to LOGS_DIR/timings.json (stages of one build are run by separate processes)
+
+    :param logs_dir: Path to directory with logs of build
+    :type logs_dir: pathlib.Path
+
+    :param stage: Name of stage
+    :type stage: String
+
+    :param timings: Timings of stage
+    :type timings: Dict
+    """
+
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    timings_path = logs_dir / TIMINGS_FILE
+    data = load_timings(timings_path) if timings_path.exists() else {}
+    if data.get('version') != TIMINGS_VERSION:
+        data = {'version': TIMINGS_VERSION, 'stages': {}}
+    data['stages'][stage] = timings
+
+    handle, tmp_path = tempfile.mkstemp(dir=str(logs_dir), prefix=f'.{TIMINGS_FILE}.')
+    with os.fdopen(handle, 'w') as tmp_file:
+        json.dump(data, tmp_file, indent=4)
+    os.replace(tmp_path, str(timings_path))
+
+
+def load_timings(timings_path):
+    """
+    :return: Content of timings file or empty dict if it is broken
+    :rtype: Dict
+    """
+
+    try:
+        return json.loads(pathlib.Path(timings_path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def stage_started():
+    """
+    :return: Time of stage start for timings file
+    :rtype: String
+    """
+
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _get_action_times(stage_timings):
+    """
+    Get wall time of actions by keys (<name>, <number of action with the same name>)
+
+    :return: Dict
+    """
+
+    times = {}
+    counters = {}
+    for action in stage_timings.get('actions', []):
+        number = counters.get(action['name'], 0)
+        counters[action['name']] = number + 1
+        times[(action['name'], number)] = action
+    return times
+
+
+def compare_timings(old, new, min_diff, min_ratio):
+    """
+    Get stages and actions which became slower
+
+    :param old: Content of timings file of old build
+    :type old: Dict
+
+    :param new: Content of timings file of new build
+    :type new: Dict
+
+    :param min_diff: Minimal increase of wall time in seconds
+    :type min_diff: Float
+
+    :param min_ratio: Minimal increase of wall time in percents
+    :type min_ratio: Float
+
+    :return: List of (<stage>, <action name or None for stage>, <old time>, <new time>)
+    :rtype: List
+    """
+
+    def is_regressed(old_time, new_time):
+        diff = new_time - old_time
+        return diff >= min_diff and (not old_time or diff * 100 / old_time >= min_ratio)
+
+    regressions = []
+    old_stages = old.get('stages', {})
+    for stage, new_stage in new.get('stages', {}).items():
+        old_stage = old_stages.get(stage)
+        if not old_stage:
+            continue
+        if is_regressed(old_stage['wall_time'], new_stage['wall_time']):
+            regressions.append((stage, None, old_stage['wall_time'], new_stage['wall_time']))
+
+        old_actions = _get_action_times(old_stage)
+        for key, new_action in _get_action_times(new_stage).items():
+            old_action = old_actions.get(key)
+            if old_action and is_regressed(old_action['wall_time'], new_action['wall_time']):
+                regressions.append((stage, key[0], old_action['wall_time'], new_action['wall_time']))
+
+    regressions.sort(key=lambda regression: regression[3] - regression[2], reverse=True)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show stages and actions which became slower')
+    parser.add_argument('old', type=pathlib.Path, help='Timings file of old build')
+    parser.add_argument('new', type=pathlib.Path, help='Timings file of new build')
+    parser.add_argument('--min-diff', type=float, default=5,
+                        help='Minimal increase of wall time in seconds (5 by default)')
+    parser.add_argument('--min-ratio', type=float, default=10,
+                        help='Minimal increase of wall time in percents (10 by default)')
+    args = parser.parse_args()
+
+    timings = []
+    for path in (args.old, args.new):
+        data = load_timings(path)
+        if data.get('version') != TIMINGS_VERSION:
+            print(f'Unsupported or broken timings file: {path}')
+            sys.exit(1)
+        timings.append(data)
+
+    regressions = compare_timings(timings[0], timings[1], args.min_diff, args.min_ratio)
+    if not regressions:
+        print('No regressions found')
+        return
+
+    print(f'{"STAGE":<10} {"ACTION":<40} {"OLD, s":>10} {"NEW, s":>10} {"DIFF, s":>10} {"DIFF, %":>8}')
+    for stage, action, old_time, new_time in regressions:
+        ratio = f'{(new_time - old_time) * 100 / old_time:.0f}' if old_time else '-'
+        print(f'{stage:<10} {action or "<whole stage>":<40} {old_time:>10.1f} {new_time:>10.1f} '
+              f'{new_time - old_time:>10.1f} {ratio:>8}')
+
+
+if __name__ == '__main__':
+    main()
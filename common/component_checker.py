@@ -32,10 +32,12 @@ from common.mediasdk_directories import MediaSdkDirectories
 from common.manifest_manager import Manifest
 from common.helper import Build_type, Build_event, ErrorCode
 from common.logger_conf import configure_logger
-from bb.utils import SKIP_BUILDING_DEPENDENCY_PHRASE
 
 
 def check_component_existence(path_to_manifest, component_name):
+    # bb.utils imports buildbot and twisted, so it is imported only when it is needed
+    from bb.utils import SKIP_BUILDING_DEPENDENCY_PHRASE
+
     log = logging.getLogger('component_checker')
     log.info(f"Getting data for {component_name} from {path_to_manifest}")
     manifest = Manifest(pathlib.Path(path_to_manifest))
@@ -27,7 +27,6 @@ import argparse
 import pathlib
 import logging
 import shutil
-from distutils.dir_util import copy_tree
 from importlib import reload
 from datetime import datetime
 
@@ -104,6 +103,8 @@ def extract_repo(root_repo_dir, repo_name, branch, commit_id=None, commit_time=N
 
 def extract_closed_source_infrastructure(root_dir, branch, commit_id, commit_time):
     log = logging.getLogger('extract_repo.extract_closed_source_infrastructure')
+    # distutils imports setuptools, so it is not imported at startup of scripts
+    from distutils.dir_util import copy_tree
 
     infrastructure_root_dir = root_dir / 'infrastructure'
 
@@ -191,6 +192,8 @@ def extract_open_source_infrastructure(root_dir, branch, commit_id, commit_time)
 
 def extract_private_infrastructure(root_dir, branch, commit_id, commit_time):
     log = logging.getLogger('extract_repo.extract_private_infrastructure')
+    # distutils imports setuptools, so it is not imported at startup of scripts
+    from distutils.dir_util import copy_tree
 
     infrastructure_root_dir = root_dir / 'infrastructure'
 
@@ -22,20 +22,37 @@
 Module for working with Git
 """
 import collections
+import functools
+import hashlib
 import json
 import logging
+import os
+import pathlib
+import tempfile
 import concurrent.futures
-import multiprocessing
+import time
 from datetime import datetime
 
-import git
-from tenacity import retry, stop_after_attempt, wait_exponential, \
-    retry_if_exception_type, retry_if_result
-
 from common.helper import remove_directory
+from common.lazy_import import lazy_import, lazy_retry
 from common.mediasdk_directories import MediaSdkDirectories, THIRD_PARTY
 
 
+git = lazy_import('git')
+
+# File in .git directory with counts of commits by revisions (see ProductState.get_commit_number)
+_COMMIT_NUMBERS_FILE = 'commit_numbers.json'
+
+
+def _network_retry(tenacity):
+    return {'stop': tenacity.stop_after_attempt(5), 'wait': tenacity.wait_exponential(multiplier=60)}
+
+
+def _checkout_retry(tenacity):
+    return dict(_network_retry(tenacity),
+                retry=(tenacity.retry_if_exception_type() | tenacity.retry_if_result(check_exception)))
+
+
 def check_exception(value):
     if isinstance(value, git.exc.GitCommandError) and (value.status == 128 or value.status == 1):
         # 1: branch does not exist
@@ -56,12 +73,21 @@ class GitRepo(object):
         Class for work with repositories
     """
 
-    def __init__(self, root_repo_dir, repo_name, branch, url, commit_id=None, is_trigger=False, target_branch=None):
+    # Periods (in days before time of commit) of history fetched to shallow repo
+    # while looking for commit by time; full history is fetched after them
+    _deepen_days = (1, 7, 30, 365)
+
+    def __init__(self, root_repo_dir, repo_name, branch, url, commit_id=None, is_trigger=False, target_branch=None,
+                 mirror_dir=None, clone_depth=None, partial_clone=False):
         """
         :param root_repo_dir: Directory where repositories will clone
         :param repo_name: Name of repository
         :param branch: Branch of repository
         :param commit_id: Commit ID
+        :param mirror_dir: Directory with bare mirrors of repositories shared between workspaces
+        :param clone_depth: Count of commits of each branch in shallow clone (full history if not set);
+                            older commits are fetched on demand
+        :param partial_clone: Flag for cloning without file contents of old revisions (blobless clone)
         """
 
         self.repo_name = repo_name
@@ -72,8 +98,12 @@ class GitRepo(object):
         self.repo = None
         self.is_trigger = is_trigger
         self.target_branch = target_branch
+        self.mirror_dir = mirror_dir
+        self.clone_depth = clone_depth
+        self.partial_clone = partial_clone
 
-        self.log = logging.getLogger(self.__class__.__name__)
+        # repositories can be extracted in parallel, so each of them has own logger
+        self.log = logging.getLogger(f'{self.__class__.__name__}.{repo_name}')
 
     def prepare_repo(self):
         """
@@ -93,7 +123,7 @@ class GitRepo(object):
         self.hard_reset('origin/master')
         self.pull()
 
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=60))
+    @lazy_retry(_network_retry)
     def clone(self):
         """
         Clone repo
@@ -112,9 +142,64 @@ class GitRepo(object):
 
         if not self.local_repo_dir.exists():
             self.log.info("Clone repo " + self.repo_name)
-            git.Git().clone(self.url, str(self.local_repo_dir))
 
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=60))
+            clone_args = []
+            if self.clone_depth:
+                # all branches are needed for changing state of repo to release branches
+                clone_args += [f'--depth={self.clone_depth}', '--no-single-branch']
+            if self.partial_clone:
+                clone_args.append('--filter=blob:none')
+
+            mirror_path = self.update_mirror() if self.mirror_dir else None
+            if mirror_path:
+                # objects are taken from the local mirror through alternates,
+                # only missing ones are downloaded from remote
+                clone_args += ['--reference', str(mirror_path)]
+
+            git.Git().clone(*clone_args, self.url, str(self.local_repo_dir))
+
+    def update_mirror(self):
+        """
+        Create or update bare mirror of the repository in shared mirror directory
+        One mirror is created for each url
+
+        :return: Path to the mirror or None if the mirror can not be used
+        :rtype: pathlib.Path | None
+        """
+
+        url_hash = hashlib.sha1(self.url.encode('utf-8')).hexdigest()[:10]
+        mirror_path = self.mirror_dir / f'{self.repo_name}_{url_hash}.git'
+
+        try:
+            if mirror_path.exists():
+                self.log.info("Update mirror %s", mirror_path)
+                git.Git(str(mirror_path)).fetch('--prune', 'origin')
+            else:
+                self.log.info("Create mirror %s", mirror_path)
+                self.mirror_dir.mkdir(parents=True, exist_ok=True)
+
+                # mirror is cloned to temporary directory
+                # to not leave broken mirror if cloning is interrupted
+                tmp_path = self.mirror_dir / f'{mirror_path.name}.{os.getpid()}.tmp'
+                if tmp_path.exists():
+                    remove_directory(str(tmp_path))
+                git.Git().clone('--mirror', self.url, str(tmp_path))
+                # workspaces use objects of the mirror, so they must not be removed by auto gc
+                git.Git(str(tmp_path)).config('gc.auto', '0')
+
+                try:
+                    tmp_path.rename(mirror_path)
+                except OSError:
+                    # mirror was created by another process at the same time
+                    remove_directory(str(tmp_path))
+        except Exception:
+            self.log.exception("Can not use mirror %s, repository will be cloned from %s",
+                               mirror_path, self.url)
+            return None
+
+        return mirror_path
+
+    @lazy_retry(_network_retry)
     def fetch(self, branch_name=None):
         """
         Fetch repo
@@ -127,7 +212,7 @@ class GitRepo(object):
         self.repo.remotes.origin.fetch(refname)
         self.hard_reset('FETCH_HEAD')
 
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=60))
+    @lazy_retry(_network_retry)
     def hard_reset(self, reset_to="HEAD"):
         """
         Hard reset repo
@@ -142,8 +227,7 @@ class GitRepo(object):
         else:
             self.repo.git.reset('--hard')
 
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=60),
-           retry=(retry_if_exception_type() | retry_if_result(check_exception)))
+    @lazy_retry(_checkout_retry)
     def checkout(self, branch_name=None, silent=False):
         """
         Checkout to certain state
@@ -176,7 +260,7 @@ class GitRepo(object):
             committed_date = self.repo.commit(checkout_dest).committed_date
             self.log.info("Committed date: %s", datetime.fromtimestamp(committed_date))
 
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=60))
+    @lazy_retry(_network_retry)
     def clean(self):
         """
         Clean repo
@@ -187,7 +271,7 @@ class GitRepo(object):
         self.log.info("Clean repo " + self.repo_name)
         self.repo.git.clean('-xdf')
 
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=60))
+    @lazy_retry(_network_retry)
     def pull(self):
         """
         Pull repo
@@ -219,6 +303,8 @@ class GitRepo(object):
 
         if commit_time:
             self.revert_commit_by_time(commit_time)
+        else:
+            self.fetch_commit()
         # Checkout to commit id
         self.checkout()
 
@@ -227,15 +313,93 @@ class GitRepo(object):
         Sets commit by time.
         If commit date <= certain time,
         commit sets to class variable commit_id.
+        History of shallow repo is deepened until such commit is found.
 
         :param commit_time: timestamp
         :return: None
         """
 
-        self.commit_id = str(next(self.repo.iter_commits(
-            until=commit_time, max_count=1)))
+        deepen_days = iter(self._deepen_days)
+        while True:
+            try:
+                self.commit_id = str(next(self.repo.iter_commits(
+                    until=commit_time, max_count=1)))
+                break
+            except StopIteration:
+                if not self.is_shallow():
+                    raise
+                days = next(deepen_days, None)
+                self.deepen(shallow_since=commit_time - days * 24 * 60 * 60 if days else None)
+
         self.log.info(f"Revert commit by time to: {datetime.fromtimestamp(commit_time)}")
 
+    def is_shallow(self):
+        """
+        Check if repository has truncated history
+
+        :return: Boolean
+        """
+
+        return (pathlib.Path(self.repo.git_dir) / 'shallow').exists()
+
+    def has_commit(self, commit_id):
+        """
+        Check if commit exists in local repository
+
+        :param commit_id: Commit ID
+        :return: Boolean
+        """
+
+        try:
+            self.repo.git.cat_file('-e', f'{commit_id}^{{commit}}')
+        except git.exc.GitCommandError:
+            return False
+        return True
+
+    @lazy_retry(_network_retry)
+    def deepen(self, shallow_since=None, depth=None):
+        """
+        Fetch older history to shallow repository
+        If no arguments are set full history is fetched
+
+        :param shallow_since: Timestamp of the oldest fetched commits
+        :param depth: Count of commits from tips of branches
+        :return: None
+        """
+
+        if shallow_since:
+            self.log.info("Deepen repo %s since %s", self.repo_name, datetime.fromtimestamp(shallow_since))
+            self.repo.git.fetch('origin', shallow_since=str(int(shallow_since)))
+        elif depth:
+            self.log.info("Deepen repo %s to %s commits", self.repo_name, depth)
+            self.repo.git.fetch('origin', depth=depth)
+        else:
+            self.log.info("Fetch full history of repo %s", self.repo_name)
+            self.repo.git.fetch('origin', unshallow=True)
+
+    def fetch_commit(self):
+        """
+        Fetch commit from class variable commit_id to shallow repository if it does not exist
+
+        :return: None
+        """
+
+        if str(self.commit_id).lower() == 'head' or not self.is_shallow() or self.has_commit(self.commit_id):
+            return
+
+        self.log.info("Fetch commit %s of repo %s", self.commit_id, self.repo_name)
+        try:
+            self.repo.git.fetch('origin', self.commit_id, depth=self.clone_depth or 1)
+            return
+        except git.exc.GitCommandError:
+            # remote can forbid fetching of commits by id or commit id is abbreviated
+            self.log.info("Commit %s can not be fetched directly", self.commit_id)
+
+        depth = self.clone_depth or 1
+        while self.is_shallow() and not self.has_commit(self.commit_id):
+            depth *= 4
+            self.deepen(depth=depth)
+
     def get_time(self, commit_id=None):
         """
         Get datetime of commit
@@ -267,11 +431,12 @@ class ProductState(object):
 
     repo_states = []
 
-    def __init__(self, sources_list, root_repo_dir, commit_time):
+    def __init__(self, sources_list, root_repo_dir, commit_time, mirror_dir=None):
         """
         :param sources_list: dictionary of repositories
         :param root_repo_dir: path to repositories directory
         :param commit_time: Time for getting slice of commits of repositories
+        :param mirror_dir: path to directory with bare mirrors of repositories
         """
 
         self.commit_time = commit_time
@@ -283,26 +448,30 @@ class ProductState(object):
             is_trigger = data.get('trigger') or False
 
             self.repo_states.append(
-                GitRepo(root_repo_dir, repo_name, branch, data['url'], commit_id, is_trigger, target_branch))
+                GitRepo(root_repo_dir, repo_name, branch, data['url'], commit_id, is_trigger, target_branch,
+                        mirror_dir, data.get('clone_depth'), data.get('partial_clone') or False))
 
-    def extract_all_repos(self):
+    def extract_all_repos(self, max_workers=None):
         """
         Get repositories and checkout them to the right state
+        Repositories are extracted in parallel in two passes:
+            repositories with certain revisions (time of triggered commit is taken from them)
+            repositories with HEAD revision (they are moved back by the time of triggered commit)
+
+        :param max_workers: Count of repositories extracted at the same time
+                            (all repositories by default)
+        :type max_workers: Integer
 
         :return: None
         """
 
+        timings = {}
+
+        self._extract_repos([repo for repo in self.repo_states if repo.commit_id != 'HEAD'],
+                            None, max_workers, timings)
+
         git_commit_date = None
         for repo in self.repo_states:
-            if repo.commit_id != 'HEAD':
-                repo.prepare_repo()
-                if MediaSdkDirectories.is_release_branch(repo.branch_name):
-                    if not repo.is_branch_exist(repo.branch_name):
-                        raise BranchDoesNotExistException(
-                            f'Release branch {repo.branch_name} does not exist in the repo {repo.repo_name}')
-                    repo.change_repo_state(branch_name=repo.branch_name)
-                else:
-                    repo.change_repo_state()
             if repo.is_trigger:
                 git_commit_date = repo.get_time()
 
@@ -310,18 +479,83 @@ class ProductState(object):
             if self.commit_time \
             else git_commit_date
 
+        self._extract_repos([repo for repo in self.repo_states if repo.commit_id == 'HEAD'],
+                            commit_timestamp, max_workers, timings)
+
+        log = logging.getLogger(self.__class__.__name__)
+        log.info('-' * 50)
         for repo in self.repo_states:
-            if repo.commit_id == 'HEAD':
-                repo.prepare_repo()
-                if MediaSdkDirectories.is_release_branch(repo.branch_name):
-                    if not repo.is_branch_exist(repo.branch_name):
-                        raise BranchDoesNotExistException(
-                            f'Release branch {repo.branch_name} does not exist in the repo {repo.repo_name}')
-                    repo.change_repo_state(branch_name=repo.branch_name, commit_time=commit_timestamp)
-                # if parameters '--commit-time', '--changed-repo' and '--repo-states' didn't set
-                # then variable 'commit_timestamp' is 'None' and 'HEAD' revisions be used
-                elif repo.repo_name not in THIRD_PARTY:
-                    repo.change_repo_state(commit_time=commit_timestamp)
+            log.info('Repository %s extracted in %.1f sec', repo.repo_name, timings[repo.repo_name])
+
+    @staticmethod
+    def _extract_repos(repos, commit_timestamp, max_workers, timings):
+        """
+        Extract repositories in parallel
+
+        :param repos: Repositories to extract
+        :type repos: List
+
+        :param commit_timestamp: Time of commits for repositories with HEAD revision
+        :type commit_timestamp: float | None
+
+        :param max_workers: Count of repositories extracted at the same time
+        :type max_workers: Integer | None
+
+        :param timings: Dictionary for saving time of extracting for each repository
+        :type timings: Dict
+
+        :return: None | Exception
+        """
+
+        if not repos:
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(repos)) as executor:
+            futures = {executor.submit(ProductState._extract_repo, repo, commit_timestamp): repo
+                       for repo in repos}
+            errors = []
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    timings[futures[future].repo_name] = future.result()
+                except Exception as error:
+                    errors.append(error)
+
+        # raise exception only after all repositories are processed
+        # to not leave other repositories in the middle of extracting
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def _extract_repo(repo, commit_timestamp=None):
+        """
+        Get repository and checkout it to the right state
+
+        :param repo: Repository
+        :type repo: GitRepo
+
+        :param commit_timestamp: Time of commits for repository with HEAD revision
+        :type commit_timestamp: float | None
+
+        :return: Time of extracting in seconds
+        :rtype: float
+        """
+
+        start_time = time.monotonic()
+        # commit id is changed from HEAD to real revision during preparing the repo
+        is_head_revision = repo.commit_id == 'HEAD'
+
+        repo.prepare_repo()
+        if MediaSdkDirectories.is_release_branch(repo.branch_name):
+            if not repo.is_branch_exist(repo.branch_name):
+                raise BranchDoesNotExistException(
+                    f'Release branch {repo.branch_name} does not exist in the repo {repo.repo_name}')
+            repo.change_repo_state(branch_name=repo.branch_name, commit_time=commit_timestamp)
+        # if parameters '--commit-time', '--changed-repo' and '--repo-states' didn't set
+        # then variable 'commit_timestamp' is 'None' and 'HEAD' revisions be used
+        elif not is_head_revision or repo.repo_name not in THIRD_PARTY:
+            repo.change_repo_state(commit_time=commit_timestamp)
+
+        return time.monotonic() - start_time
 
     def save_repo_states(self, sources_file, trigger):
         """
@@ -396,26 +630,40 @@ class ProductState(object):
         """
 
         repo_files = collections.defaultdict(list)
-        max_workers = multiprocessing.cpu_count() * 2
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            for repo_name in repo_states:
-                repo_path = repos_dir / repo_name
-                repo = git.Git(str(repo_path))
-                future_appends = {
-                    executor.submit(ProductState.get_last_committer_of_file, repo, file_path):
-                    file_path for file_path in repo_path.rglob('*')
-                    if '.git' not in str(file_path) and file_path.is_file()
-                }
-
-                for future in concurrent.futures.as_completed(future_appends):
-                    result = future.result()
-                    if result:
-                        rel_file_path, author_email = result
-                        file_path = repo_path / rel_file_path
-                        repo_files[author_email].append(str(file_path))
+        for repo_name in repo_states:
+            repo_path = repos_dir / repo_name
+            owners = FilesOwnersIndex(repo_path).get_owners()
+            if owners is None:
+                # index can not be built, so every file is checked separately
+                ProductState._add_files_owners_by_file(repo_path, repo_files)
+                continue
+
+            for file_path in repo_path.rglob('*'):
+                if '.git' not in str(file_path) and file_path.is_file():
+                    # files which are not committed have no owner
+                    author_email = owners.get(file_path.relative_to(repo_path).as_posix(), '')
+                    repo_files[author_email].append(str(file_path))
 
         return repo_files
 
+    @staticmethod
+    def _add_files_owners_by_file(repo_path, repo_files):
+        max_workers = os.cpu_count() * 2
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            repo = git.Git(str(repo_path))
+            future_appends = {
+                executor.submit(ProductState.get_last_committer_of_file, repo, file_path):
+                file_path for file_path in repo_path.rglob('*')
+                if '.git' not in str(file_path) and file_path.is_file()
+            }
+
+            for future in concurrent.futures.as_completed(future_appends):
+                result = future.result()
+                if result:
+                    rel_file_path, author_email = result
+                    file_path = repo_path / rel_file_path
+                    repo_files[author_email].append(str(file_path))
+
     @staticmethod
     def get_last_committer_of_file_line(repo, file_path, line):
         """
@@ -434,16 +682,44 @@ class ProductState(object):
             :rtype None
         """
 
-        if file_path.exists() and not file_path.is_dir():
-            repo = git.Repo(str(repo))
-            rel_file_path = str(file_path.relative_to(repo.working_dir))
-            blame = repo.blame("HEAD", rel_file_path, L=f'{line},+1', e=True)
-            try:
-                return blame[0][0].author.email
-            except Exception:
-                pass
+        committers = ProductState.get_last_committers_of_file_lines(repo, [(file_path, line)])
+        return committers[(file_path, line)]
 
-        return None
+    @staticmethod
+    def get_last_committers_of_file_lines(repo, file_lines):
+        """
+            Get e-mails of last committers of many lines
+            Lines are grouped by file, so each file is blamed only once
+
+            :param repo: path to a repository
+            :type repo: pathlib.Path
+
+            :param file_lines: pairs of path to a file from repo and line number
+            :type file_lines: Iterable of Tuples (pathlib.Path, Integer | String)
+
+            :return: {(file_path, line): <email of last committer> | None}
+            :rtype: Dict
+        """
+
+        git_repo = git.Repo(str(repo))
+        revision = git_repo.head.commit.hexsha
+
+        lines_by_file = collections.defaultdict(list)
+        for file_path, line in file_lines:
+            lines_by_file[file_path].append(line)
+
+        committers = {}
+        for file_path, lines in lines_by_file.items():
+            authors = ()
+            if file_path.exists() and not file_path.is_dir():
+                rel_file_path = file_path.relative_to(git_repo.working_dir).as_posix()
+                authors = _blame_file(git_repo.working_dir, revision, rel_file_path)
+
+            for line in lines:
+                line_index = int(line) - 1
+                committers[(file_path, line)] = authors[line_index] if 0 <= line_index < len(authors) else None
+
+        return committers
 
     @staticmethod
     def get_commits(repo_path, commit_from, commit_to=None):
@@ -473,19 +749,220 @@ class ProductState(object):
         return r.commit(commit_from)
 
     @staticmethod
-    def get_commit_number(repo_path):
+    def get_commit_number(repo_path, unshallow=False):
         """
             Get count of commits
 
+            Count of commits is wrong in shallow repository, so commits are counted in temporary
+            bare repository, which fetches only commit objects of HEAD (without trees and blobs),
+            and shallow or partial clone is kept as is.
+            If unshallow is set, full history is fetched to the repository instead:
+            it takes more time and space, but the history is used by next operations (ex: blame).
+            Counts are saved to .git directory by revision, so history is fetched only once
+            for all stages and builds of the same revision.
+
             :param repo_path: Path to a repository
             :type repo_path: pathlib.Path | String
 
+            :param unshallow: Fetch full history to the repository if it is shallow
+            :type unshallow: Boolean
+
             :return: Count of commits
             :rtype: String
         """
 
+        repo_path = pathlib.Path(repo_path)
         if not repo_path.exists():
             return '0'
 
-        git_repo = git.Git(str(repo_path))
-        return str(git_repo.rev_list('--count', 'HEAD'))
+        git_repo = git.Repo(str(repo_path))
+        is_shallow = (pathlib.Path(git_repo.git_dir) / 'shallow').exists()
+        head = git_repo.head.commit.hexsha
+
+        numbers_path = pathlib.Path(git_repo.git_dir) / _COMMIT_NUMBERS_FILE
+        try:
+            numbers = json.loads(numbers_path.read_text())
+        except (OSError, ValueError):
+            numbers = {}
+        if head in numbers and not (is_shallow and unshallow):
+            return numbers[head]
+
+        log = logging.getLogger('ProductState')
+        if not is_shallow:
+            number = str(git_repo.git.rev_list('--count', 'HEAD'))
+        elif unshallow:
+            log.info('Fetch full history of %s to count commits', repo_path)
+            git_repo.git.fetch('origin', unshallow=True)
+            number = str(git_repo.git.rev_list('--count', 'HEAD'))
+        else:
+            log.info('Fetch commits of %s to count them', repo_path)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                commits_repo = git.Repo.init(tmp_dir, bare=True)
+                # --filter=tree:0 is ignored by servers which do not support it, then trees and blobs are fetched too
+                commits_repo.git.fetch(git_repo.remotes.origin.url, head, filter='tree:0')
+                number = str(commits_repo.git.rev_list('--count', head))
+
+        numbers[head] = number
+        try:
+            tmp_path = numbers_path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp_path.write_text(json.dumps(numbers))
+            os.replace(str(tmp_path), str(numbers_path))
+        except OSError:
+            log.warning('Can not save count of commits to %s', numbers_path)
+        return number
+
+
+@functools.lru_cache(maxsize=256)
+def _blame_file(repo_dir, revision, rel_file_path):
+    """
+    Get e-mails of last committers of all lines of file
+    Results are cached, because the same files are blamed many times
+
+    :param repo_dir: Path to a repository
+    :type repo_dir: String
+
+    :param revision: Commit ID
+    :type revision: String
+
+    :param rel_file_path: Path to a file relative to the repository
+    :type rel_file_path: String
+
+    :return: E-mails of last committers ordered by lines
+    :rtype: Tuple
+    """
+
+    try:
+        blame = git.Git(repo_dir).blame('--incremental', revision, '--', rel_file_path)
+    except git.exc.GitCommandError:
+        logging.getLogger('ProductState').warning('Can not blame %s in %s', rel_file_path, revision)
+        return ()
+
+    # incremental format consists of groups of lines:
+    #   <commit id> <line in original file> <line in final file> <count of lines>
+    #   <headers of commit (only for the first group of the commit)>
+    #   filename <file name>
+    emails = {}
+    authors = {}
+    commit_id = final_line = lines_count = None
+    for blame_line in blame.splitlines():
+        if commit_id is None:
+            commit_id, _, final_line, lines_count = blame_line.split()
+        elif blame_line.startswith('author-mail '):
+            emails[commit_id] = blame_line[len('author-mail '):].strip('<>')
+        elif blame_line.startswith('filename '):
+            for line in range(int(final_line), int(final_line) + int(lines_count)):
+                authors[line] = emails.get(commit_id)
+            commit_id = None
+
+    return tuple(authors.get(line) for line in range(1, len(authors) + 1))
+
+
+class FilesOwnersIndex(object):
+    """
+    Index of last committers of files of repository
+
+    Index is built from one walk through 'git log' and saved to .git directory with HEAD revision;
+    next time only commits after the indexed revision are walked.
+    Index is not built for shallow clones, because the oldest fetched commit
+    would be reported as the last commit of all files which were not changed after it.
+    """
+
+    _index_file_name = 'files_owners_index.json'
+
+    def __init__(self, repo_path):
+        """
+        :param repo_path: Path to a repository
+        :type repo_path: pathlib.Path
+        """
+
+        self._repo = git.Repo(str(repo_path))
+        self._index_path = pathlib.Path(self._repo.git_dir) / self._index_file_name
+
+        self._log = logging.getLogger(self.__class__.__name__)
+
+    def _walk_log(self, revisions):
+        """
+        Get last committers of files changed in revisions
+
+        :param revisions: Revision or range of revisions for 'git log'
+        :type revisions: String
+
+        :return: {<file_path>: <last_committer_email>} or None if 'git log' failed
+        :rtype: Dict | None
+        """
+
+        owners = {}
+        process = self._repo.git.execute(['git', '-c', 'core.quotepath=off', 'log', '--name-only',
+                                          '--no-renames', '--format=%x00%ae', revisions],
+                                         as_process=True)
+        author_email = ''
+        for line in process.stdout:
+            line = line.decode('utf-8', errors='backslashreplace').rstrip('\n')
+            if line.startswith('\x00'):
+                author_email = line[1:]
+            # log starts from the newest commit, so the first found author is the last committer
+            elif line and line not in owners:
+                owners[line] = author_email
+        try:
+            # raises error if exit status is not zero
+            process.wait()
+        except git.exc.GitCommandError as error:
+            self._log.warning('Can not get files owners of %s: %s', self._repo.working_dir, error)
+            return None
+
+        return owners
+
+    def _load(self):
+        try:
+            with self._index_path.open() as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, revision, owners):
+        tmp_path = self._index_path.with_suffix('.tmp')
+        with tmp_path.open('w') as index_file:
+            json.dump({'revision': revision, 'owners': owners}, index_file)
+        os.replace(str(tmp_path), str(self._index_path))
+
+    def _is_ancestor(self, ancestor, revision):
+        try:
+            return self._repo.is_ancestor(ancestor, revision)
+        except git.exc.GitCommandError:
+            # indexed revision does not exist anymore
+            return False
+
+    def get_owners(self):
+        """
+        Get last committers of files for HEAD revision
+
+        :return: {<file_path>: <last_committer_email>} or None if index can not be built
+        :rtype: Dict | None
+        """
+
+        if (pathlib.Path(self._repo.git_dir) / 'shallow').exists():
+            self._log.info('%s is shallow clone, files owners index is not used', self._repo.working_dir)
+            return None
+
+        head = self._repo.head.commit.hexsha
+        index = self._load()
+
+        if index and index['revision'] == head:
+            return index['owners']
+
+        if index and self._is_ancestor(index['revision'], head):
+            self._log.info('Update files owners index of %s from %s to %s',
+                           self._repo.working_dir, index['revision'], head)
+            new_owners = self._walk_log(f"{index['revision']}..{head}")
+            if new_owners is None:
+                return None
+            owners = index['owners']
+            owners.update(new_owners)
+        else:
+            self._log.info('Create files owners index of %s for %s', self._repo.working_dir, head)
+            owners = self._walk_log(head)
+            if owners is None:
+                return None
+
+        self._save(head, owners)
+        return owners
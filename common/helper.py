@@ -21,18 +21,44 @@
 """
 Common functions for build runner
 """
+import bz2
+import copy
+import errno
+import functools
+import gzip
+import hashlib
 import logging
+import lzma
 import os
 import pathlib
+import platform
+import re
 import shutil
 import stat
 import tarfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from shutil import copystat, Error, copy2
+from shutil import copystat, Error
 from zipfile import ZipFile, ZIP_DEFLATED
 from common.system_info import get_os_version
 import json
 import subprocess
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:
+    # .zst archives are extracted by zstd tool
+    zstandard = None
 
 
 class UnsupportedArchiveError(Exception):
@@ -172,9 +198,81 @@ class TargetArch(Enum):
     x86_64 = 'x86_64'
 
 
-def make_archive(path, data_to_archive):
+# Size of independently compressed blocks of gzip archives
+_GZIP_BLOCK_SIZE = 16 * 1024 * 1024
+# Limit of uncompressed data waiting for compression in each gzip archive,
+# so used memory does not grow with count of CPUs
+_GZIP_MAX_PENDING_SIZE = 128 * 1024 * 1024
+
+# Multithreaded compressors of tar stream, selected by suffix of archive
+_TAR_COMPRESSORS = {
+    '.zst': ['zstd', '-T0', '-q', '-c'],
+    '.xz': ['xz', '-T0', '-c'],
+}
+
+
+class _ParallelGzipWriter(object):
+    """
+    Write-only file object which compresses data by independent blocks in several threads.
+    Result is a sequence of gzip members, so it is a valid gzip file for standard tools.
+    """
+
+    def __init__(self, fileobj, compresslevel=6, threads=None, block_size=_GZIP_BLOCK_SIZE):
+        """
+        :param fileobj: File object for compressed data
+        :type fileobj: File object
+
+        :param compresslevel: Level of compression
+        :type compresslevel: Integer
+
+        :param threads: Number of compressing threads (count of CPUs by default)
+        :type threads: Integer
+
+        :param block_size: Size of independently compressed blocks
+        :type block_size: Integer
+        """
+
+        self._fileobj = fileobj
+        self._compresslevel = compresslevel
+        self._block_size = block_size
+        threads = threads or os.cpu_count() or 1
+        # limit size of blocks in memory, it also limits count of blocks compressed at the same time
+        self._max_pending = max(1, min(threads * 2, _GZIP_MAX_PENDING_SIZE // block_size))
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._pending = deque()
+        self._buffer = bytearray()
+        self._is_empty = True
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            self._submit(bytes(self._buffer[:self._block_size]))
+            del self._buffer[:self._block_size]
+        return len(data)
+
+    def _submit(self, block):
+        self._is_empty = False
+        self._pending.append(self._executor.submit(gzip.compress, block, self._compresslevel))
+        while len(self._pending) > self._max_pending:
+            self._fileobj.write(self._pending.popleft().result())
+
+    def close(self):
+        # empty gzip member is written for empty data to get valid gzip file
+        if self._buffer or self._is_empty:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        try:
+            while self._pending:
+                self._fileobj.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown()
+
+
+def make_archive(path, data_to_archive, threads=None):
     """
     Create archive with certain data
+    Archive type is selected by suffix: .tar, .gz (compressed by blocks in several threads),
+    .bz2, .xz and .zst (compressed by multithreaded xz and zstd tools), .zip
 
     :param path: Path to archive file (ex: /home/user/archive.tar)
     :type path: pathlib.Path
@@ -209,7 +307,11 @@ def make_archive(path, data_to_archive):
         ]
     :type data_to_archive: List
 
-    :return: None
+    :param threads: Number of compressing threads (count of CPUs by default)
+    :type threads: Integer
+
+    :return: Flag whether all data was packed
+    :rtype: Boolean
     """
 
     no_errors = True
@@ -219,17 +321,35 @@ def make_archive(path, data_to_archive):
     log.info('-' * 50)
     log.info('create archive %s', path)
 
-    if path.suffix == '.tar':
+    start_time = time.monotonic()
+    archive_file = None
+    compressor = None
+    if path.suffix == '.zip':
+        pkg = ZipFile(path, 'w', compression=ZIP_DEFLATED)
+    elif path.suffix == '.tar':
         pkg = tarfile.open(path, "w")
     elif path.suffix == '.gz':
-        pkg = tarfile.open(path, "w:gz", compresslevel=6)
+        archive_file = open(path, 'wb')
+        compressor = _ParallelGzipWriter(archive_file, compresslevel=6, threads=threads)
+        pkg = tarfile.open(fileobj=compressor, mode="w|")
     elif path.suffix == '.bz2':
         pkg = tarfile.open(path, "w:bz2")
-    elif path.suffix == '.zip':
-        pkg = ZipFile(path, 'w', compression=ZIP_DEFLATED)
+    elif path.suffix in _TAR_COMPRESSORS and shutil.which(_TAR_COMPRESSORS[path.suffix][0]):
+        cmd = list(_TAR_COMPRESSORS[path.suffix])
+        if threads:
+            cmd[1] = f'-T{threads}'
+        archive_file = open(path, 'wb')
+        compressor = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=archive_file)
+        pkg = tarfile.open(fileobj=compressor.stdin, mode="w|")
+    elif path.suffix == '.xz':
+        log.warning('xz is not found, archive is compressed in one thread')
+        pkg = tarfile.open(path, "w:xz")
+    elif path.suffix == '.zst':
+        log.error("zstd is not found, archive can not be created")
+        return False
     else:
         log.error("Extension %s is not supported", path.suffix)
-        no_errors = False
+        return False
 
     for info in data_to_archive:
         for relative in info['relative']:
@@ -238,15 +358,39 @@ def make_archive(path, data_to_archive):
 
             log.info('add to archive %s, pack as "%s"', path_to_archive, pack_as)
             try:
-                if path.suffix in ('.tar', '.gz'):
-                    pkg.add(path_to_archive, arcname=pack_as)
-                elif path.suffix == '.zip':
+                if isinstance(pkg, ZipFile):
                     _zip_data(path_to_archive, pack_as, pkg)
+                else:
+                    pkg.add(path_to_archive, arcname=pack_as)
             except:
                 log.exception("Can not pack results")
                 no_errors = False
 
-    pkg.close()
+    try:
+        pkg.close()
+        if isinstance(pkg, ZipFile):
+            data_size = sum(member.file_size for member in pkg.infolist())
+        else:
+            data_size = pkg.offset
+
+        if isinstance(compressor, subprocess.Popen):
+            compressor.stdin.close()
+            if compressor.wait():
+                log.error('%s failed with code %s', compressor.args[0], compressor.returncode)
+                no_errors = False
+        elif compressor is not None:
+            compressor.close()
+    except:
+        log.exception("Can not create archive")
+        return False
+    finally:
+        if archive_file is not None:
+            archive_file.close()
+
+    elapsed_time = max(time.monotonic() - start_time, 1e-6)
+    log.info('archive %s is created in %.1f s: %.1f MB of data packed to %.1f MB (%.1f MB/s)',
+             path, elapsed_time, data_size / 2 ** 20, path.stat().st_size / 2 ** 20,
+             data_size / 2 ** 20 / elapsed_time)
 
     return no_errors
 
@@ -278,9 +422,90 @@ def _zip_data(root_path, pack_as, archive):
         archive.write(root_path, arcname=pack_as)
 
 
-def extract_archive(archive_path, extract_to, exclude=None):
+_TAR_DECOMPRESSORS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+
+def _is_excluded_pattern(exclude):
+    """
+    Get function checking whether path is matched by one of exclude patterns
+
+    :param exclude: Patterns for files and directories (just path sub-strings with no wildcards or regexp)
+    :type exclude: List | None
+
+    :return: Function which gets path and returns flag whether it is excluded
+    :rtype: Function
+    """
+
+    if not exclude or not isinstance(exclude, list):
+        return lambda member_path: False
+
+    # all patterns are checked by one pass of regular expression
+    pattern = re.compile('|'.join(re.escape(sub_string) for sub_string in exclude))
+    return lambda member_path: pattern.search(member_path) is not None
+
+
+def _extract_tar_stream(package, extract_to, is_excluded):
+    """
+    Extract tar members one by one as they are read from archive
+    Members are not accumulated, so used memory does not depend on count of members
+
+    :param package: Tar archive opened in stream mode
+    :type package: tarfile.TarFile
+
+    :param extract_to: Path to extraction
+    :type extract_to: pathlib.Path
+
+    :param is_excluded: Function checking whether member should not be extracted
+    :type is_excluded: Function
     """
-    Extract archive (.tar, .zip)
+
+    directories = []
+    while True:
+        member = package.next()
+        if member is None:
+            break
+        # list of members is not needed for stream extraction
+        package.members = []
+
+        if is_excluded(member.name):
+            continue
+
+        if member.isdir():
+            # attributes of directories are set after extraction of their content (like in extractall)
+            directories.append(member)
+            member = copy.copy(member)
+            member.mode = 0o700
+        package.extract(member, str(extract_to), set_attrs=not member.isdir())
+
+    directories.sort(key=lambda directory: directory.name, reverse=True)
+    for directory in directories:
+        directory_path = str(extract_to / directory.name)
+        try:
+            package.chown(directory, directory_path, False)
+            package.utime(directory, directory_path)
+            package.chmod(directory, directory_path)
+        except tarfile.ExtractError:
+            logging.getLogger('helper.extract_archive').exception('Can not set attributes of %s',
+                                                                  directory_path)
+
+
+def _extract_zip_member(package, member, extract_to):
+    try:
+        package.extract(member, str(extract_to))
+    except FileExistsError:
+        # parent directory was created by another thread at the same time
+        package.extract(member, str(extract_to))
+
+
+def extract_archive(archive_path, extract_to, exclude=None, threads=None):
+    """
+    Extract archive (.tar, .tar.gz, .tar.bz2, .tar.xz, .tar.zst, .zip)
+    Tar archives are extracted as a stream, zip archives are extracted in several threads.
+    .zst archives require zstd tool or zstandard Python module
 
     :param archive_path: Path to archive
     :type archive_path: String|pathlib.Path
@@ -291,49 +516,147 @@ def extract_archive(archive_path, extract_to, exclude=None):
     :param exclude: Patterns for files and directories that should not be extracted
                     (just path sub-strings with no wildcards or regexp)
     :type exclude: List
+
+    :param threads: Number of threads for extracting of zip archives (count of CPUs by default)
+    :type threads: Integer
     """
 
     archive_path = pathlib.Path(archive_path)
     extract_to = pathlib.Path(extract_to)
-
+    is_excluded = _is_excluded_pattern(exclude)
+
+    if archive_path.suffix == '.zip':
+        with ZipFile(str(archive_path)) as package:
+            members = [member for member in package.infolist() if not is_excluded(member.filename)]
+            with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as executor:
+                for result in [executor.submit(_extract_zip_member, package, member, extract_to)
+                               for member in members]:
+                    result.result()
+        return
+
+    # compression modules are used instead of stream modes of tarfile,
+    # because they support archives of several compressed members (created by make_archive)
+    decompressor = None
+    source_file = None
     if archive_path.suffix == '.tar':
-        package = tarfile.open(str(archive_path), 'r')
-    elif archive_path.suffix == '.gz':
-        package = tarfile.open(str(archive_path), 'r:gz')
-    elif archive_path.suffix == '.zip':
-        package = ZipFile(str(archive_path))
+        archive_file = open(str(archive_path), 'rb')
+    elif archive_path.suffix in _TAR_DECOMPRESSORS:
+        archive_file = _TAR_DECOMPRESSORS[archive_path.suffix](str(archive_path))
+    elif archive_path.suffix == '.zst' and shutil.which('zstd'):
+        decompressor = subprocess.Popen(['zstd', '-d', '-q', '-c', str(archive_path)],
+                                        stdout=subprocess.PIPE)
+        archive_file = decompressor.stdout
+    elif archive_path.suffix == '.zst' and zstandard is not None:
+        source_file = open(str(archive_path), 'rb')
+        archive_file = zstandard.ZstdDecompressor().stream_reader(source_file, read_across_frames=True)
+    elif archive_path.suffix == '.zst':
+        raise UnsupportedArchiveError(
+            f"Can not extract {archive_path}: zstd tool is not found and zstandard module is not installed")
     else:
         raise UnsupportedArchiveError(
             f"Unsupported archive extension {archive_path.suffix}")
 
-    if isinstance(package, ZipFile):
-        package_data = package.infolist()
-        is_zip = True
-    else:
-        package_data = package.getmembers()
-        is_zip = False
-
-    data_to_extract = None
-    if exclude and isinstance(exclude, list):
-        data_to_extract = []
-        for member in package_data:
-            is_excluded = False
-            for pattern in exclude:
-                member_path = member.filename if is_zip else member.name
-                if pattern in member_path:
-                    is_excluded = True
+    try:
+        with tarfile.open(fileobj=archive_file, mode='r|') as package:
+            _extract_tar_stream(package, extract_to, is_excluded)
+    finally:
+        archive_file.close()
+        if source_file is not None:
+            source_file.close()
+        if decompressor is not None and decompressor.wait():
+            raise tarfile.ReadError(f'Can not decompress {archive_path}')
+
+
+# Operations with many files are limited by latency of file systems, so more threads than CPUs are used
+_IO_THREADS = min(32, (os.cpu_count() or 1) + 4)
+
+# ioctl request of Linux for cloning file content (reflink) on copy-on-write file systems
+_FICLONE = 0x40049409
+
+# Errors of fast copying methods which mean that method is not supported for these files
+_COPY_FALLBACK_ERRORS = (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSUP,
+                         errno.EINVAL, errno.EBADF, errno.ENOTTY, errno.ETXTBSY, errno.ENOTSOCK)
+
+_COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def _copy_file_content(src_fd, dst_fd, size):
+    """
+    Copy content of file by the fastest available method:
+    reflink, copy_file_range (server-side copy on network file systems), sendfile, read/write
+
+    :return: Size of copied data
+    :rtype: Integer
+    """
+
+    if fcntl is not None and platform.system() == 'Linux':
+        try:
+            fcntl.ioctl(dst_fd, getattr(fcntl, 'FICLONE', _FICLONE), src_fd)
+            return size
+        except OSError as error:
+            if error.errno not in _COPY_FALLBACK_ERRORS + (errno.EPERM,):
+                raise
+
+    offset = 0
+    for method in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, method):
+            continue
+        try:
+            while True:
+                if method == 'copy_file_range':
+                    copied = os.copy_file_range(src_fd, dst_fd, _COPY_CHUNK_SIZE, offset, offset)
+                else:
+                    copied = os.sendfile(dst_fd, src_fd, offset, _COPY_CHUNK_SIZE)
+                if not copied:
+                    if offset:
+                        return offset
+                    # nothing is copied at all: it is returned for some special and network files
+                    # (ex: procfs, sysfs) even if they are not empty, so the next method is tried
                     break
-            if not is_excluded:
-                data_to_extract.append(member)
+                offset += copied
+        except OSError as error:
+            if error.errno not in _COPY_FALLBACK_ERRORS:
+                raise
+        os.lseek(dst_fd, offset, os.SEEK_SET)
+
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    while True:
+        data = os.read(src_fd, 1024 * 1024)
+        if not data:
+            return offset
+        os.write(dst_fd, data)
+        offset += len(data)
+
+
+def copy_file(src, dst, copy_metadata=True):
+    """
+    Copy file using reflinks and in-kernel copying when file system supports them
 
-    package.extractall(extract_to, members=data_to_extract)
-    package.close()
+    :param src: Path to source file
+    :type src: String | pathlib.Path
+
+    :param dst: Path to destination file
+    :type dst: String | pathlib.Path
+
+    :param copy_metadata: Copy permissions and times of file (like shutil.copy2)
+                          Should be disabled for shares which do not support Linux permissions (ex: samba)
+    :type copy_metadata: Boolean
+
+    :return: Path to destination file
+    """
+
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        _copy_file_content(src_file.fileno(), dst_file.fileno(), os.fstat(src_file.fileno()).st_size)
+
+    if copy_metadata:
+        copystat(src, dst)
+    return dst
 
 
 # shutil.copytree function with extension
 # TODO merge with copytree from test scripts
-def copytree(src, dst, symlinks=False, ignore=None, copy_function=copy2,
-             ignore_dangling_symlinks=False):
+def copytree(src, dst, symlinks=False, ignore=None, copy_function=None,
+             ignore_dangling_symlinks=False, copy_metadata=True, threads=None):
     """Recursively copy a directory tree.
 
     The destination directory must not already exist.
@@ -364,10 +687,65 @@ def copytree(src, dst, symlinks=False, ignore=None, copy_function=copy2,
 
     The optional copy_function argument is a callable that will be used
     to copy each file. It will be called with the source path and the
-    destination path as arguments. By default, copy2() is used, but any
+    destination path as arguments. By default, copy_file() is used, but any
     function that supports the same signature (like copy()) can be used.
 
+    If the optional copy_metadata flag is false, permissions and times
+    of files and directories are not copied (ex: for samba shares).
+
+    Files are copied by pool of `threads` threads.
+
     """
+
+    if copy_function is None:
+        copy_function = functools.partial(copy_file, copy_metadata=copy_metadata)
+
+    errors = []
+    directories = []
+    copies = deque()
+    max_pending = (threads or _IO_THREADS) * 4
+
+    def wait_copy():
+        srcname, dstname, copying = copies.popleft()
+        try:
+            copying.result()
+        except Error as err:
+            errors.extend(err.args[0])
+        except OSError as why:
+            errors.append((srcname, dstname, str(why)))
+
+    with ThreadPoolExecutor(max_workers=threads or _IO_THREADS) as executor:
+        def submit_copy(srcname, dstname):
+            copies.append((srcname, dstname, executor.submit(copy_function, srcname, dstname)))
+            while len(copies) > max_pending:
+                wait_copy()
+
+        _copytree(src, dst, symlinks, ignore, ignore_dangling_symlinks, copy_metadata,
+                  submit_copy, directories, errors)
+
+        while copies:
+            wait_copy()
+
+    if copy_metadata:
+        # times of directories are set after copying of their content
+        for src_dir, dst_dir in reversed(directories):
+            try:
+                copystat(src_dir, dst_dir)
+            except OSError as why:
+                # Copying file access times may fail on Windows
+                if getattr(why, 'winerror', None) is None:
+                    errors.append((src_dir, dst_dir, str(why)))
+    if errors:
+        raise Error(errors)
+    return dst
+
+
+def _copytree(src, dst, symlinks, ignore, ignore_dangling_symlinks, copy_metadata,
+              submit_copy, directories, errors):
+    """
+    Create directory tree and symlinks and submit copying of files (see copytree)
+    """
+
     names = os.listdir(src)
     if ignore is not None:
         ignored_names = ignore(src, names)
@@ -376,7 +754,7 @@ def copytree(src, dst, symlinks=False, ignore=None, copy_function=copy2,
 
     # Add "exist_ok" in case of copying to existing directory
     os.makedirs(dst, exist_ok=True)
-    errors = []
+    directories.append((src, dst))
     for name in names:
         if name in ignored_names:
             continue
@@ -390,37 +768,125 @@ def copytree(src, dst, symlinks=False, ignore=None, copy_function=copy2,
                     # code with a custom `copy_function` may rely on copytree
                     # doing the right thing.
                     os.symlink(linkto, dstname)
-                    copystat(srcname, dstname, follow_symlinks=not symlinks)
+                    if copy_metadata:
+                        copystat(srcname, dstname, follow_symlinks=not symlinks)
                 else:
                     # ignore dangling symlink if the flag is on
                     if not os.path.exists(linkto) and ignore_dangling_symlinks:
                         continue
                     # otherwise let the copy occurs. copy2 will raise an error
                     if os.path.isdir(srcname):
-                        copytree(srcname, dstname, symlinks, ignore,
-                                 copy_function)
+                        _copytree(srcname, dstname, symlinks, ignore, ignore_dangling_symlinks,
+                                  copy_metadata, submit_copy, directories, errors)
                     else:
-                        copy_function(srcname, dstname)
+                        submit_copy(srcname, dstname)
             elif os.path.isdir(srcname):
-                copytree(srcname, dstname, symlinks, ignore, copy_function)
+                _copytree(srcname, dstname, symlinks, ignore, ignore_dangling_symlinks,
+                          copy_metadata, submit_copy, directories, errors)
             else:
                 # Will raise a SpecialFileError for unsupported file types
-                copy_function(srcname, dstname)
-        # catch the Error from the recursive copytree so that we can
-        # continue with other files
-        except Error as err:
-            errors.extend(err.args[0])
+                submit_copy(srcname, dstname)
         except OSError as why:
             errors.append((srcname, dstname, str(why)))
+
+
+# Name of file with sizes and hashes of uploaded artifacts (see upload_dir)
+UPLOAD_MANIFEST = '.upload_manifest.json'
+
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path, size=None):
+    """
+    Get sha256 digest of file content
+
+    :param path: Path to file
+    :type path: String | pathlib.Path
+
+    :param size: Count of bytes from the beginning of file to hash (whole file if None)
+    :type size: None | Integer
+
+    :return: Hex digest
+    :rtype: String
+    """
+
+    digest = hashlib.sha256()
+    with open(str(path), 'rb') as data:
+        while size is None or size > 0:
+            chunk = data.read(_HASH_CHUNK_SIZE if size is None else min(_HASH_CHUNK_SIZE, size))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if size is not None:
+                size -= len(chunk)
+    return digest.hexdigest()
+
+
+def upload_dir(src_dir, dst_dir):
+    """
+    Copy directory to share, reusing identical files of previous upload to the same directory.
+    Data is uploaded to temporary directory, then previous directory is rotated (see rotate_dir)
+    and temporary directory is renamed to destination.
+    Metadata of files is not copied (see copytree)
+
+    :param src_dir: Path to directory for uploading
+    :type src_dir: pathlib.Path
+
+    :param dst_dir: Path to destination directory
+    :type dst_dir: pathlib.Path
+
+    :return: None | Exception
+    """
+
+    log = logging.getLogger('helper.upload_dir')
+
+    tmp_dir = dst_dir.with_name(f'.{dst_dir.name}.uploading.{os.getpid()}')
+    if tmp_dir.exists():
+        remove_directory(str(tmp_dir))
+
     try:
-        copystat(src, dst)
-    except OSError as why:
-        # Copying file access times may fail on Windows
-        if getattr(why, 'winerror', None) is None:
-            errors.append((src, dst, str(why)))
-    if errors:
-        raise Error(errors)
-    return dst
+        previous_manifest = json.loads((dst_dir / UPLOAD_MANIFEST).read_text())
+    except (OSError, ValueError):
+        previous_manifest = {}
+
+    manifest = {}
+    stats = {'uploaded': 0, 'reused': 0}
+    lock = threading.Lock()
+
+    def upload_file(src, dst):
+        rel_path = pathlib.Path(os.path.relpath(dst, str(tmp_dir))).as_posix()
+        size = os.stat(src).st_size
+        file_hash = hash_file(src)
+        previous_file = dst_dir / rel_path
+
+        reused = False
+        if previous_manifest.get(rel_path) == [size, file_hash]:
+            try:
+                if previous_file.stat().st_size == size:
+                    try:
+                        os.link(str(previous_file), dst)
+                    except OSError:
+                        # share does not support hard links, file is copied on server side if possible
+                        copy_file(previous_file, dst, copy_metadata=False)
+                    reused = True
+            except OSError:
+                pass
+        if not reused:
+            copy_file(src, dst, copy_metadata=False)
+
+        with lock:
+            manifest[rel_path] = [size, file_hash]
+            stats['reused' if reused else 'uploaded'] += size
+
+    copytree(str(src_dir), str(tmp_dir), copy_function=upload_file, copy_metadata=False)
+    (tmp_dir / UPLOAD_MANIFEST).write_text(json.dumps(manifest, indent=4, sort_keys=True))
+
+    rotate_dir(dst_dir)
+    tmp_dir.rename(dst_dir)
+
+    log.info('%s is uploaded: %.1f MB transferred, %.1f MB reused from previous upload',
+             dst_dir, stats['uploaded'] / 2 ** 20, stats['reused'] / 2 ** 20)
 
 
 # TODO refactor hard code
@@ -551,8 +1017,172 @@ def _remove_directory(path):
         raise caught_exception
 
 
+class _TreeRemover(object):
+    """
+    Removes directory tree by pool of threads.
+    Each directory is a separate task: its files are unlinked relative to descriptor of directory,
+    subdirectories are submitted as new tasks, and directory itself is removed by the task
+    which has finished the last subdirectory, so tasks never wait for each other.
+    """
+
+    _OPEN_FLAGS = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_NOFOLLOW', 0)
+
+    def __init__(self, threads=None):
+        self._executor = ThreadPoolExecutor(max_workers=threads or _IO_THREADS)
+        self._lock = threading.Lock()
+        # {<path to directory>: [<path to parent directory>, <count of not removed subdirectories>]}
+        self._pending = {}
+        self._done = threading.Event()
+        self._caught_exception = None
+
+    def remove(self, path):
+        """
+        :param path: directory to remove
+        :type path: String
+
+        If there were exceptions during removing tree, first exception occurred is raised again
+        """
+
+        if not os.path.isdir(path):
+            raise OSError(2, 'Path does not exist', path)
+
+        try:
+            self._executor.submit(self._remove_task, path, None)
+            self._done.wait()
+        finally:
+            self._executor.shutdown()
+
+        if self._caught_exception:
+            raise self._caught_exception
+
+    def _catch(self, exception):
+        with self._lock:
+            if not self._caught_exception:
+                self._caught_exception = exception
+
+    @staticmethod
+    def _make_writable(path):
+        os.chmod(path, os.stat(path).st_mode | stat.S_IRWXU)
+
+    def _list_directory(self, dir_fd):
+        if os.scandir in getattr(os, 'supports_fd', ()):
+            with os.scandir(dir_fd) as entries:
+                return [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries]
+        return [(name, stat.S_ISDIR(os.stat(name, dir_fd=dir_fd, follow_symlinks=False).st_mode))
+                for name in os.listdir(dir_fd)]
+
+    def _remove_files(self, path):
+        """
+        Unlink all non-directory entries of directory
+
+        :return: Names of subdirectories
+        :rtype: List
+        """
+
+        try:
+            dir_fd = os.open(path, self._OPEN_FLAGS)
+        except PermissionError:
+            self._make_writable(path)
+            dir_fd = os.open(path, self._OPEN_FLAGS)
+
+        sub_dirs = []
+        try:
+            for name, is_dir in self._list_directory(dir_fd):
+                if is_dir:
+                    sub_dirs.append(name)
+                    continue
+                try:
+                    os.unlink(name, dir_fd=dir_fd)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    try:
+                        self._make_writable(path)
+                        os.unlink(name, dir_fd=dir_fd)
+                    except Exception as e:
+                        self._catch(e)
+        finally:
+            os.close(dir_fd)
+        return sub_dirs
+
+    def _remove_task(self, path, parent):
+        sub_dirs = []
+        try:
+            sub_dirs = self._remove_files(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self._catch(e)
+
+        if not sub_dirs:
+            self._finish(path, parent)
+            return
+
+        with self._lock:
+            self._pending[path] = [parent, len(sub_dirs)]
+        for name in sub_dirs:
+            self._executor.submit(self._remove_task, os.path.join(path, name), path)
+
+    def _finish(self, path, parent):
+        """
+        Remove empty directory and finish its parent if it was the last subdirectory
+        """
+
+        while True:
+            try:
+                os.rmdir(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                try:
+                    self._make_writable(os.path.dirname(path))
+                    os.rmdir(path)
+                except Exception as e:
+                    self._catch(e)
+
+            if parent is None:
+                self._done.set()
+                return
+
+            with self._lock:
+                self._pending[parent][1] -= 1
+                if self._pending[parent][1]:
+                    return
+                path, (parent, _) = parent, self._pending.pop(parent)
+
+
+def _remove_directory_in_background(path):
+    """
+    Rename directory and remove it by a detached process,
+    so removing of big directory does not block the caller.
+    Not removed directories left after previous calls are removed too.
+
+    :param path: directory to remove
+    :type path: String
+    """
+
+    path = pathlib.Path(path)
+    trash_prefix = f'.{path.name}.removing.'
+    trash_path = path.with_name(f'{trash_prefix}{os.getpid()}_{time.time():.0f}')
+    path.rename(trash_path)
+
+    trash_paths = [str(trash) for trash in path.parent.glob(f'{trash_prefix}*')]
+    subprocess.Popen([sys.executable, '-c',
+                      'import sys\n'
+                      'sys.path.insert(0, sys.argv[1])\n'
+                      'from common.helper import remove_directory\n'
+                      'for path in sys.argv[2:]:\n'
+                      '    try:\n'
+                      '        remove_directory(path)\n'
+                      '    except OSError:\n'
+                      '        pass\n',
+                      str(pathlib.Path(__file__).resolve().parents[1])] + trash_paths,
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+
+
 if os.name == 'nt':
-    def remove_directory(path):
+    def _remove_tree(path):
         try:
             return _remove_directory(path)
         except WindowsError as err:
@@ -562,8 +1192,32 @@ if os.name == 'nt':
             if err in [3, 206, 123] and (not isinstance(path, str) or not path.startswith(u'\\\\?\\')):
                 return _remove_directory(u'\\\\?\\' + os.path.abspath(str(path, errors='ignore')))
             raise
+elif os.unlink in os.supports_dir_fd:
+    def _remove_tree(path):
+        return _TreeRemover().remove(path)
 else:
-    remove_directory = _remove_directory
+    _remove_tree = _remove_directory
+
+
+def remove_directory(path, background=False):
+    """
+    Removes directory with all content (see _remove_directory)
+
+    @param path: directory to remove
+    @type path: C{string}
+
+    @param background: rename directory and remove it by detached process,
+                       so caller can continue immediately
+    @type background: C{bool}
+    """
+
+    if background:
+        try:
+            return _remove_directory_in_background(path)
+        except OSError:
+            logging.getLogger('helper.remove_directory').warning(
+                'Can not remove %s in background, remove it now', path, exc_info=True)
+    return _remove_tree(str(path))
 
 
 def rotate_dir(directory: pathlib.Path) -> bool:
@@ -618,7 +1272,28 @@ def update_json(check_type, success, output, json_path):
     return True
 
 
-def cmd_exec(cmd, env=None, cwd=None, shell=True, log=None, verbose=True, hide=None):
+def cmd_exec(cmd, env=None, cwd=None, shell=True, log=None, verbose=True, hide=None,
+             stream=False, line_handler=None, tail_size=200, pass_fds=()):
+    """
+    Execute command line
+
+    :param stream: Flag for reading output line by line while the process is running.
+                   In this mode only the last lines of the output are returned
+    :type stream: Boolean
+
+    :param line_handler: Function which is called for each line of output in stream mode
+                         (by default lines are sent to the logger)
+    :type line_handler: function | None
+
+    :param tail_size: Count of last lines of output returned in stream mode
+    :type tail_size: Integer
+
+    :param pass_fds: File descriptors inherited by the process (ex: pipe of job server)
+    :type pass_fds: Tuple
+
+    :return: return code, output
+    :rtype: Tuple
+    """
 
     out_cmd = subprocess.list2cmdline(cmd) if isinstance(cmd, list) else cmd
 
@@ -641,11 +1316,17 @@ def cmd_exec(cmd, env=None, cwd=None, shell=True, log=None, verbose=True, hide=N
         if env:
             log_out(f'environment: {env}')
 
+    if stream:
+        if not line_handler and log:
+            line_handler = log_out
+        return _cmd_exec_stream(cmd, env, cwd, shell, line_handler, tail_size, pass_fds)
+
     try:
         completed_process = subprocess.run(cmd,
                                            shell=shell,
                                            env=env,
                                            cwd=cwd,
+                                           pass_fds=pass_fds,
                                            check=True,
                                            stdout=subprocess.PIPE,
                                            stderr=subprocess.STDOUT,
@@ -657,6 +1338,35 @@ def cmd_exec(cmd, env=None, cwd=None, shell=True, log=None, verbose=True, hide=N
         return failed_process.returncode, failed_process.stdout
 
 
+def _cmd_exec_stream(cmd, env, cwd, shell, line_handler, tail_size, pass_fds):
+    """
+    Execute command line and handle its output line by line
+    without keeping the whole output in memory
+
+    :return: return code, last lines of output
+    :rtype: Tuple
+    """
+
+    tail = deque(maxlen=tail_size)
+
+    with subprocess.Popen(cmd,
+                          shell=shell,
+                          env=env,
+                          cwd=cwd,
+                          pass_fds=pass_fds,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT,
+                          encoding='utf-8',
+                          errors='backslashreplace') as process:
+        for line in process.stdout:
+            line = line.rstrip('\n')
+            tail.append(line)
+            if line_handler:
+                line_handler(line)
+
+    return process.returncode, '\n'.join(tail)
+
+
 def get_packing_cmd(pack_type, pack_dir, enable_ruby, version, source_name):
     params = ['fpm', '--verbose', '-s', 'dir', '-t', pack_type, '--version', version,
                 '-n', source_name] + pack_dir
@@ -0,0 +1,110 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Deferred import of heavy third-party modules (git, yaml, tenacity, distro)
+
+Scripts of infrastructure are started many times per build as short-lived processes,
+so modules which are not needed by the current stage should not be imported at startup.
+"""
+
+import functools
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+# RLock, because import of one lazy module can access another one
+_import_lock = threading.RLock()
+_lazy_modules = {}
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Proxy of module which imports it on the first access to its attribute
+
+    importlib.util.LazyLoader is not used, because before Python 3.12 it is not thread-safe:
+    threads which access the module while it is being imported get AttributeError.
+    Here the real import is done under lock, so other threads wait for its end.
+    """
+
+    def __getattr__(self, attribute):
+        with _import_lock:
+            module = self.__dict__.get('_lazy_module')
+            if module is None:
+                module = importlib.import_module(self.__name__)
+                # attributes are copied, so the next accesses do not go through __getattr__
+                self.__dict__.update(module.__dict__)
+                self.__dict__['_lazy_module'] = module
+        return getattr(module, attribute)
+
+
+def lazy_import(name):
+    """
+    Get module which is really imported on the first access to its attribute
+
+    :param name: Name of top-level module (ex: git)
+    :type name: String
+
+    :return: Module object
+    :rtype: types.ModuleType
+
+    :raises ModuleNotFoundError: if module is not installed
+    """
+
+    with _import_lock:
+        module = sys.modules.get(name) or _lazy_modules.get(name)
+        if module is not None:
+            return module
+
+        if importlib.util.find_spec(name) is None:
+            raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+        module = _lazy_modules[name] = _LazyModule(name)
+        return module
+
+
+def lazy_retry(get_retry_args):
+    """
+    Decorator which works as tenacity.retry, but imports tenacity on the first call of function
+
+    :param get_retry_args: Function which gets tenacity module and returns arguments of tenacity.retry
+                           (ex: lambda tenacity: {'stop': tenacity.stop_after_attempt(3)})
+    :type get_retry_args: Function
+
+    :return: Decorator
+    :rtype: Function
+    """
+
+    def decorator(function):
+        retrying = None
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            nonlocal retrying
+            if retrying is None:
+                tenacity = importlib.import_module('tenacity')
+                retrying = tenacity.retry(**get_retry_args(tenacity))(function)
+            return retrying(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
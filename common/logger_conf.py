@@ -68,3 +68,22 @@ def configure_logger(logger_name='root', logs_path=None):
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
+
+
+def remove_file_handler(logs_path, logger_name='root'):
+    """
+        Remove file handler added by configure_logger
+
+        :param logs_path: Path to log file
+        :type logs_path: pathlib.Path
+        :param logger_name: Name of logger
+        :type logger_name: String
+
+        :return: None
+    """
+
+    logger = logging.getLogger() if logger_name == 'root' else logging.getLogger(logger_name)
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.FileHandler) and handler.baseFilename == str(logs_path.absolute()):
+            logger.removeHandler(handler)
+            handler.close()
@@ -23,7 +23,10 @@ Manifest file manager
 """
 
 import pathlib
-import yaml
+
+from common.lazy_import import lazy_import
+
+yaml = lazy_import('yaml')
 
 
 class ManifestException(Exception):
@@ -24,9 +24,12 @@ Information about system
 """
 
 import platform
-import distro
 from enum import Enum
 
+from common.lazy_import import lazy_import
+
+distro = lazy_import('distro')
+
 
 class UnsupportedOsError(Exception):
     """
@@ -0,0 +1,265 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+""" Unit tests of archives, copying and removing of files
+
+    Usage:
+    python3 -m pytest -v common/test_helper.py
+"""
+
+import errno
+import gzip
+import hashlib
+import io
+import os
+import platform
+import shutil
+import stat
+import tarfile
+
+import pytest
+
+from common import helper
+from common.helper import UPLOAD_MANIFEST, UnsupportedArchiveError, _ParallelGzipWriter, \
+    copy_file, copytree, extract_archive, hash_file, make_archive, remove_directory, upload_dir
+
+
+def make_tree(root):
+    (root / 'lib' / 'pkgconfig').mkdir(parents=True)
+    (root / 'lib' / 'libmfx.so.1').write_bytes(os.urandom(300000))
+    (root / 'lib' / 'libmfx.so').symlink_to('libmfx.so.1')
+    (root / 'lib' / 'pkgconfig' / 'libmfx.pc').write_text('Name: libmfx')
+    (root / 'bin').mkdir()
+    (root / 'bin' / 'sample_decode').write_bytes(os.urandom(1000))
+    (root / 'bin' / 'sample_decode').chmod(0o755)
+    return root
+
+
+def assert_same_trees(first, second):
+    first_paths = sorted(path.relative_to(first) for path in first.rglob('*'))
+    assert first_paths == sorted(path.relative_to(second) for path in second.rglob('*'))
+    for rel_path in first_paths:
+        if (first / rel_path).is_symlink():
+            assert os.readlink(str(first / rel_path)) == os.readlink(str(second / rel_path))
+        elif (first / rel_path).is_file():
+            assert (first / rel_path).read_bytes() == (second / rel_path).read_bytes()
+
+
+class TestArchives:
+    """ Test class
+    """
+    def test_parallel_gzip_writer(self):
+        data = os.urandom(100000) * 3
+        compressed = io.BytesIO()
+        writer = _ParallelGzipWriter(compressed, threads=4, block_size=32 * 1024)
+        for offset in range(0, len(data), 10000):
+            writer.write(data[offset:offset + 10000])
+        writer.close()
+
+        assert gzip.decompress(compressed.getvalue()) == data
+        # each block is a separate gzip member
+        assert compressed.getvalue().count(b'\x1f\x8b\x08') >= len(data) // (32 * 1024)
+
+    def test_parallel_gzip_writer_of_empty_data(self):
+        compressed = io.BytesIO()
+        _ParallelGzipWriter(compressed).close()
+
+        assert gzip.decompress(compressed.getvalue()) == b''
+
+    @pytest.mark.parametrize('suffix', ['.tar', '.tar.gz', '.tar.bz2', '.tar.xz', '.zip'])
+    def test_archive_round_trip(self, tmp_path, suffix):
+        install_dir = make_tree(tmp_path / 'install')
+        archive_path = tmp_path / f'install_pkg{suffix}'
+        data_to_archive = [{'from_path': tmp_path, 'relative': [{'path': 'install'}]}]
+
+        assert make_archive(archive_path, data_to_archive, threads=2)
+        extract_archive(archive_path, tmp_path / 'extracted')
+
+        if suffix == '.zip':
+            # links are stored as files in zip archives
+            assert (tmp_path / 'extracted' / 'install' / 'lib' / 'libmfx.so').read_bytes() == \
+                (install_dir / 'lib' / 'libmfx.so.1').read_bytes()
+        else:
+            assert_same_trees(install_dir, tmp_path / 'extracted' / 'install')
+            assert os.stat(str(tmp_path / 'extracted' / 'install' / 'bin' / 'sample_decode')).st_mode & 0o777 == 0o755
+
+    def test_multi_member_gzip_is_extracted(self, tmp_path):
+        install_dir = make_tree(tmp_path / 'install')
+        archive_path = tmp_path / 'install_pkg.tar.gz'
+        with archive_path.open('wb') as archive_file:
+            # small blocks give archive of many gzip members
+            writer = _ParallelGzipWriter(archive_file, threads=4, block_size=4096)
+            with tarfile.open(fileobj=writer, mode='w|') as archive:
+                archive.add(str(install_dir), arcname='install')
+            writer.close()
+        assert archive_path.read_bytes().count(b'\x1f\x8b\x08') > 10
+
+        extract_archive(archive_path, tmp_path / 'extracted', exclude=['pkgconfig'])
+        assert not (tmp_path / 'extracted' / 'install' / 'lib' / 'pkgconfig').exists()
+        shutil.rmtree(str(install_dir / 'lib' / 'pkgconfig'))
+        assert_same_trees(install_dir, tmp_path / 'extracted' / 'install')
+
+    @pytest.mark.skipif(not shutil.which('zstd'), reason='zstd is not found')
+    def test_zstd_round_trip(self, tmp_path):
+        install_dir = make_tree(tmp_path / 'install')
+        archive_path = tmp_path / 'install_pkg.tar.zst'
+
+        assert make_archive(archive_path, [{'from_path': tmp_path, 'relative': [{'path': 'install'}]}])
+        extract_archive(archive_path, tmp_path / 'extracted')
+        assert_same_trees(install_dir, tmp_path / 'extracted' / 'install')
+
+    def test_zstd_is_not_available(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(helper.shutil, 'which', lambda cmd: None)
+        monkeypatch.setattr(helper, 'zstandard', None)
+
+        with pytest.raises(UnsupportedArchiveError):
+            extract_archive(tmp_path / 'install_pkg.tar.zst', tmp_path / 'extracted')
+
+
+@pytest.mark.skipif(platform.system() != 'Linux', reason='fast copying methods of Linux are tested')
+class TestCopyFile:
+    """ Test class
+    """
+    def setup_method(self):
+        """ Runs before any test
+        """
+        self.calls = []
+
+    def make_source(self, tmp_path):
+        source = tmp_path / 'source.bin'
+        source.write_bytes(os.urandom(3 * 1024 * 1024 + 7))
+        source.chmod(0o750)
+        return source
+
+    def fail(self, name, error_number):
+        def method(*args):
+            self.calls.append(name)
+            raise OSError(error_number, os.strerror(error_number))
+        return method
+
+    def test_fallback_to_read_write(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(helper.fcntl, 'ioctl', self.fail('ioctl', errno.EOPNOTSUPP))
+        monkeypatch.setattr(os, 'copy_file_range', self.fail('copy_file_range', errno.EXDEV), raising=False)
+        monkeypatch.setattr(os, 'sendfile', self.fail('sendfile', errno.EINVAL), raising=False)
+        source = self.make_source(tmp_path)
+
+        copy_file(source, tmp_path / 'copy.bin')
+
+        assert self.calls == ['ioctl', 'copy_file_range', 'sendfile']
+        assert (tmp_path / 'copy.bin').read_bytes() == source.read_bytes()
+        assert (tmp_path / 'copy.bin').stat().st_mode & 0o777 == 0o750
+
+    def test_nothing_copied_falls_back(self, tmp_path, monkeypatch):
+        def copy_file_range(*args):
+            # special files (ex: procfs) are reported as empty
+            self.calls.append('copy_file_range')
+            return 0
+
+        monkeypatch.setattr(helper.fcntl, 'ioctl', self.fail('ioctl', errno.EXDEV))
+        monkeypatch.setattr(os, 'copy_file_range', copy_file_range, raising=False)
+        source = self.make_source(tmp_path)
+
+        copy_file(source, tmp_path / 'copy.bin')
+
+        assert self.calls == ['ioctl', 'copy_file_range']
+        assert (tmp_path / 'copy.bin').read_bytes() == source.read_bytes()
+
+    def test_copying_continues_from_offset(self, tmp_path, monkeypatch):
+        def copy_file_range(src_fd, dst_fd, count, offset_src, offset_dst):
+            # the first chunk is copied, then file system refuses
+            if self.calls:
+                raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+            self.calls.append('copy_file_range')
+            return os.pwrite(dst_fd, os.pread(src_fd, 1000, offset_src), offset_dst)
+
+        monkeypatch.setattr(helper.fcntl, 'ioctl', self.fail('ioctl', errno.ENOTTY))
+        monkeypatch.setattr(os, 'copy_file_range', copy_file_range, raising=False)
+        source = self.make_source(tmp_path)
+
+        copy_file(source, tmp_path / 'copy.bin')
+
+        assert (tmp_path / 'copy.bin').read_bytes() == source.read_bytes()
+
+    def test_other_errors_are_raised(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(helper.fcntl, 'ioctl', self.fail('ioctl', errno.EIO))
+
+        with pytest.raises(OSError):
+            copy_file(self.make_source(tmp_path), tmp_path / 'copy.bin')
+
+
+class TestTrees:
+    """ Test class
+    """
+    def test_copytree(self, tmp_path):
+        install_dir = make_tree(tmp_path / 'install')
+
+        copytree(str(install_dir), str(tmp_path / 'copy'), symlinks=True, threads=4)
+
+        assert_same_trees(install_dir, tmp_path / 'copy')
+        assert (tmp_path / 'copy' / 'bin' / 'sample_decode').stat().st_mode & 0o777 == 0o755
+
+    def test_copytree_follows_links(self, tmp_path):
+        install_dir = make_tree(tmp_path / 'install')
+
+        copytree(str(install_dir), str(tmp_path / 'copy'))
+
+        assert not (tmp_path / 'copy' / 'lib' / 'libmfx.so').is_symlink()
+        assert (tmp_path / 'copy' / 'lib' / 'libmfx.so').read_bytes() == \
+            (install_dir / 'lib' / 'libmfx.so.1').read_bytes()
+
+    def test_remove_directory(self, tmp_path):
+        build_dir = make_tree(tmp_path / 'build')
+        for index in range(20):
+            (build_dir / 'objects' / str(index)).mkdir(parents=True)
+            (build_dir / 'objects' / str(index) / 'file.o').write_text('object')
+        outside = make_tree(tmp_path / 'outside')
+        (build_dir / 'link_to_outside').symlink_to(outside)
+        (build_dir / 'bin').chmod(stat.S_IRUSR | stat.S_IXUSR)
+
+        remove_directory(str(build_dir))
+
+        assert not build_dir.exists()
+        assert (outside / 'lib' / 'libmfx.so.1').exists()
+
+    def test_remove_missing_directory(self, tmp_path):
+        with pytest.raises(OSError):
+            remove_directory(str(tmp_path / 'missing'))
+
+    def test_upload_dir_reuses_files(self, tmp_path):
+        install_dir = make_tree(tmp_path / 'install')
+        share_dir = tmp_path / 'share' / 'build'
+
+        upload_dir(install_dir, share_dir)
+        (install_dir / 'bin' / 'sample_decode').write_bytes(b'changed')
+        upload_dir(install_dir, share_dir)
+
+        for rel_path in ('lib/libmfx.so.1', 'lib/pkgconfig/libmfx.pc', 'bin/sample_decode'):
+            assert (share_dir / rel_path).read_bytes() == (install_dir / rel_path).read_bytes()
+        # unchanged file is linked to previous upload
+        assert (share_dir / 'lib' / 'libmfx.so.1').stat().st_nlink == 2
+        assert (share_dir / 'bin' / 'sample_decode').stat().st_nlink == 1
+        assert UPLOAD_MANIFEST in os.listdir(str(share_dir))
+
+    def test_hash_file(self, tmp_path):
+        data = os.urandom(2 * 1024 * 1024 + 3)
+        (tmp_path / 'data.bin').write_bytes(data)
+
+        assert hash_file(tmp_path / 'data.bin') == hashlib.sha256(data).hexdigest()
+        assert hash_file(tmp_path / 'data.bin', 1000) == hashlib.sha256(data[:1000]).hexdigest()
@@ -0,0 +1,185 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Startup benchmark of infrastructure scripts
+
+Measures import time of entry points with "python -X importtime" and fails if:
+    - import of entry point takes more time than threshold
+    - import time is increased more than allowed in comparison with baseline
+    - heavy modules are imported at startup (they must be imported by common.lazy_import)
+
+Usage:
+    python check_import_time.py --threshold 150 --baseline import_time.json
+"""
+
+import argparse
+import json
+import logging
+import pathlib
+import subprocess
+import sys
+
+INFRASTRUCTURE_ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(INFRASTRUCTURE_ROOT))
+from common import logger_conf
+from common.helper import ErrorCode
+
+ENTRY_POINTS = [
+    'build_scripts.build_runner',
+    'build_scripts.tests_runner',
+    'common.extract_repo',
+    'common.component_checker',
+    'ted_adapter.test_adapter',
+]
+
+# These modules must not be imported at startup of scripts
+HEAVY_MODULES = ['git', 'yaml', 'tenacity', 'distro', 'distutils', 'setuptools', 'buildbot', 'twisted']
+
+
+def measure_import_time(module, repeat):
+    """
+    Get import time of module and list of imported modules
+
+    :param module: Name of module (ex: build_scripts.build_runner)
+    :type module: String
+
+    :param repeat: Number of measurements, minimal time is used
+    :type repeat: Integer
+
+    :return: Import time in milliseconds and list of imported modules
+    :rtype: Tuple
+
+    :raises RuntimeError: if module can not be imported
+    """
+
+    best_time = None
+    imported_modules = []
+    # The first run is not measured, because it creates bytecode caches
+    for _ in range(repeat + 1):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                 cwd=str(INFRASTRUCTURE_ROOT), stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE, universal_newlines=True)
+        if process.returncode:
+            errors = process.stderr.strip().splitlines() or [f'exit code {process.returncode}']
+            raise RuntimeError(errors[-1])
+
+        # Format of lines: "import time: <self us> | <cumulative us> | <indented module name>"
+        module_time = None
+        imported_modules = []
+        for line in process.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if not cumulative.strip().isdigit():
+                continue
+            imported_modules.append(name.strip())
+            if name.strip() == module and not name.startswith('  '):
+                module_time = int(cumulative) / 1000
+        if module_time is None:
+            raise RuntimeError(f'Import time of {module} is not found in output')
+
+        if best_time is None or module_time < best_time:
+            best_time = module_time
+    return best_time, imported_modules
+
+
+def check_import_time(modules, threshold, baseline, max_regression, repeat):
+    """
+    Check import time of modules
+
+    :param threshold: Maximal import time of each module in milliseconds
+    :type threshold: Float
+
+    :param baseline: Import times of modules from previous run ({<module>: <time in ms>})
+    :type baseline: Dict
+
+    :param max_regression: Allowed increase of import time in comparison with baseline in percents
+    :type max_regression: Float
+
+    :return: Flag whether all checks passed and import times of modules
+    :rtype: Tuple
+    """
+
+    log = logging.getLogger('check_import_time')
+    no_errors = True
+    results = {}
+    for module in modules:
+        try:
+            import_time, imported_modules = measure_import_time(module, repeat)
+        except RuntimeError as err:
+            log.error(f'{module}: can not be imported: {err}')
+            no_errors = False
+            continue
+        results[module] = import_time
+        log.info(f'{module}: {import_time:.1f} ms')
+
+        if import_time > threshold:
+            log.error(f'{module}: import time {import_time:.1f} ms exceeds threshold {threshold} ms')
+            no_errors = False
+
+        if module in baseline:
+            limit = baseline[module] * (1 + max_regression / 100)
+            if import_time > limit:
+                log.error(f'{module}: import time {import_time:.1f} ms exceeds baseline '
+                          f'{baseline[module]:.1f} ms by more than {max_regression}%')
+                no_errors = False
+
+        heavy_modules = sorted({name.split('.')[0] for name in imported_modules} & set(HEAVY_MODULES))
+        if heavy_modules:
+            log.error(f'{module}: heavy modules are imported at startup: {", ".join(heavy_modules)}')
+            no_errors = False
+
+    return no_errors, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--modules", nargs='+', default=ENTRY_POINTS,
+                        help="Modules to check (all entry points by default)")
+    parser.add_argument("-t", "--threshold", type=float, default=200,
+                        help="Maximal import time of module in milliseconds")
+    parser.add_argument("-b", "--baseline", type=pathlib.Path,
+                        help="Path to json file with import times of previous run")
+    parser.add_argument("--max-regression", type=float, default=20,
+                        help="Allowed increase of import time in comparison with baseline in percents")
+    parser.add_argument("--save-baseline", type=pathlib.Path,
+                        help="Path to json file for saving import times of this run")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="Number of measurements of each module")
+    args = parser.parse_args()
+    logger_conf.configure_logger()
+
+    baseline = {}
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+
+    no_errors, results = check_import_time(args.modules, args.threshold, baseline,
+                                           args.max_regression, args.repeat)
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=4, sort_keys=True))
+
+    if no_errors:
+        exit(0)
+    exit(ErrorCode.CRITICAL.value)
+
+
+if __name__ == '__main__':
+    main()
@@ -27,6 +27,7 @@ import sys
 import shutil
 import time
 import filecmp
+from contextlib import contextmanager
 from pathlib import Path
 from string import Template
 
@@ -36,13 +37,34 @@ from smoke_test import config as cfg
 
 # classes definition
 class PathPlus(type(Path())):
+    _writer = None
+
     def append_text(self, data, encoding=None, errors=None):
         if not isinstance(data, str):
             raise TypeError('data must be str, not %s' %
                             data.__class__.__name__)
+        if self._writer is not None:
+            return self._writer.write(data)
         with self.open(mode='a+', encoding=encoding, errors=errors) as file:
             return file.write(data)
 
+    @contextmanager
+    def text_writer(self, encoding=None, errors=None):
+        """
+        Keep file opened for append_text() calls inside the block;
+        data is buffered until flush_text() or exit from the block
+        """
+
+        with self.open(mode='a', encoding=encoding, errors=errors) as self._writer:
+            try:
+                yield self
+            finally:
+                self._writer = None
+
+    def flush_text(self):
+        if self._writer is not None:
+            self._writer.flush()
+
     def clear_text_file(self):
         with self.open(mode='w') as file:
             pass
@@ -70,6 +92,7 @@ class TestRunner:
         separator = '='*100
         log_string = f' \n{string_err}\n{separator}'
         cfg.LOG.append_text(log_string)
+        cfg.LOG.flush_text()
 
 
 class TestCase:
@@ -252,36 +275,37 @@ if __name__ == '__main__':
     cfg.PATH_TO_IO.mkdir()
 
     cfg.LOG.clear_text_file()
-    # TODO: change getting folder
-    samples_folder = get_samples_folder()
-    SAMPLE_FEI = samples_folder / 'sample_hevc_fei'
+    with cfg.LOG.text_writer():
+        # TODO: change getting folder
+        samples_folder = get_samples_folder()
+        SAMPLE_FEI = samples_folder / 'sample_hevc_fei'
 
-    PATH_DICT = {'ASG': cfg.ASG, 'FEI_EXTRACTOR': cfg.FEI_EXTRACTOR, 'SAMPLE_FEI': SAMPLE_FEI}
+        PATH_DICT = {'ASG': cfg.ASG, 'FEI_EXTRACTOR': cfg.FEI_EXTRACTOR, 'SAMPLE_FEI': SAMPLE_FEI}
 
-    for name, path in PATH_DICT.items():
-        if not os.access(path, os.X_OK):
-            print(f'No {name} or it cannot be executed')
-            sys.exit(TestReturnCodes.INFRASTRUCTURE_ERROR.value)
+        for name, path in PATH_DICT.items():
+            if not os.access(path, os.X_OK):
+                print(f'No {name} or it cannot be executed')
+                sys.exit(TestReturnCodes.INFRASTRUCTURE_ERROR.value)
 
-    TEST_CASES_CREATOR = TestCasesCreator(cfg.TEST_CASES_DICT)
-    TEST_CASES = TEST_CASES_CREATOR.test_cases
-    TITLES = TEST_CASES_CREATOR.titles
+        TEST_CASES_CREATOR = TestCasesCreator(cfg.TEST_CASES_DICT)
+        TEST_CASES = TEST_CASES_CREATOR.test_cases
+        TITLES = TEST_CASES_CREATOR.titles
 
-    RUNNER = TestRunner()
+        RUNNER = TestRunner()
 
-    for num_of_case, test_case in enumerate(TEST_CASES, 1):
-        print(f'\n{TITLES[num_of_case-1]}', end='')
-        RUNNER.run_test_case(test_case, num_of_case)
+        for num_of_case, test_case in enumerate(TEST_CASES, 1):
+            print(f'\n{TITLES[num_of_case-1]}', end='')
+            RUNNER.run_test_case(test_case, num_of_case)
 
-    INFO_FOR_LOG = f'\nPASSED {RUNNER.passed} of {len(TEST_CASES)}'
-    print(INFO_FOR_LOG)
-    cfg.LOG.append_text(INFO_FOR_LOG)
+        INFO_FOR_LOG = f'\nPASSED {RUNNER.passed} of {len(TEST_CASES)}'
+        print(INFO_FOR_LOG)
+        cfg.LOG.append_text(INFO_FOR_LOG)
 
-    if cfg.PATH_TO_IO.exists():
-        shutil.rmtree(cfg.PATH_TO_IO)
+        if cfg.PATH_TO_IO.exists():
+            shutil.rmtree(cfg.PATH_TO_IO)
 
-    print(f'Time:  {(time.time() - START_TIME):.5f} seconds\n\n')
+        print(f'Time:  {(time.time() - START_TIME):.5f} seconds\n\n')
 
-    if RUNNER.failed != 0:
-        sys.exit(TestReturnCodes.TEST_FAILED.value)
-    sys.exit(TestReturnCodes.SUCCESS.value)
+        if RUNNER.failed != 0:
+            sys.exit(TestReturnCodes.TEST_FAILED.value)
+        sys.exit(TestReturnCodes.SUCCESS.value)
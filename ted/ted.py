@@ -20,14 +20,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
 import re
 import sys
+import hashlib
 import argparse
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 from common.helper import TestReturnCodes
-from ted import discover
+from ted import discover, cache, test as ted_test
 
 if __name__ == '__main__':
     print('Intel(R) Media SDK Open Source TEst Driver')
@@ -39,6 +41,43 @@ if __name__ == '__main__':
         nargs='*',
         help='tests to run, if not specified all tests will be executed'
     )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='count of cases running at the same time (cases of all tests are run by one pool)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=Path,
+        help='enable cache of results of passed cases in this folder; cases with the same '
+             'sample binaries, libraries, streams and command line are reported as cached-pass'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='run all cases even if their results are cached (cache is updated)'
+    )
+    parser.add_argument(
+        '--digest',
+        nargs='+',
+        default=[],
+        choices=sorted(hashlib.algorithms_guaranteed - {'md5', 'shake_128', 'shake_256'}),
+        help='additional digests of outputs computed in the same pass as md5 '
+             '(saved to <case>.digests.json); like md5 of results they are cumulative: '
+             'digest of an output covers all previous outputs of the case'
+    )
+    parser.add_argument(
+        '--pipe-outputs',
+        action='store_true',
+        help='sample_decode writes output to a named pipe, it is hashed without storing on disk '
+             '(not supported on Windows)'
+    )
+    parser.add_argument(
+        '--keep-failed',
+        action='store_true',
+        help='save outputs of failed cases written to pipes (see --pipe-outputs)'
+    )
 
     args = parser.parse_args()
 
@@ -52,6 +91,19 @@ if __name__ == '__main__':
         msg = "Can't load configuration - {}".format(ex)
         sys.exit(msg)
 
+    if args.cache_dir:
+        print("Results of cases are cached in: {}".format(args.cache_dir))
+        cfg.result_cache = cache.ResultCache(args.cache_dir, force=args.force)
+
+    if args.digest:
+        cfg.digest_algorithms = tuple(['md5'] + args.digest)
+
+    if args.pipe_outputs:
+        if not hasattr(os, 'mkfifo'):
+            sys.exit("--pipe-outputs is not supported on this platform")
+        cfg.pipe_outputs = True
+        cfg.keep_failed = args.keep_failed
+
     test_re = None
     if args.test:
         test_re = re.compile('|'.join(args.test))
@@ -74,13 +126,16 @@ if __name__ == '__main__':
 
     results = []
     total = passed = 0
-    for test in tests_to_run:
-        print('  {}'.format(test.name))
-        total_, passed_, details = test.run()
-        results.append(details)
-
-        total += total_
-        passed += passed_
+    if args.jobs > 1:
+        total, passed, results = ted_test.run_parallel(tests_to_run, args.jobs)
+    else:
+        for test in tests_to_run:
+            print('  {}'.format(test.name))
+            total_, passed_, details = test.run()
+            results.append(details)
+
+            total += total_
+            passed += passed_
 
     print("\n{} of {} cases passed".format(passed, total))
 
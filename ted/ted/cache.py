@@ -0,0 +1,185 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import json
+import shutil
+import hashlib
+import collections
+import tempfile
+import threading
+
+from pathlib import Path
+
+from . import configuration
+
+# change it if format of entries or content of key is changed
+_CACHE_VERSION = 2
+
+# environment variables pointing to directories of libraries used by samples (dispatcher, libmfx, driver)
+# and files of libraries in them
+_LIBRARY_DIRS = [
+    ('LD_LIBRARY_PATH', '', '*.so*'),
+    ('MFX_HOME', 'lib64', '*.so*'),
+    ('LIBVA_DRIVERS_PATH', '', '*_drv_video.so'),
+]
+
+# system directories of libva drivers, which are used if LIBVA_DRIVERS_PATH is not set
+_SYSTEM_DRIVERS_DIRS = [
+    '/usr/lib/x86_64-linux-gnu/dri',
+    '/usr/lib64/dri',
+    '/usr/lib/dri',
+    '/usr/local/lib/dri',
+]
+
+# environment variables which change behavior of samples, libraries or driver
+_ENV_VARIABLES = ['LD_LIBRARY_PATH', 'LD_PRELOAD', 'MFX_HOME']
+_ENV_PREFIXES = ('LIBVA_', 'INTEL_', 'MFX_')
+
+
+class ResultCache(object):
+    """
+    Cache of artifact digests of passed cases
+
+    Key of case is made of fingerprints (md5 and mediasdk_file_version) of sample binary,
+    dispatcher, libmfx and driver (libraries from LD_LIBRARY_PATH, MFX_HOME and LIBVA_DRIVERS_PATH
+    or system driver directories), environment variables of libraries and driver,
+    md5 of input streams, par-file text, the exact command line and algorithms of digests.
+    Entries are stored as <cache_dir>/<key[:2]>/<key>.json
+    """
+
+    def __init__(self, cache_dir, force=False):
+        """
+        :param cache_dir: directory of cache entries
+        :param force: run all cases, results are saved to cache anyway
+        """
+
+        self.cache_dir = Path(cache_dir)
+        self.force = force
+
+        self._lock = threading.Lock()
+        self._file_info = {}
+        self._libraries_info = {}
+
+    def _get_files_info(self, fns, version=True):
+        fns = [Path(fn).resolve() for fn in fns]
+        with self._lock:
+            missing = [fn for fn in fns if (fn, version) not in self._file_info]
+        if missing:
+            # files are hashed in parallel
+            infos = configuration.collect_files_info(list(collections.OrderedDict.fromkeys(missing)), version)
+            with self._lock:
+                for fn, info in infos.items():
+                    self._file_info[(fn, version)] = info
+        with self._lock:
+            return [self._file_info[(fn, version)] for fn in fns]
+
+    @staticmethod
+    def _get_library_dirs(env):
+        """
+        :return: list of (<directory>, <pattern of library files>)
+        """
+
+        library_dirs = []
+        for var, subdir, pattern in _LIBRARY_DIRS:
+            for folder in env.get(var, '').split(os.pathsep):
+                if folder:
+                    library_dirs.append((Path(folder) / subdir, pattern))
+        if not env.get('LIBVA_DRIVERS_PATH'):
+            library_dirs.extend((Path(folder), '*_drv_video.so') for folder in _SYSTEM_DRIVERS_DIRS)
+        return library_dirs
+
+    def _get_libraries_info(self, env):
+        library_dirs = self._get_library_dirs(env)
+        key = tuple(library_dirs)
+        with self._lock:
+            info = self._libraries_info.get(key)
+        if info is None:
+            libraries = []
+            for folder, pattern in library_dirs:
+                if folder.is_dir():
+                    libraries.extend(sorted(fn for fn in folder.glob(pattern) if fn.is_file()))
+            info = self._get_files_info(libraries)
+            with self._lock:
+                self._libraries_info[key] = info
+        return info
+
+    @staticmethod
+    def _get_env_values(env):
+        return {
+            var: value for var, value in env.items()
+            if var in _ENV_VARIABLES or var.startswith(_ENV_PREFIXES)
+        }
+
+    def get_key(self, cmd, env, inputs=(), text=None, algorithms=()):
+        """
+        :param cmd: command line of sample (list of strings)
+        :param env: environment of sample (PATH is used for searching of binary)
+        :param inputs: paths to input files (streams)
+        :param text: content of par-file
+        :param algorithms: algorithms of digests of outputs
+
+        :return: key of case or None if sample binary is not found
+        """
+
+        binary = shutil.which(cmd[0], path=env.get('PATH'))
+        if not binary:
+            return None
+
+        key = {
+            'version': _CACHE_VERSION,
+            'cmd': cmd,
+            'binary': self._get_files_info([binary])[0],
+            'libraries': self._get_libraries_info(env),
+            'env': self._get_env_values(env),
+            'inputs': [info['md5'] for info in self._get_files_info(inputs, version=False)],
+            'text': text,
+            'algorithms': list(algorithms),
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / '{}.json'.format(key)
+
+    def load(self, key):
+        """
+        :return: digests of artifacts of cached case ({<artifact>: {<algorithm>: <hex digest>}}) or None
+        """
+
+        if self.force:
+            return None
+        try:
+            return json.loads(self._entry_path(key).read_text())['artifacts']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, key, artifacts):
+        """
+        :param artifacts: digests of artifacts ({<artifact>: {<algorithm>: <hex digest>}})
+        """
+
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # cases are saved by several workers, so entry is replaced atomically
+        handle, tmp_path = tempfile.mkstemp(dir=str(entry_path.parent))
+        with os.fdopen(handle, 'w') as f:
+            json.dump({'artifacts': artifacts}, f)
+        os.replace(tmp_path, str(entry_path))
@@ -22,14 +22,13 @@
 
 import os
 import shutil
-import hashlib
 import platform
 import subprocess
 import collections
 
 from pathlib import Path
 
-from . import config
+from . import config, digest
 
 
 class TestEnvironmentError(Exception):
@@ -69,37 +68,46 @@ def copy_file(src, dest):
 
 
 def collect_md5(fn):
-    md5 = hashlib.md5()
+    return digest.hash_file(fn)['md5']
 
-    with fn.open("rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            md5.update(chunk)
 
-    return md5.hexdigest()
+def collect_file_info(fn, version=True):
+    return collect_files_info([fn], version)[fn]
 
 
-def collect_file_info(fn, version=True):
-    fileinfo = collections.OrderedDict()
-    fileinfo['name'] = fn.name
-    if version:
-        try:
-            p = subprocess.run(
-                ['strings', str(fn)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-            )
-            for line in p.stdout.splitlines():
-                if line.startswith(b'mediasdk_file_version: '):
-                    _, version = line.split(None, 1)
-                    fileinfo['version'] = version.decode('utf-8', 'ignore')
-                    break
-        except subprocess.CalledProcessError:
-            pass
+def collect_files_info(fns, version=True):
+    """
+    Get info of several files, md5 of files are computed in parallel
+
+    :return: {<file>: <info>}
+    """
+
+    digests = digest.hash_files(fns)
 
-    fileinfo['md5'] = collect_md5(fn)
-    fileinfo['filesize'] = fn.stat().st_size
+    infos = collections.OrderedDict()
+    for fn in fns:
+        fileinfo = collections.OrderedDict()
+        fileinfo['name'] = fn.name
+        if version:
+            try:
+                p = subprocess.run(
+                    ['strings', str(fn)],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+                for line in p.stdout.splitlines():
+                    if line.startswith(b'mediasdk_file_version: '):
+                        _, file_version = line.split(None, 1)
+                        fileinfo['version'] = file_version.decode('utf-8', 'ignore')
+                        break
+            except subprocess.CalledProcessError:
+                pass
 
-    return fileinfo
+        fileinfo['md5'] = digests[fn]['md5']
+        fileinfo['filesize'] = fn.stat().st_size
+        infos[fn] = fileinfo
+
+    return infos
 
 
 class Stream(object):
@@ -141,6 +149,17 @@ class Configuration(object):
         except ValueError as ex:
             raise ConfigurationError(ex)
 
+        # cache of case results (ted.cache.ResultCache), disabled by default
+        self.result_cache = None
+
+        # md5 is always computed, other algorithms are computed in the same pass
+        self.digest_algorithms = digest.DEFAULT_ALGORITHMS
+
+        # decoded outputs are written to named pipes and hashed without storing on disk
+        self.pipe_outputs = False
+        # outputs of failed cases are saved even if they are written to pipes
+        self.keep_failed = False
+
         self.environment = collections.OrderedDict()
 
         self.environment['HOSTNAME'] = platform.node()
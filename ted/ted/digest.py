@@ -0,0 +1,139 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Digests of sample outputs and streams
+
+Files are read by large blocks (mmap for big files) and each block is passed to all algorithms,
+so md5 and additional digests (ex: blake2b) are computed in one pass.
+hashlib releases GIL while hashing big blocks, so independent files are hashed in parallel threads.
+
+Two modes are supported:
+    - per-file: digest of each file is computed separately
+    - cumulative: one digest state is updated by all files in the given order,
+      digest of a file covers content of all previous files too
+      (it is the format of results of ted cases, so reference md5 stay valid)
+"""
+
+import os
+import mmap
+import hashlib
+import collections
+
+from concurrent.futures import ThreadPoolExecutor
+
+_BLOCK_SIZE = 1024 * 1024
+
+DEFAULT_ALGORITHMS = ('md5',)
+
+
+class Digest(object):
+    """
+    Several hash algorithms updated by the same data
+    """
+
+    def __init__(self, algorithms=DEFAULT_ALGORITHMS):
+        self._hashes = collections.OrderedDict(
+            (algorithm, hashlib.new(algorithm)) for algorithm in algorithms
+        )
+
+    def update(self, data):
+        for h in self._hashes.values():
+            h.update(data)
+
+    def update_from_file(self, fn):
+        with open(str(fn), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > _BLOCK_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, size, _BLOCK_SIZE):
+                            self.update(view[offset:offset + _BLOCK_SIZE])
+                    finally:
+                        view.release()
+            else:
+                for block in iter(lambda: f.read(_BLOCK_SIZE), b''):
+                    self.update(block)
+
+    def update_from_stream(self, f, copy_to=None):
+        """
+        Read stream (ex: named pipe) until EOF
+
+        :param copy_to: file object for saving of the read data
+        """
+
+        for block in iter(lambda: f.read(_BLOCK_SIZE), b''):
+            self.update(block)
+            if copy_to is not None:
+                copy_to.write(block)
+
+    def hexdigests(self):
+        """
+        :return: {<algorithm>: <hex digest>}, state is not changed
+        """
+
+        return collections.OrderedDict(
+            (algorithm, h.hexdigest()) for algorithm, h in self._hashes.items()
+        )
+
+
+def hash_file(fn, algorithms=DEFAULT_ALGORITHMS):
+    """
+    :return: {<algorithm>: <hex digest>} of the file
+    """
+
+    digest = Digest(algorithms)
+    digest.update_from_file(fn)
+    return digest.hexdigests()
+
+
+def hash_files(files, algorithms=DEFAULT_ALGORITHMS, cumulative=False, jobs=None):
+    """
+    :param files: paths to files, order matters for cumulative mode
+    :param algorithms: names of hashlib algorithms
+    :param cumulative: digest of each file covers all previous files (see module description)
+    :param jobs: count of files hashed at the same time in per-file mode (cpu count by default)
+
+    :return: OrderedDict {<file>: {<algorithm>: <hex digest>}} in the order of files
+    """
+
+    files = list(files)
+    results = collections.OrderedDict()
+
+    if cumulative:
+        digest = Digest(algorithms)
+        for fn in files:
+            digest.update_from_file(fn)
+            results[fn] = digest.hexdigests()
+        return results
+
+    jobs = min(jobs or os.cpu_count() or 1, len(files))
+    if jobs <= 1:
+        for fn in files:
+            results[fn] = hash_file(fn, algorithms)
+        return results
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        digests = executor.map(lambda fn: hash_file(fn, algorithms), files)
+        for fn, file_digests in zip(files, digests):
+            results[fn] = file_digests
+    return results
@@ -85,3 +85,4 @@ class ParFile(object):
 
 
         self.text = text
+        self.streams = list(input_files.values())
@@ -25,9 +25,11 @@ import re
 import json
 import pprint
 import pathlib
-import hashlib
+import threading
 import subprocess
 
+from . import digest
+
 
 class EncodedFileName(object):
     def __init__(self, case_id):
@@ -43,23 +45,130 @@ class EncodedFileName(object):
         return filename
 
 
-def collect_md5(names, workdir, case_id):
-    results = {}
+def collect_md5(names, workdir, case_id, algorithms=digest.DEFAULT_ALGORITHMS):
+    """
+    Get md5 of outputs of case and save them to <case_id>.json
+
+    md5 are cumulative (digest of an output covers all previous outputs of the case),
+    it is the format of reference results.
+
+    :return: {<output>: <md5>}
+    """
+
+    return save_digests(collect_digests(names, workdir, algorithms), workdir, case_id)
+
+
+def collect_digests(names, workdir, algorithms=digest.DEFAULT_ALGORITHMS):
+    """
+    :return: cumulative digests of outputs ({<output>: {<algorithm>: <hex digest>}})
+    """
+
+    digests = digest.hash_files([workdir / name for name in names], algorithms, cumulative=True)
+    return {name: digests[workdir / name] for name in names}
+
 
-    md5 = hashlib.md5()
-    for name in names:
-        with (workdir / name).open("rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                md5.update(chunk)
+def save_digests(digests, workdir, case_id):
+    """
+    Save md5 of outputs to <case_id>.json,
+    digests of additional algorithms are saved to <case_id>.digests.json
+    (they are cumulative too, so they differ from digests of separate files)
 
-        results[name] = md5.hexdigest()
+    :param digests: {<output>: {<algorithm>: <hex digest>}}
+    :return: {<output>: <md5>}
+    """
 
+    results = {name: output_digests['md5'] for name, output_digests in digests.items()}
+    save_results(results, workdir, case_id)
+
+    extra_digests = {
+        name: {algorithm: value for algorithm, value in output_digests.items() if algorithm != 'md5'}
+        for name, output_digests in digests.items()
+    }
+    if any(extra_digests.values()):
+        with (workdir / "{:04d}.digests.json".format(case_id)).open('w') as f:
+            json.dump(extra_digests, f)
+
+    return results
+
+
+def save_results(results, workdir, case_id):
     result = workdir / "{:04d}.json".format(case_id)
 
     with result.open('w') as f:
         json.dump(results, f)
 
-    return results
+
+class CachedResults(dict):
+    """
+    md5 of outputs of case taken from the result cache
+    """
+    pass
+
+
+class FifoOutput(object):
+    """
+    Output of sample written to a named pipe and hashed while it is produced,
+    so the output is not stored on disk
+
+    If keep_failed is set, the output is also copied to <name>.part, which replaces
+    the pipe if sample fails (as if the output was written by sample itself).
+    """
+
+    def __init__(self, path, algorithms, keep_failed=False):
+        self.path = path
+        self.keep_failed = keep_failed
+        self.digest = digest.Digest(algorithms)
+
+        self._copy_path = path.with_name(path.name + '.part')
+        self._opened = threading.Event()
+        self.error = None
+
+        os.mkfifo(str(path))
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        try:
+            with open(str(self.path), 'rb') as f:
+                self._opened.set()
+                copy_to = self._copy_path.open('wb') if self.keep_failed else None
+                try:
+                    self.digest.update_from_stream(f, copy_to)
+                finally:
+                    if copy_to is not None:
+                        copy_to.close()
+        except OSError as exc:
+            self.error = exc
+        finally:
+            self._opened.set()
+
+    def finish(self, passed):
+        """
+        Wait for the end of output and remove the pipe, must be called after exit of sample
+
+        :return: digests of output or None if it was not read
+        """
+
+        # sample could exit without opening of the pipe,
+        # in this case reader is blocked in open() until the pipe is opened for writing
+        while not self._opened.is_set():
+            try:
+                os.close(os.open(str(self.path), os.O_WRONLY | os.O_NONBLOCK))
+            except OSError:
+                # reader has not opened the pipe yet
+                self._opened.wait(0.01)
+        self._thread.join()
+
+        self.path.unlink()
+        if self.keep_failed and self._copy_path.exists():
+            if passed:
+                self._copy_path.unlink()
+            else:
+                self._copy_path.replace(self.path)
+
+        if self.error:
+            return None
+        return self.digest.hexdigests()
 
 
 class Runner(object):
@@ -83,6 +192,8 @@ class Runner(object):
         cmd = [str(e) for e in cmd]
         log.log(subprocess.list2cmdline(cmd))
         log.separator()
+        # header stays in the log even if ted is killed while the sample is running
+        log.flush()
 
         try:
             p = subprocess.run(
@@ -105,6 +216,62 @@ class Runner(object):
 
             return exc.returncode
 
+    def _execute(self, case_id, cmd, workdir, log, outputs, inputs=(), text=None, pipe_output=False):
+        """
+        Run sample or take md5 of its outputs from the result cache
+
+        If pipe_output is set and pipes are enabled in configuration,
+        the only output is written by sample to a named pipe (see FifoOutput)
+
+        :return: md5 of outputs (CachedResults if taken from cache), empty dict if sample failed
+        """
+
+        cmd = [str(e) for e in cmd]
+        cache = self.cfg.result_cache
+        key = cache.get_key(cmd, self.env, inputs, text, self.cfg.digest_algorithms) if cache else None
+
+        if key:
+            cached = cache.load(key)
+            if cached:
+                log.dump_header()
+                log.separator()
+                log.log(subprocess.list2cmdline(cmd))
+                log.separator()
+                log.log("result is taken from cache: {}".format(key))
+                results = CachedResults(save_digests(cached, workdir, case_id))
+                log.log(pprint.pformat(results))
+                return results
+
+        fifo = None
+        if pipe_output and self.cfg.pipe_outputs:
+            fifo = FifoOutput(workdir / outputs[0], self.cfg.digest_algorithms,
+                              keep_failed=self.cfg.keep_failed)
+
+        returncode = None
+        try:
+            returncode = self._run(case_id, cmd, workdir, log)
+        finally:
+            if fifo:
+                digests = fifo.finish(returncode == 0)
+
+        results = {}
+        if returncode == 0:
+            if fifo is None:
+                digests = collect_digests(outputs, workdir, self.cfg.digest_algorithms)
+            elif digests is None:
+                log.log("output is not read from pipe: {}".format(fifo.error))
+                return results
+            else:
+                digests = {outputs[0]: digests}
+            results = save_digests(digests, workdir, case_id)
+            log.log(pprint.pformat(results))
+            if key:
+                cache.save(key, digests)
+        elif fifo and not self.cfg.keep_failed:
+            log.log("output is not saved, use --keep-failed to save outputs of failed cases")
+
+        return results
+
     def other_options(self, case):
         cmd = []
         # process remaining arguments
@@ -130,14 +297,8 @@ class Runner(object):
 
         cmd.extend(self.other_options(case))
 
-        returncode = self._run(case_id, cmd, workdir, log)
-
-        results = {}
-        if returncode == 0:
-            results = collect_md5([decoded], workdir, case_id)
-            log.log(pprint.pformat(results))
-
-        return results
+        return self._execute(case_id, cmd, workdir, log, [decoded], inputs=[stream.path],
+                             pipe_output=True)
 
     def sample_encode(self, case_id, case, workdir, log):
         cmd = ['sample_encode']
@@ -175,14 +336,7 @@ class Runner(object):
         encoded = "{:04d}.{}".format(case_id, encoder.codec)
         cmd.extend(['-o', encoded])
 
-        returncode = self._run(case_id, cmd, workdir, log)
-
-        results = {}
-        if returncode == 0:
-            results = collect_md5([encoded], workdir, case_id)
-            log.log(pprint.pformat(results))
-
-        return results
+        return self._execute(case_id, cmd, workdir, log, [encoded], inputs=[stream.path])
 
     def sample_multi_transcode(self, case_id, case, workdir, log):
         cmd = ['sample_multi_transcode']
@@ -191,20 +345,14 @@ class Runner(object):
         encoded_fn = EncodedFileName(case_id)
         
         text = re.sub(r'\{out\}', encoded_fn, parfile.text)
+        inputs = [stream.path for stream in parfile.streams]
 
         parfile = workdir / '{:04d}.par'.format(case_id)
         parfile.write_text(text)
 
         cmd.extend(['-par', parfile.name])
 
-        returncode = self._run(case_id, cmd, workdir, log)
-
-        results = {}
-        if returncode == 0:
-            results = collect_md5(encoded_fn.names, workdir, case_id)
-            log.log(pprint.pformat(results))
-
-        return results
+        return self._execute(case_id, cmd, workdir, log, encoded_fn.names, inputs=inputs, text=text)
 
     def sample_vpp(self, case_id, case, workdir, log):
         cmd = ['sample_vpp']
@@ -221,11 +369,4 @@ class Runner(object):
         processed = "{:04d}.vpp".format(case_id)
 
         cmd.extend(['-o', processed])
-        returncode = self._run(case_id, cmd, workdir, log)
-
-        results = {}
-        if returncode == 0:
-            results = collect_md5([processed], workdir, case_id)
-            log.log(pprint.pformat(results))
-
-        return results
+        return self._execute(case_id, cmd, workdir, log, [processed], inputs=[stream.path])
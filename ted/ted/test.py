@@ -25,6 +25,7 @@ import json
 import datetime
 import collections
 import itertools
+import concurrent.futures
 
 from pathlib import Path
 
@@ -36,13 +37,40 @@ class ValidationError(Exception):
 
 
 class CaseLogger(object):
+    """
+    Log of case; file is opened once and written through a buffer,
+    which is flushed on exit from the block (the case is finished or crashed)
+
+    with CaseLogger(fn, cfg) as log:
+        log.log(msg)
+    """
+
+    _buffer_size = 1024 * 1024
+
     def __init__(self, fn, cfg):
         self.fn = fn
         self.cfg = cfg
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def log(self, msg):
-        with self.fn.open('a+') as f:
-            f.write(msg + '\n')
+        if self._file is None:
+            self._file = self.fn.open('a', buffering=self._buffer_size)
+        self._file.write(msg + '\n')
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
     def dump_header(self):
         for key, value in self.cfg.environment.items():
@@ -102,41 +130,64 @@ class Test(object):
         elif self.test_type == 'vpp':
             return self.runner.sample_vpp(case_id, params, workdir, log)
 
-    def run(self):
+    def prepare_results(self):
         self.clear_results()
         self.results.mkdir(parents=True, exist_ok=True)
-        total = passed = 0
 
-        details = {
-            'test': self.name,
-            'cases': []
-        }
-        for i, case in enumerate(self.cases, 1):
-            log = CaseLogger(self.results / "{:04d}.log".format(i), self.cfg)
+    def run_case(self, case_id, case):
+        """
+        Run one case; cases write only own files ({case_id:04d}.*),
+        so they can be run at the same time
 
-            total += 1
-            print("    {:04d}".format(i), end="")
-            results = self.exec_test_tool(i, case, self.results, log)
+        :return: details of case
+        """
+
+        with CaseLogger(self.results / "{:04d}.log".format(case_id), self.cfg) as log:
+            results = self.exec_test_tool(case_id, case, self.results, log)
 
             log.separator()
             res = {
-                'id': '{:04d}'.format(i),
+                'id': '{:04d}'.format(case_id),
                 'artifacts': results
             }
 
-            if results:
-                passed += 1
-                print(" - ok")
+            if isinstance(results, run.CachedResults):
+                log.log('CACHED-PASS')
+                res['status'] = 'CACHED-PASS'
+            elif results:
                 log.log('PASS')
                 res['status'] = 'PASS'
                 self.remove_generated(results, self.results)
             else:
-                print(" - FAIL")
                 res['status'] = 'FAIL'
                 log.log('FAIL')
 
-            details['cases'].append(res)
             log.log('\nfinisned: {}'.format(datetime.datetime.now()))
+        return res
+
+    def run(self):
+        self.prepare_results()
+        total = passed = 0
+
+        details = {
+            'test': self.name,
+            'cases': []
+        }
+        for i, case in enumerate(self.cases, 1):
+            total += 1
+            print("    {:04d}".format(i), end="", flush=True)
+            res = self.run_case(i, case)
+
+            if res['status'] == 'PASS':
+                passed += 1
+                print(" - ok")
+            elif res['status'] == 'CACHED-PASS':
+                passed += 1
+                print(" - cached-pass")
+            else:
+                print(" - FAIL")
+
+            details['cases'].append(res)
 
         return (total, passed, details)
 
@@ -198,3 +249,44 @@ class Test(object):
 
             self.cases.append(case)
 
+
+def run_parallel(tests, jobs):
+    """
+    Run cases of all tests on pool of workers
+    Output and details are in order of tests and cases, as for sequential run
+
+    :return: total, passed, list of details of tests
+    """
+
+    total = passed = 0
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = []
+        for test in tests:
+            test.prepare_results()
+            futures.append([executor.submit(test.run_case, i, case)
+                            for i, case in enumerate(test.cases, 1)])
+
+        for test, test_futures in zip(tests, futures):
+            print('  {}'.format(test.name))
+            details = {
+                'test': test.name,
+                'cases': []
+            }
+            for i, future in enumerate(test_futures, 1):
+                res = future.result()
+
+                total += 1
+                if res['status'] == 'PASS':
+                    passed += 1
+                    print("    {:04d} - ok".format(i), flush=True)
+                elif res['status'] == 'CACHED-PASS':
+                    passed += 1
+                    print("    {:04d} - cached-pass".format(i), flush=True)
+                else:
+                    print("    {:04d} - FAIL".format(i), flush=True)
+
+                details['cases'].append(res)
+            results.append(details)
+
+    return (total, passed, results)
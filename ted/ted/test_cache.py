@@ -0,0 +1,125 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+""" Unit tests of result cache and digests of outputs
+
+    Usage:
+    python3 -m pytest -v ted/ted/test_cache.py
+"""
+
+import hashlib
+import os
+
+from ted import digest
+from ted.cache import ResultCache
+
+
+class TestDigest:
+    """ Test class
+    """
+    def test_hash_files(self, tmp_path):
+        # the second file is bigger than block, so it is hashed through mmap
+        data = [b'first', os.urandom(digest._BLOCK_SIZE * 2 + 5), b'']
+        files = []
+        for index, content in enumerate(data):
+            files.append(tmp_path / '{:04d}.out'.format(index))
+            files[-1].write_bytes(content)
+
+        digests = digest.hash_files(files, ('md5', 'sha1'), jobs=3)
+
+        assert list(digests) == files
+        for fn, content in zip(files, data):
+            assert digests[fn] == {'md5': hashlib.md5(content).hexdigest(),
+                                   'sha1': hashlib.sha1(content).hexdigest()}
+
+    def test_cumulative_digests(self, tmp_path):
+        data = [b'first', b'second', b'third']
+        files = []
+        for index, content in enumerate(data):
+            files.append(tmp_path / '{:04d}.out'.format(index))
+            files[-1].write_bytes(content)
+
+        digests = digest.hash_files(files, cumulative=True)
+
+        for index, fn in enumerate(files):
+            assert digests[fn] == {'md5': hashlib.md5(b''.join(data[:index + 1])).hexdigest()}
+
+
+class TestResultCache:
+    """ Test class
+    """
+    def setup_method(self):
+        """ Runs before any test
+        """
+        self.cmd = ['sample_decode', 'h265', '-i', 'stream.265']
+
+    def make_env(self, tmp_path):
+        (tmp_path / 'bin').mkdir()
+        (tmp_path / 'bin' / 'sample_decode').write_text('#!/bin/sh\n')
+        (tmp_path / 'bin' / 'sample_decode').chmod(0o755)
+        (tmp_path / 'lib').mkdir()
+        (tmp_path / 'lib' / 'libmfxhw64.so.1').write_text('mediasdk_file_version: 1.0\n')
+        (tmp_path / 'dri').mkdir()
+        (tmp_path / 'dri' / 'iHD_drv_video.so').write_text('driver')
+        (tmp_path / 'stream.265').write_bytes(b'stream')
+        return {
+            'PATH': str(tmp_path / 'bin'),
+            'LD_LIBRARY_PATH': str(tmp_path / 'lib'),
+            'LIBVA_DRIVERS_PATH': str(tmp_path / 'dri'),
+            'HOME': str(tmp_path),
+        }
+
+    def get_key(self, tmp_path, env, text=None):
+        return ResultCache(tmp_path / 'cache').get_key(self.cmd, env, [tmp_path / 'stream.265'], text, ('md5',))
+
+    def test_key_invalidation(self, tmp_path):
+        env = self.make_env(tmp_path)
+        key = self.get_key(tmp_path, env)
+
+        assert key == self.get_key(tmp_path, dict(env, HOME='/home/user'))
+        assert key != self.get_key(tmp_path, dict(env, LIBVA_DRIVER_NAME='i965'))
+        assert key != self.get_key(tmp_path, env, text='-b 1000')
+
+        (tmp_path / 'stream.265').write_bytes(b'changed stream')
+        assert key != self.get_key(tmp_path, env)
+        key = self.get_key(tmp_path, env)
+
+        (tmp_path / 'dri' / 'iHD_drv_video.so').write_text('new driver')
+        assert key != self.get_key(tmp_path, env)
+        key = self.get_key(tmp_path, env)
+
+        (tmp_path / 'lib' / 'libmfxhw64.so.1').write_text('mediasdk_file_version: 1.1\n')
+        assert key != self.get_key(tmp_path, env)
+
+    def test_missing_binary(self, tmp_path):
+        env = self.make_env(tmp_path)
+
+        assert self.get_key(tmp_path, dict(env, PATH=str(tmp_path))) is None
+
+    def test_save_and_load(self, tmp_path):
+        env = self.make_env(tmp_path)
+        key = self.get_key(tmp_path, env)
+        artifacts = {'0001.00.out': {'md5': hashlib.md5(b'frame').hexdigest()}}
+
+        assert ResultCache(tmp_path / 'cache').load(key) is None
+        ResultCache(tmp_path / 'cache').save(key, artifacts)
+
+        assert ResultCache(tmp_path / 'cache').load(key) == artifacts
+        assert ResultCache(tmp_path / 'cache', force=True).load(key) is None
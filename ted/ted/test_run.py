@@ -0,0 +1,118 @@
+# Copyright (c) 2019 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+""" Unit tests of parallel run of cases and outputs written to pipes
+
+    Usage:
+    python3 -m pytest -v ted/ted/test_run.py
+"""
+
+import hashlib
+import os
+import subprocess
+import time
+
+import pytest
+
+from ted import run
+from ted.test import run_parallel
+
+
+class FakeTest(object):
+    """ Test with cases finishing in reverse order
+    """
+    def __init__(self, name, statuses):
+        self.name = name
+        self.cases = statuses
+        self.prepared = False
+
+    def prepare_results(self):
+        self.prepared = True
+
+    def run_case(self, case_id, status):
+        time.sleep(0.05 * (len(self.cases) - case_id))
+        return {'id': '{:04d}'.format(case_id), 'status': status}
+
+
+class TestRunParallel:
+    """ Test class
+    """
+    def test_output_is_ordered(self, capsys):
+        tests = [
+            FakeTest('decode', ['PASS', 'FAIL', 'CACHED-PASS']),
+            FakeTest('encode', ['PASS', 'PASS']),
+        ]
+
+        total, passed, results = run_parallel(tests, 4)
+
+        assert (total, passed) == (5, 4)
+        assert all(test.prepared for test in tests)
+        assert [details['test'] for details in results] == ['decode', 'encode']
+        assert [case['id'] for case in results[0]['cases']] == ['0001', '0002', '0003']
+        assert capsys.readouterr().out.splitlines() == [
+            '  decode',
+            '    0001 - ok',
+            '    0002 - FAIL',
+            '    0003 - cached-pass',
+            '  encode',
+            '    0001 - ok',
+            '    0002 - ok',
+        ]
+
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='named pipes are not supported')
+class TestFifoOutput:
+    """ Test class
+    """
+    def write(self, path, data):
+        subprocess.run(['sh', '-c', 'cat > "$0"', str(path)], input=data, check=True)
+
+    def test_output_is_hashed(self, tmp_path):
+        data = os.urandom(3 * 1024 * 1024)
+        fifo = run.FifoOutput(tmp_path / '0001.00.out', ('md5', 'sha256'))
+
+        self.write(tmp_path / '0001.00.out', data)
+
+        assert fifo.finish(True) == {'md5': hashlib.md5(data).hexdigest(),
+                                     'sha256': hashlib.sha256(data).hexdigest()}
+        assert not (tmp_path / '0001.00.out').exists()
+
+    def test_output_is_not_opened(self, tmp_path):
+        fifo = run.FifoOutput(tmp_path / '0001.00.out', ('md5',))
+
+        assert fifo.finish(False) == {'md5': hashlib.md5(b'').hexdigest()}
+        assert not os.listdir(str(tmp_path))
+
+    def test_output_of_failed_case_is_kept(self, tmp_path):
+        fifo = run.FifoOutput(tmp_path / '0001.00.out', ('md5',), keep_failed=True)
+
+        self.write(tmp_path / '0001.00.out', b'broken frame')
+
+        fifo.finish(False)
+        assert (tmp_path / '0001.00.out').read_bytes() == b'broken frame'
+        assert os.listdir(str(tmp_path)) == ['0001.00.out']
+
+    def test_output_of_passed_case_is_removed(self, tmp_path):
+        fifo = run.FifoOutput(tmp_path / '0001.00.out', ('md5',), keep_failed=True)
+
+        self.write(tmp_path / '0001.00.out', b'frame')
+
+        assert fifo.finish(True) == {'md5': hashlib.md5(b'frame').hexdigest()}
+        assert not os.listdir(str(tmp_path))
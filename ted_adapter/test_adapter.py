@@ -38,7 +38,7 @@ import logging
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 from ted_adapter import adapter_conf
 from common.mediasdk_directories import MediaSdkDirectories, THIRD_PARTY
-from common.helper import TestReturnCodes, Product_type, Build_type, Build_event, rotate_dir
+from common.helper import TestReturnCodes, Product_type, Build_type, Build_event, rotate_dir, copytree
 from smoke_test.config import LOG_PATH, LOG_NAME
 from common.logger_conf import configure_logger
 from test_scripts import components_installer
@@ -55,6 +55,7 @@ class TedAdapter(object):
     test_adapter_log_dir = test_driver_dir / 'ted_adapter/logs'
     test_adapter_log_name = 'test_adapter.log'
     tests_timeout = 300  # 5 minutes
+    tests_jobs = min(4, os.cpu_count() or 1)  # count of ted cases running at the same time
 
     def __init__(self, build_artifacts_dir, tests_artifacts_dir, tests_artifacts_url, root_dir):
         """
@@ -156,7 +157,7 @@ class TedAdapter(object):
         # Path to the folder lib64 where located driver
         self.env['LIBVA_DRIVERS_PATH'] = adapter_conf.DRIVER_PATH
 
-        process = subprocess.run('python3 ted/ted.py',
+        process = subprocess.run(f'python3 ted/ted.py -j {self.tests_jobs}',
                                  shell=True,
                                  cwd=self.test_driver_dir,
                                  env=self.env,
@@ -186,14 +187,12 @@ class TedAdapter(object):
         print(f'Copy results to {self.tests_artifacts_dir}')
         print(f'Artifacts are available by: {self.tests_artifacts_url}')
 
-        # Workaround for copying to samba share on Linux to avoid exceptions while setting Linux permissions.
-        _orig_copystat = shutil.copystat
-        shutil.copystat = lambda x, y, follow_symlinks=True: x
-        shutil.copytree(self.test_results_dir, self.tests_artifacts_dir, ignore=shutil.ignore_patterns('bin'))
+        # Metadata is not copied to avoid exceptions while setting Linux permissions on samba share
+        copytree(self.test_results_dir, self.tests_artifacts_dir, ignore=shutil.ignore_patterns('bin'),
+                 copy_metadata=False)
         shutil.copyfile(LOG_PATH, str(self.tests_artifacts_dir / LOG_NAME))
         shutil.copyfile(str(self.test_adapter_log_dir / self.test_adapter_log_name),
                         str(self.root_dir / self.test_adapter_log_name))
-        shutil.copystat = _orig_copystat
 
     # Direct calls of rm, cp commands needs to use them with `sudo`
     # because we need to copy CI build artifacts to the